@@ -1,13 +1,21 @@
-import inspect
+from __future__ import annotations
+
+import enum
+import functools
+import hashlib
 import json
+import math
 import operator
 import os
+import re
+import shutil
 import textwrap
-import types
-from collections import defaultdict
+from array import array
+from collections import Counter, defaultdict
+from concurrent.futures import ProcessPoolExecutor
 from contextlib import suppress
 from pathlib import Path
-from typing import Sequence
+from typing import Sequence, overload
 
 import rich
 import cattrs
@@ -15,13 +23,28 @@ import attrs
 import typer
 from rich.console import Console
 from rich.markdown import Markdown
-import importlib.util
-import sys
+from rich.markup import escape
 
 from rich.table import Table
 from jinja2 import Environment, PackageLoader
 from markdown_it import MarkdownIt
 
+from python_benchmark import compare as stats_compare
+from python_benchmark.history import HistoryStore
+from python_benchmark.scaling import ScalingSeries, worker_counts
+from python_benchmark.loader import load_save
+from python_benchmark.sources import ClassInfo, FunctionInfo, ModuleInfo, module_info
+from python_benchmark.sweep import Series, Sweep, analyze as analyze_sweep
+from python_benchmark.warmup import Warmup
+
+
+def percentile(sorted_data: Sequence[float], q: float) -> float:
+    """Linearly interpolated percentile, `q` in [0, 1]."""
+    position = (len(sorted_data) - 1) * q
+    low = int(position)
+    high = min(low + 1, len(sorted_data) - 1)
+    return sorted_data[low] + (sorted_data[high] - sorted_data[low]) * (position - low)
+
 
 @attrs.define
 class Stats:
@@ -29,6 +52,120 @@ class Stats:
     max: float
     mean: float
     stddev: float
+    rounds: int | None = None
+    median: float | None = None
+    q1: float | None = None
+    q3: float | None = None
+    iqr: float | None = None
+    iqr_outliers: int | None = None
+    stddev_outliers: int | None = None
+    ops: float | None = None
+    # Only computable from the per-round data.
+    p90: float | None = None
+    p99: float | None = None
+    # Per-round timings, only present when saved with `--benchmark-save-data`.
+    data: array | None = attrs.field(default=None, repr=False, eq=False)
+
+    def __attrs_post_init__(self):
+        """Fill in whatever the save did not include, as far as the data allows."""
+        if self.ops is None and self.mean:
+            self.ops = 1 / self.mean
+        if not self.data:
+            return
+
+        sorted_data = sorted(self.data)
+        if self.rounds is None:
+            self.rounds = len(sorted_data)
+        if self.median is None:
+            self.median = percentile(sorted_data, 0.5)
+        if self.q1 is None or self.q3 is None:
+            self.q1 = percentile(sorted_data, 0.25)
+            self.q3 = percentile(sorted_data, 0.75)
+        if self.iqr is None:
+            self.iqr = self.q3 - self.q1
+        if self.iqr_outliers is None:
+            low, high = self.q1 - 1.5 * self.iqr, self.q3 + 1.5 * self.iqr
+            self.iqr_outliers = sum(1 for value in sorted_data if not low <= value <= high)
+        if self.stddev_outliers is None:
+            low, high = self.mean - self.stddev, self.mean + self.stddev
+            self.stddev_outliers = sum(
+                1 for value in sorted_data if not low <= value <= high
+            )
+        self.p90 = percentile(sorted_data, 0.9)
+        self.p99 = percentile(sorted_data, 0.99)
+
+    @property
+    def p50(self) -> float | None:
+        return self.median
+
+
+cattrs.register_structure_hook(array, lambda value, _: array("d", value))
+cattrs.register_unstructure_hook(array, lambda value: value.tolist())
+
+
+class RankBy(str, enum.Enum):
+    MIN = "min"
+    MEDIAN = "median"
+    MEAN = "mean"
+
+    def value_of(self, stats: Stats) -> float:
+        value = getattr(stats, self.value)
+        # Older saves may lack a median, fall back to the min for those.
+        return stats.min if value is None else value
+
+
+@attrs.define
+class Memory:
+    rounds: int
+    peak: int
+    net: int
+
+
+@attrs.define
+class Instrumentation:
+    rounds: int
+    iterations: int
+    counters: dict[str, float] | None
+    counters_error: str | None
+    gc_collections: float
+    gc_time: float
+
+    @property
+    def ipc(self) -> float | None:
+        """Instructions per cycle."""
+        if not self.counters or not self.counters.get("cycles"):
+            return None
+        return self.counters["instructions"] / self.counters["cycles"]
+
+
+# Counters of machine instructions: hardware counters, or Valgrind's simulated CPU.
+# Older saves counted with cachegrind, and a separate process for each benchmark.
+MACHINE_INSTRUCTION_COUNTERS = ("perf", "callgrind", "cachegrind")
+
+
+@attrs.define
+class InstructionCount:
+    # One of `MACHINE_INSTRUCTION_COUNTERS`. Older saves can have "bytecode"
+    # counts of Python bytecodes, which miss the work done in C.
+    counter: str
+    count: float
+
+    @property
+    def is_machine(self) -> bool:
+        """Whether this counts machine instructions, the ones worth comparing."""
+        return self.counter in MACHINE_INSTRUCTION_COUNTERS
+
+    @property
+    def label(self) -> str:
+        return "Instructions" if self.is_machine else "Bytecodes"
+
+
+@attrs.define
+class ImportTime:
+    module: str
+    # As reported by `python -X importtime`, in seconds.
+    self_time: float
+    cumulative: float
 
 
 @attrs.define
@@ -37,6 +174,47 @@ class Benchmark:
     fullname: str
     params: dict | None
     stats: Stats
+    extra_info: dict = attrs.field(factory=dict)
+
+    @property
+    def memory(self) -> Memory | None:
+        """Allocations recorded by the `track_memory` benchmark option."""
+        memory = self.extra_info.get("memory")
+        if not memory:
+            return None
+        return cattrs.structure(memory, Memory)
+
+    @property
+    def instructions(self) -> InstructionCount | None:
+        """Instructions per call, recorded with `--benchmark-instructions`."""
+        instructions = self.extra_info.get("instructions")
+        if not instructions:
+            return None
+        return cattrs.structure(instructions, InstructionCount)
+
+    @property
+    def instrumentation(self) -> Instrumentation | None:
+        """Counters and GC activity recorded by the `instrumented` benchmark option."""
+        instrumentation = self.extra_info.get("instrumentation")
+        if not instrumentation:
+            return None
+        return cattrs.structure(instrumentation, Instrumentation)
+
+    @property
+    def import_time(self) -> ImportTime | None:
+        """The `-X importtime` breakdown saved by the startup benchmarks."""
+        import_time = self.extra_info.get("import_time")
+        if not import_time:
+            return None
+        return cattrs.structure(import_time, ImportTime)
+
+    @property
+    def warmup(self) -> Warmup | None:
+        """Rounds left out before the steady state, detected by our benchmark wrapper."""
+        warmup = self.extra_info.get("warmup")
+        if not warmup:
+            return None
+        return cattrs.structure(warmup, Warmup)
 
 
 @attrs.define
@@ -45,25 +223,98 @@ class MachineInfo:
     python_version: str
     system: str
     release: str
+    # Recorded by our conftest, None in saves from before it was.
+    python_gil: bool | None = None
+    # The `--benchmark-instructions` counter. Such runs are reported apart from plain timing
+    # runs, as they run in their own CI job.
+    instruction_counter: str | None = None
+
+    @property
+    def version_label(self) -> str:
+        """The version, with a `t` suffix when running without the GIL, like `python3.13t`."""
+        return f"{self.python_version}t" if self.python_gil is False else self.python_version
+
+    @property
+    def run_label(self) -> str:
+        """The version label, followed by the instruction counter if any."""
+        if self.instruction_counter:
+            return f"{self.version_label} {self.instruction_counter}"
+        return self.version_label
+
+    @property
+    def key(self) -> str:
+        return f"{self.system}-{self.python_implementation}-{self.run_label.replace(' ', '-')}"
+
+
+@attrs.define
+class CommitInfo:
+    id: str | None = None
+    time: str | None = None
+    branch: str | None = None
+    dirty: bool | None = None
+
+
+class LazyBenchmarks(Sequence[Benchmark]):
+    """Benchmarks that are only structured when first accessed."""
+
+    def __init__(self, raw: list[dict]):
+        self._raw: list[dict | None] = raw
+        self._benchmarks: list[Benchmark | None] = [None] * len(raw)
+
+    def __len__(self) -> int:
+        return len(self._benchmarks)
+
+    @overload
+    def __getitem__(self, index: int) -> Benchmark: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> list[Benchmark]: ...
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        benchmark = self._benchmarks[index]
+        if benchmark is None:
+            benchmark = cattrs.structure(self._raw[index], Benchmark)
+            self._benchmarks[index] = benchmark
+            self._raw[index] = None
+        return benchmark
 
 
 @attrs.define
 class BenchmarkSave:
-    benchmarks: list[Benchmark]
+    benchmarks: Sequence[Benchmark]
     machine_info: MachineInfo
+    commit_info: CommitInfo | None = None
+    datetime: str | None = None
 
     @classmethod
-    def from_file(cls, file: Path) -> "BenchmarkSave":
-        raw_data = file.read_text("utf8")
-        dict_data = json.loads(raw_data)
-        return cattrs.structure(dict_data, cls)
+    def from_file(
+        cls, file: Path, with_data: bool = True, cache: bool = False
+    ) -> "BenchmarkSave":
+        """Load a save, skipping the fields we do not use.
+
+        `with_data=False` drops the per-round data, which is most of a large save.
+        `cache=True` keeps a pre-parsed copy next to the save for the next load.
+        """
+        raw = load_save(
+            file,
+            save_fields=frozenset(field.name for field in attrs.fields(cls)),
+            benchmark_fields=frozenset(field.name for field in attrs.fields(Benchmark)),
+            with_data=with_data,
+            cache=cache,
+        )
+        benchmarks = raw.pop("benchmarks", [])
+        save = cattrs.structure({**raw, "benchmarks": []}, cls)
+        save.benchmarks = LazyBenchmarks(benchmarks)
+        return save
 
 
 @attrs.define
 class Source:
-    module: types.ModuleType
-    cls: type
-    func: types.MethodType
+    module: ModuleInfo
+    cls: ClassInfo
+    func: FunctionInfo
 
 
 @attrs.define
@@ -74,70 +325,404 @@ class AnnotatedBenchmark:
 
 @attrs.define
 class Group:
-    module: types.ModuleType
-    cls: type
+    module: ModuleInfo
+    cls: ClassInfo
     benchmarks: list[AnnotatedBenchmark] = attrs.field(factory=list)
 
 
-def import_by_path(name: str, path: str):
-    if name in sys.modules:
-        return sys.modules[name]
-    spec = importlib.util.spec_from_file_location(name, path)
-    module = importlib.util.module_from_spec(spec)
-    sys.modules[name] = module
-    spec.loader.exec_module(module)
-    return module
+def group_key(module: str, name: str) -> str:
+    """An id for the group of a test class, unique across modules and safe in URLs and file names.
+
+    Like `tests.test_dict.TestDict` for `tests/test_dict.py`.
+    """
+    module = re.sub(r"[^A-Za-z0-9_]+", ".", module.removesuffix(".py")).strip(".")
+    return f"{module}.{name}"
 
 
 def get_source(benchmark: Benchmark) -> Source:
     filename, classname, testname = benchmark.fullname.split("::")
 
-    test_module = import_by_path(filename, filename)
-    test_class = getattr(test_module, classname)
+    test_module = module_info(filename)
     testfunc_name, _, _ = testname.partition("[")
-    testfunc = getattr(test_class, testfunc_name)
+    test_class, testfunc = test_module.get_function(classname, testfunc_name)
 
     return Source(module=test_module, cls=test_class, func=testfunc)
 
 
 def group_benchmarks(benchmarks: Sequence[Benchmark]) -> Sequence[Group]:
-    groups: dict[type, Group] = {}
+    groups: dict[tuple[str, str], Group] = {}
 
     for benchmark in benchmarks:
         try:
             source = get_source(benchmark)
-        except ValueError:
+        except (ValueError, LookupError, OSError, SyntaxError):
             continue
         annotated_benchmark = AnnotatedBenchmark(benchmark=benchmark, source=source)
-        group = groups.get(source.cls)
+        key = (source.module.path, source.cls.name)
+        group = groups.get(key)
         if group:
             group.benchmarks.append(annotated_benchmark)
         else:
             group = Group(module=source.module, cls=source.cls)
             group.benchmarks.append(annotated_benchmark)
-            groups[source.cls] = group
+            groups[key] = group
 
     return list(groups.values())
 
 
-def render_group(group: Group):
-    group_doc = group.cls.__doc__
+def rank(group: Group, rank_by: RankBy) -> list[AnnotatedBenchmark]:
+    return sorted(
+        group.benchmarks, key=lambda benchmark: rank_by.value_of(benchmark.benchmark.stats)
+    )
 
-    table = Table(title=group_doc)
+
+def format_spread(stats: Stats) -> str:
+    if stats.iqr is None:
+        return ""
+    return f"±{stats.iqr / 2:.2g}"
+
+
+def format_bytes(size: int) -> str:
+    for unit in ("B", "KiB", "MiB"):
+        if abs(size) < 1024:
+            return f"{size:.3g} {unit}"
+        size /= 1024
+    return f"{size:.3g} GiB"
+
+
+def memory_base(group: Group) -> int | None:
+    """The smallest peak allocation in the group, to scale the others by."""
+    peaks = [
+        memory.peak
+        for benchmark in group.benchmarks
+        if (memory := benchmark.benchmark.memory) is not None
+    ]
+    return min(peaks) if peaks else None
+
+
+def format_memory(memory: Memory | None, base: int | None) -> tuple[str, str, str]:
+    """Peak, net and scaled peak allocations."""
+    if memory is None or base is None:
+        return "", "", ""
+    scaled = f"{memory.peak / base:g}" if base else ""
+    return format_bytes(memory.peak), format_bytes(memory.net), scaled
+
+
+def group_sweep(group: Group, rank_by: RankBy) -> Sweep | None:
+    """Analyze a group that was run over a sweep of input sizes."""
+    if not all(
+        benchmark.benchmark.extra_info.get("sweep") for benchmark in group.benchmarks
+    ):
+        return None
+    # Other parameters that vary within the group, like the event loop, make separate series.
+    values = defaultdict(set)
+    for benchmark in group.benchmarks:
+        for name, value in (benchmark.benchmark.params or {}).items():
+            values[name].add(json.dumps(value, sort_keys=True))
+    varying = {name for name, seen in values.items() if len(seen) > 1}
+
+    series: dict[str, Series] = {}
+    for benchmark in group.benchmarks:
+        func = benchmark.source.func
+        sweep = benchmark.benchmark.extra_info["sweep"]
+        other_params = ", ".join(
+            f"{name}={value}"
+            for name, value in sorted((benchmark.benchmark.params or {}).items())
+            if name in varying and name != sweep["param"]
+        )
+        key, name = func.name, func.doc or func.name
+        if other_params:
+            key, name = f"{key}[{other_params}]", f"{name} [{other_params}]"
+        variant = series.setdefault(key, Series(key=key, name=name, points=[]))
+        variant.points.append(
+            (
+                sweep["size"],
+                rank_by.value_of(benchmark.benchmark.stats),
+            )
+        )
+    return analyze_sweep(list(series.values()))
+
+
+def group_scaling(group: Group, rank_by: RankBy) -> list[ScalingSeries] | None:
+    """Collect a group that was run over a number of workers, by variant and executor."""
+    if not all(
+        benchmark.benchmark.extra_info.get("scaling") for benchmark in group.benchmarks
+    ):
+        return None
+    series: dict[tuple[str, str], ScalingSeries] = {}
+    for benchmark in group.benchmarks:
+        func = benchmark.source.func
+        scaling = benchmark.benchmark.extra_info["scaling"]
+        variant = series.setdefault(
+            (func.name, scaling["executor"]),
+            ScalingSeries(
+                key=func.name, name=func.doc or func.name, executor=scaling["executor"]
+            ),
+        )
+        variant.times[scaling["workers"]] = rank_by.value_of(benchmark.benchmark.stats)
+    return list(series.values())
+
+
+def format_scaling_cell(variant: ScalingSeries, workers: int) -> str:
+    speedup = variant.speedup(workers)
+    if speedup is None:
+        return ""
+    return f"{speedup:.2f}x ({variant.efficiency(workers):.0%})"
+
+
+def render_scaling(group: Group, series: Sequence[ScalingSeries]):
+    workers = worker_counts(series)
+    table = Table(title=group.cls.doc)
     table.add_column("Benchmark")
-    table.add_column("Min", justify="right")
-    table.add_column("Relative", justify="right")
+    table.add_column("Executor")
+    table.add_column("Time", justify="right")
+    for count in workers:
+        table.add_column(f"{count} workers", justify="right")
+
+    for variant in series:
+        table.add_row(
+            variant.name,
+            variant.executor,
+            f"{variant.times[variant.base_workers]:g}",
+            *(format_scaling_cell(variant, count) for count in workers),
+        )
+
+    console = Console()
+    console.print(table)
+
+
+def sweep_order(sweep: Sweep) -> list[Series]:
+    """Fastest first, at the largest size."""
+    largest = sweep.sizes[-1]
+    return sorted(
+        sweep.series,
+        key=lambda variant: (variant.time_at(largest) is None, variant.time_at(largest) or 0),
+    )
+
+
+def format_fit(variant: Series) -> str:
+    if variant.fit is None:
+        return ""
+    return f"{variant.fit.constant:.3g} · n^{variant.fit.exponent:.2f}"
+
+
+def format_sweep_cell(sweep: Sweep, variant: Series, size: int) -> str:
+    time = variant.time_at(size)
+    if time is None:
+        return ""
+    best = next(
+        other.time_at(size) for other in sweep.series if other.key == sweep.winners[size]
+    )
+    return f"{time:.3g} ({time / best:.2f}x)"
+
+
+def format_crossovers(sweep: Sweep) -> list[str]:
+    names = {variant.key: variant.name for variant in sweep.series}
+    return [
+        f"{names[crossover.after]} overtakes {names[crossover.before]} at n ≈ {crossover.size:.3g}"
+        for crossover in sweep.crossovers
+    ]
+
+
+def render_sweep(group: Group, sweep: Sweep):
+    table = Table(title=group.cls.doc)
+    table.add_column("Benchmark")
+    table.add_column("Fit", justify="right")
+    for size in sweep.sizes:
+        table.add_column(f"n={size:,}", justify="right")
+
+    for variant in sweep_order(sweep):
+        table.add_row(
+            escape(variant.name),
+            format_fit(variant),
+            *(format_sweep_cell(sweep, variant, size) for size in sweep.sizes),
+        )
+
+    console = Console()
+    console.print(table)
+    for crossover in format_crossovers(sweep):
+        console.print(escape(crossover))
+
+
+def instruction_base(group: Group) -> InstructionCount | None:
+    """The smallest non-zero instruction count in the group, to scale the others by.
+
+    Counts from different counters cannot be compared, so only those from
+    the counter of the first benchmark are used. When all of them are 0,
+    so is the base.
+    """
+    counts = [
+        count
+        for benchmark in group.benchmarks
+        if (count := benchmark.benchmark.instructions) is not None
+    ]
+    if not counts:
+        return None
+    counter = counts[0].counter
+    counts = [count for count in counts if count.counter == counter]
+    return min(
+        (count for count in counts if count.count),
+        key=operator.attrgetter("count"),
+        default=counts[0],
+    )
 
-    benchmarks = sorted(
-        group.benchmarks, key=operator.attrgetter("benchmark.stats.min")
+
+def format_instructions(
+    count: InstructionCount | None, base: InstructionCount | None
+) -> tuple[str, str]:
+    """Instructions per call, and scaled by the group's smallest count."""
+    if count is None or base is None or count.counter != base.counter:
+        return "", ""
+    if not count.count:
+        # Nothing left once the baseline is taken out, as small as it gets.
+        return "0", "0"
+    return f"{count.count:,.0f}", f"{count.count / base.count:g}"
+
+
+def has_import_times(group: Group) -> bool:
+    return any(benchmark.benchmark.import_time for benchmark in group.benchmarks)
+
+
+def format_import_time(import_time: ImportTime | None) -> tuple[str, str]:
+    """Cumulative and self import times."""
+    if import_time is None:
+        return "", ""
+    return f"{import_time.cumulative:g}", f"{import_time.self_time:g}"
+
+
+def has_warmup(group: Group) -> bool:
+    """Whether any benchmark of the group had warmup rounds, or never reached a steady state."""
+    return any(
+        warmup.rounds or not warmup.steady
+        for benchmark in group.benchmarks
+        if (warmup := benchmark.benchmark.warmup) is not None
+    )
+
+
+def format_warmup(warmup: Warmup | None) -> tuple[str, str]:
+    """Warmup rounds, and the total time they took."""
+    if warmup is None:
+        return "", ""
+    if not warmup.steady:
+        return "never steady", ""
+    return str(warmup.rounds), f"{warmup.time:g}" if warmup.rounds else ""
+
+
+def has_instrumentation(group: Group) -> bool:
+    return any(benchmark.benchmark.instrumentation for benchmark in group.benchmarks)
+
+
+def has_counters(group: Group) -> bool:
+    return any(
+        benchmark.benchmark.instrumentation and benchmark.benchmark.instrumentation.counters
+        for benchmark in group.benchmarks
+    )
+
+
+def counters_error(group: Group) -> str | None:
+    """Why an instrumented group has no hardware counters, if it has none."""
+    if has_counters(group):
+        return None
+    for benchmark in group.benchmarks:
+        instrumentation = benchmark.benchmark.instrumentation
+        if instrumentation and instrumentation.counters_error:
+            return instrumentation.counters_error
+    return None
+
+
+def format_instrumentation(instrumentation: Instrumentation | None) -> tuple[str, str, str]:
+    """Instructions per call, instructions per cycle, and GC time per call."""
+    if instrumentation is None:
+        return "", "", ""
+    counters = instrumentation.counters or {}
+    instructions = counters.get("instructions")
+    ipc = instrumentation.ipc
+    return (
+        f"{instructions:,.0f}" if instructions is not None else "",
+        f"{ipc:.2f}" if ipc is not None else "",
+        f"{instrumentation.gc_time:.3g}" if instrumentation.gc_collections else "",
     )
-    base = benchmarks[0].benchmark.stats.min
+
+
+def render_group(group: Group, rank_by: RankBy = RankBy.MIN):
+    sweep = group_sweep(group, rank_by)
+    if sweep is not None:
+        render_sweep(group, sweep)
+        return
+    scaling = group_scaling(group, rank_by)
+    if scaling is not None:
+        render_scaling(group, scaling)
+        return
+
+    group_doc = group.cls.doc
+    peak_base = memory_base(group)
+
+    table = Table(title=group_doc)
+    table.add_column("Benchmark")
+    table.add_column(rank_by.value.capitalize(), justify="right")
+    table.add_column("IQR", justify="right")
+    table.add_column("Relative", justify="right")
+    instructions_base = instruction_base(group)
+    if instructions_base is not None:
+        table.add_column(instructions_base.label, justify="right")
+        table.add_column(f"Relative {instructions_base.label.lower()}", justify="right")
+    if peak_base is not None:
+        table.add_column("Peak", justify="right")
+        table.add_column("Net", justify="right")
+        table.add_column("Relative peak", justify="right")
+    instrumented = has_instrumentation(group)
+    counted = has_counters(group)
+    if instrumented:
+        if counted:
+            table.add_column("Instructions", justify="right")
+            table.add_column("IPC", justify="right")
+        else:
+            # Without counters the columns would be blank, say why in the caption instead.
+            error = counters_error(group)
+            table.caption = f"No hardware counters: {error}" if error else "No hardware counters"
+        table.add_column("GC", justify="right")
+    imports = has_import_times(group)
+    if imports:
+        table.add_column("Import time", justify="right")
+        table.add_column("Import self", justify="right")
+    warmed_up = has_warmup(group)
+    if warmed_up:
+        table.add_column("Warmup rounds", justify="right")
+        table.add_column("Warmup time", justify="right")
+
+    benchmarks = rank(group, rank_by)
+    base = rank_by.value_of(benchmarks[0].benchmark.stats)
     for benchmark in benchmarks:
-        relative = benchmark.benchmark.stats.min / base
+        value = rank_by.value_of(benchmark.benchmark.stats)
+        instructions = (
+            format_instructions(benchmark.benchmark.instructions, instructions_base)
+            if instructions_base is not None
+            else ()
+        )
+        memory = (
+            format_memory(benchmark.benchmark.memory, peak_base)
+            if peak_base is not None
+            else ()
+        )
+        counters = (
+            format_instrumentation(benchmark.benchmark.instrumentation)
+            if instrumented
+            else ()
+        )
+        if instrumented and not counted:
+            counters = counters[2:]
+        import_time = format_import_time(benchmark.benchmark.import_time) if imports else ()
+        warmup = format_warmup(benchmark.benchmark.warmup) if warmed_up else ()
         table.add_row(
-            benchmark.source.func.__doc__,
-            f"{benchmark.benchmark.stats.min:g}",
-            f"{relative:g}",
+            escape(display_name(benchmark)),
+            f"{value:g}",
+            format_spread(benchmark.benchmark.stats),
+            f"{value / base:g}",
+            *instructions,
+            *memory,
+            *counters,
+            *import_time,
+            *warmup,
         )
 
     console = Console()
@@ -147,16 +732,99 @@ def render_group(group: Group):
 @attrs.define
 class DisplayBenchmark:
     name: str
-    min: str
+    time: str
+    spread: str
     scaled: str
     link: str | None
+    trend: str | None = None
+    instruction_count: str = ""
+    instruction_count_scaled: str = ""
+    peak: str = ""
+    net: str = ""
+    peak_scaled: str = ""
+    instructions: str = ""
+    ipc: str = ""
+    gc_time: str = ""
+    import_time: str = ""
+    import_time_self: str = ""
+    warmup_rounds: str = ""
+    warmup_time: str = ""
+
+
+@attrs.define
+class ChartLine:
+    name: str
+    color: str
+    points: str
+
+
+@attrs.define
+class ChartTick:
+    position: float
+    label: str
+
+
+@attrs.define
+class SweepChart:
+    width: int
+    height: int
+    margin: int
+    lines: list[ChartLine]
+    x_ticks: list[ChartTick]
+    y_ticks: list[ChartTick]
+    # x positions of the estimated crossovers.
+    crossovers: list[float]
+
+
+@attrs.define
+class DisplaySweepRow:
+    name: str
+    fit: str
+    cells: list[str]
+    winners: list[bool]
+
+
+@attrs.define
+class DisplaySweep:
+    sizes: list[str]
+    rows: list[DisplaySweepRow]
+    chart: SweepChart
+    crossovers: list[str]
+
+
+@attrs.define
+class DisplayScalingRow:
+    name: str
+    executor: str
+    time: str
+    cells: list[str]
+
+
+@attrs.define
+class DisplayScaling:
+    workers: list[int]
+    rows: list[DisplayScalingRow]
 
 
 @attrs.define
 class DisplayGroup:
     name: str
+    # See `group_key`, names the group's anchor and data chunks.
+    key: str
+    module: str
     description: str
     benchmarks: list[DisplayBenchmark]
+    # "Instructions" or "Bytecodes", when the group has instruction counts.
+    instructions_label: str | None = None
+    show_memory: bool = False
+    show_instrumentation: bool = False
+    # The instructions and IPC columns, hidden when the counters were unavailable.
+    show_counters: bool = False
+    counters_error: str | None = None
+    show_import_times: bool = False
+    show_warmup: bool = False
+    sweep: DisplaySweep | None = None
+    scaling: DisplayScaling | None = None
 
 
 def render_docstring(doc: str | None) -> str:
@@ -166,116 +834,1061 @@ def render_docstring(doc: str | None) -> str:
     return MarkdownIt("gfm-like").render(doc)
 
 
-def render_groups_html(
+def sparkline(values: Sequence[float], width: int = 120, height: int = 24) -> str | None:
+    """SVG polyline points for a series, oldest value on the left."""
+    if len(values) < 2:
+        return None
+    low, high = min(values), max(values)
+    span = (high - low) or 1.0
+    step = width / (len(values) - 1)
+    return " ".join(
+        f"{i * step:.1f},{height - (value - low) / span * height:.1f}"
+        for i, value in enumerate(values)
+    )
+
+
+CHART_COLORS = ["#2196f3", "#f44336", "#4caf50", "#ff9800", "#9c27b0", "#795548"]
+
+
+def log_ticks(low: float, high: float) -> list[float]:
+    """Powers of ten within the range, or its ends if there are none."""
+    ticks = [
+        10.0**exponent
+        for exponent in range(math.floor(math.log10(low)), math.ceil(math.log10(high)) + 1)
+        if low <= 10.0**exponent <= high
+    ]
+    return ticks or [low, high]
+
+
+def sweep_chart(sweep: Sweep, width: int = 480, height: int = 240, margin: int = 48) -> SweepChart:
+    """Time against input size, both on log scales."""
+    times = [time for variant in sweep.series for _, time in variant.points if time > 0]
+    low_x, high_x = math.log(sweep.sizes[0]), math.log(sweep.sizes[-1])
+    low_y, high_y = math.log(min(times)), math.log(max(times))
+    span_x = (high_x - low_x) or 1.0
+    span_y = (high_y - low_y) or 1.0
+    plot_width = width - 2 * margin
+    plot_height = height - 2 * margin
+
+    def x(size: float) -> float:
+        return margin + (math.log(size) - low_x) / span_x * plot_width
+
+    def y(time: float) -> float:
+        return margin + plot_height - (math.log(time) - low_y) / span_y * plot_height
+
+    lines = [
+        ChartLine(
+            name=variant.name,
+            color=CHART_COLORS[index % len(CHART_COLORS)],
+            points=" ".join(
+                f"{x(size):.1f},{y(time):.1f}" for size, time in variant.points if time > 0
+            ),
+        )
+        for index, variant in enumerate(sweep.series)
+    ]
+    return SweepChart(
+        width=width,
+        height=height,
+        margin=margin,
+        lines=lines,
+        x_ticks=[
+            ChartTick(position=x(size), label=f"{size:,.0f}")
+            for size in log_ticks(sweep.sizes[0], sweep.sizes[-1])
+        ],
+        y_ticks=[
+            ChartTick(position=y(time), label=f"{time:.0e}")
+            for time in log_ticks(min(times), max(times))
+        ],
+        crossovers=[x(crossover.size) for crossover in sweep.crossovers],
+    )
+
+
+def display_sweep(sweep: Sweep) -> DisplaySweep:
+    rows = [
+        DisplaySweepRow(
+            name=variant.name,
+            fit=format_fit(variant),
+            cells=[format_sweep_cell(sweep, variant, size) for size in sweep.sizes],
+            winners=[sweep.winners.get(size) == variant.key for size in sweep.sizes],
+        )
+        for variant in sweep_order(sweep)
+    ]
+    return DisplaySweep(
+        sizes=[f"{size:,}" for size in sweep.sizes],
+        rows=rows,
+        chart=sweep_chart(sweep),
+        crossovers=format_crossovers(sweep),
+    )
+
+
+def display_scaling(series: Sequence[ScalingSeries]) -> DisplayScaling:
+    workers = worker_counts(series)
+    return DisplayScaling(
+        workers=workers,
+        rows=[
+            DisplayScalingRow(
+                name=variant.name,
+                executor=variant.executor,
+                time=f"{variant.times[variant.base_workers]:g}",
+                cells=[format_scaling_cell(variant, count) for count in workers],
+            )
+            for variant in series
+        ],
+    )
+
+
+def display_groups(
     groups: Sequence[Group],
-    machine_info: MachineInfo,
     link_base: str | None = None,
-):
-    display_groups = []
+    trends: dict[str, list[float]] | None = None,
+    rank_by: RankBy = RankBy.MIN,
+) -> list[DisplayGroup]:
+    """Format the groups for the HTML report and its data chunks."""
+    displayed = []
     for group in groups:
-        benchmarks = sorted(
-            group.benchmarks, key=operator.attrgetter("benchmark.stats.min")
-        )
+        sweep = group_sweep(group, rank_by)
+        if sweep is not None:
+            displayed.append(
+                DisplayGroup(
+                    name=group.cls.name,
+                    key=group_key(group.module.path, group.cls.name),
+                    module=group.module.path,
+                    description=render_docstring(group.cls.doc),
+                    benchmarks=[],
+                    sweep=display_sweep(sweep),
+                )
+            )
+            continue
+        scaling = group_scaling(group, rank_by)
+        if scaling is not None:
+            displayed.append(
+                DisplayGroup(
+                    name=group.cls.name,
+                    key=group_key(group.module.path, group.cls.name),
+                    module=group.module.path,
+                    description=render_docstring(group.cls.doc),
+                    benchmarks=[],
+                    scaling=display_scaling(scaling),
+                )
+            )
+            continue
+
+        benchmarks = rank(group, rank_by)
         display_benchmarks = []
-        base = benchmarks[0].benchmark.stats.min
+        base = rank_by.value_of(benchmarks[0].benchmark.stats)
+        peak_base = memory_base(group)
+        instructions_base = instruction_base(group)
         for benchmark in benchmarks:
-            relative = benchmark.benchmark.stats.min / base
+            stats = benchmark.benchmark.stats
+            relative = rank_by.value_of(stats) / base
+            instruction_count, instruction_count_scaled = format_instructions(
+                benchmark.benchmark.instructions, instructions_base
+            )
+            peak, net, peak_scaled = format_memory(benchmark.benchmark.memory, peak_base)
+            instructions, ipc, gc_time = format_instrumentation(
+                benchmark.benchmark.instrumentation
+            )
+            import_time, import_time_self = format_import_time(benchmark.benchmark.import_time)
+            warmup_rounds, warmup_time = format_warmup(benchmark.benchmark.warmup)
             display_benchmarks.append(
                 DisplayBenchmark(
-                    name=benchmark.source.func.__doc__,
-                    min=f"{benchmark.benchmark.stats.min:g}",
+                    name=display_name(benchmark),
+                    time=f"{rank_by.value_of(stats):g}",
+                    spread=format_spread(stats),
                     scaled=f"{relative:g}",
                     link=get_link(link_base, benchmark.source) if link_base else None,
+                    trend=sparkline(trends.get(benchmark.benchmark.fullname, []))
+                    if trends
+                    else None,
+                    instruction_count=instruction_count,
+                    instruction_count_scaled=instruction_count_scaled,
+                    peak=peak,
+                    net=net,
+                    peak_scaled=peak_scaled,
+                    instructions=instructions,
+                    ipc=ipc,
+                    gc_time=gc_time,
+                    import_time=import_time,
+                    import_time_self=import_time_self,
+                    warmup_rounds=warmup_rounds,
+                    warmup_time=warmup_time,
                 )
             )
 
         display_group = DisplayGroup(
-            name=group.cls.__name__,
-            description=render_docstring(group.cls.__doc__),
+            name=group.cls.name,
+            key=group_key(group.module.path, group.cls.name),
+            module=group.module.path,
+            description=render_docstring(group.cls.doc),
             benchmarks=display_benchmarks,
+            instructions_label=instructions_base.label if instructions_base else None,
+            show_memory=peak_base is not None,
+            show_instrumentation=has_instrumentation(group),
+            show_counters=has_counters(group),
+            counters_error=counters_error(group),
+            show_import_times=has_import_times(group),
+            show_warmup=has_warmup(group),
         )
-        display_groups.append(display_group)
+        displayed.append(display_group)
+    return displayed
+
 
+def machine_details(machine_info: MachineInfo) -> list[tuple[str, str]]:
     info = {
         "Python Implementation": machine_info.python_implementation,
         "Python Version": machine_info.python_version,
         "Operating System": f"{machine_info.system} {machine_info.release}",
-    }.items()
+    }
+    if machine_info.python_gil is not None:
+        info["GIL"] = "enabled" if machine_info.python_gil else "disabled"
+    if machine_info.instruction_counter:
+        info["Instruction counter"] = machine_info.instruction_counter
+    return list(info.items())
+
+
+def render_display_html(
+    groups: Sequence[DisplayGroup],
+    machine_info: MachineInfo,
+    show_trends: bool = False,
+    rank_by: RankBy = RankBy.MIN,
+) -> str:
+    template = get_environment().get_template("report.html.jinja2")
+    return template.render(
+        groups=groups,
+        info=machine_details(machine_info),
+        show_trends=show_trends,
+        rank_by=rank_by.value.capitalize(),
+    )
+
+
+def render_groups_html(
+    groups: Sequence[Group],
+    machine_info: MachineInfo,
+    link_base: str | None = None,
+    trends: dict[str, list[float]] | None = None,
+    rank_by: RankBy = RankBy.MIN,
+) -> str:
+    return render_display_html(
+        display_groups(groups, link_base, trends, rank_by),
+        machine_info,
+        show_trends=trends is not None,
+        rank_by=rank_by,
+    )
 
-    env = Environment(loader=PackageLoader("python_benchmark", "templates"))
-    template = env.get_template("report.html.jinja2")
-    return template.render(groups=display_groups, info=info)
+
+@functools.lru_cache(maxsize=None)
+def get_environment() -> Environment:
+    return Environment(loader=PackageLoader("python_benchmark", "templates"))
 
 
 app = typer.Typer()
 
 
+RANK_BY_OPTION = typer.Option(
+    RankBy.MIN, help="Statistic used to rank benchmarks within a group."
+)
+
+
 @app.command()
-def single_html(benchmark_file: Path, out: Path):
-    data = BenchmarkSave.from_file(benchmark_file)
+def single_html(benchmark_file: Path, out: Path, rank_by: RankBy = RANK_BY_OPTION):
+    data = BenchmarkSave.from_file(benchmark_file, with_data=False)
 
     groups = group_benchmarks(data.benchmarks)
 
-    out.write_text(render_groups_html(groups, data.machine_info), "utf8")
+    out.write_text(
+        render_groups_html(groups, data.machine_info, rank_by=rank_by), "utf8"
+    )
 
 
 @app.command()
-def single_file(benchmark_file: Path):
-    data = BenchmarkSave.from_file(benchmark_file)
+def single_file(benchmark_file: Path, rank_by: RankBy = RANK_BY_OPTION):
+    data = BenchmarkSave.from_file(benchmark_file, with_data=False)
 
     groups = group_benchmarks(data.benchmarks)
     for group in groups:
-        render_group(group)
+        render_group(group, rank_by)
 
 
 @app.command()
-def directory(benchmark_dir: Path):
+def directory(benchmark_dir: Path, rank_by: RankBy = RANK_BY_OPTION):
     for file in benchmark_dir.glob("**/*.json"):
         print(file)
-        single_file(file)
+        single_file(file, rank_by)
 
 
 def get_link(base: str, source: Source) -> str:
-    # This is truly terrible. But I want to see that it works.
-    lines, start = inspect.getsourcelines(source.func)
-    end = start + len(lines) - 1
-    path = source.module.__name__
+    path = source.module.path
     base = base.rstrip("/")
-    return f"{base}/{path}#L{start}-L{end}="
+    return f"{base}/{path}#L{source.func.start}-L{source.func.end}="
 
 
-@app.command()
-def directory_html(
-    benchmark_dir: Path,
+@attrs.define
+class BenchmarkSummary:
+    key: str
+    name: str
+    time: float
+
+
+@attrs.define
+class GroupSummary:
+    """The part of a group needed to compare it across machines."""
+
+    name: str
+    # Path of the test module, groups are the same across machines if both match.
+    module: str
+    description: str
+    benchmarks: list[BenchmarkSummary] = attrs.field(factory=list)
+
+
+def display_name(benchmark: AnnotatedBenchmark) -> str:
+    """The docstring of the benchmark, with its parameters when it is parametrized."""
+    name = benchmark.source.func.doc or benchmark.benchmark.name
+    _, bracket, params = benchmark.benchmark.name.partition("[")
+    return f"{name} [{params}" if bracket else name
+
+
+def summarize_groups(groups: Sequence[Group], rank_by: RankBy) -> list[GroupSummary]:
+    return [
+        GroupSummary(
+            name=group.cls.name,
+            module=group.module.path,
+            description=render_docstring(group.cls.doc),
+            benchmarks=[
+                BenchmarkSummary(
+                    key=benchmark.benchmark.name,
+                    name=display_name(benchmark),
+                    time=rank_by.value_of(benchmark.benchmark.stats),
+                )
+                for benchmark in group.benchmarks
+            ],
+        )
+        for group in groups
+    ]
+
+
+@attrs.define
+class MatrixCell:
+    time: str
+    relative: str
+    rank: int
+    winner: bool
+
+
+@attrs.define
+class MatrixRow:
+    name: str
+    cells: list[MatrixCell | None]
+
+
+@attrs.define
+class MatrixColumn:
+    system: str
+    implementation: str
+    version: str
+
+
+@attrs.define
+class MatrixGroup:
+    name: str
+    # From `group_key`, for the anchor.
+    key: str
+    module: str
+    description: str
+    rows: list[MatrixRow]
+    # Per column, whether its winner differs from the most common winner.
+    winner_changed: list[bool]
+
+    @property
+    def has_winner_change(self) -> bool:
+        return any(self.winner_changed)
+
+
+def version_key(version: str) -> tuple:
+    return tuple(int(part) if part.isdigit() else 0 for part in version.split("."))
+
+
+def machine_order(machine_info: MachineInfo) -> tuple:
+    return (
+        machine_info.system,
+        machine_info.python_implementation,
+        version_key(machine_info.python_version),
+        machine_info.python_gil is False,
+        machine_info.instruction_counter or "",
+    )
+
+
+def build_matrix(
+    columns: Sequence[tuple[MachineInfo, Sequence[GroupSummary]]],
+) -> tuple[list[MatrixColumn], list[MatrixGroup]]:
+    """Pivot per-machine group summaries into a benchmark x machine grid per group."""
+    columns = sorted(columns, key=lambda column: machine_order(column[0]))
+
+    # Groups by module path and class name, like `group_benchmarks`.
+    groups: dict[tuple[str, str], GroupSummary] = {}
+    names: dict[tuple[str, str], dict[str, str]] = defaultdict(dict)
+    cells: dict[tuple[str, str], dict[str, list[MatrixCell | None]]] = defaultdict(dict)
+    winners: dict[tuple[str, str], list[str | None]] = {}
+    for index, (_, summaries) in enumerate(columns):
+        for summary in summaries:
+            group = (summary.module, summary.name)
+            groups.setdefault(group, summary)
+            group_winners = winners.setdefault(group, [None] * len(columns))
+            ranked = sorted(summary.benchmarks, key=operator.attrgetter("time"))
+            if not ranked:
+                continue
+            group_winners[index] = ranked[0].key
+            base = ranked[0].time
+            for rank, benchmark in enumerate(ranked, start=1):
+                names[group].setdefault(benchmark.key, benchmark.name)
+                row = cells[group].setdefault(benchmark.key, [None] * len(columns))
+                row[index] = MatrixCell(
+                    time=f"{benchmark.time:g}",
+                    relative=f"{benchmark.time / base:.2f}",
+                    rank=rank,
+                    winner=rank == 1,
+                )
+
+    matrix_groups = []
+    for group, summary in groups.items():
+        group_winners = winners[group]
+        counts = Counter(winner for winner in group_winners if winner is not None)
+        usual_winner = counts.most_common(1)[0][0] if counts else None
+
+        def mean_rank(key: str) -> float:
+            ranks = [cell.rank for cell in cells[group][key] if cell]
+            return sum(ranks) / len(ranks)
+
+        matrix_groups.append(
+            MatrixGroup(
+                name=summary.name,
+                key=group_key(summary.module, summary.name),
+                module=summary.module,
+                description=summary.description,
+                rows=[
+                    MatrixRow(name=names[group][key], cells=cells[group][key])
+                    for key in sorted(cells[group], key=mean_rank)
+                ],
+                winner_changed=[
+                    winner is not None and winner != usual_winner
+                    for winner in group_winners
+                ],
+            )
+        )
+
+    matrix_columns = [
+        MatrixColumn(
+            system=machine_info.system,
+            implementation=machine_info.python_implementation,
+            version=machine_info.run_label,
+        )
+        for machine_info, _ in columns
+    ]
+    return matrix_columns, matrix_groups
+
+
+def render_matrix_html(
+    columns: Sequence[tuple[MachineInfo, Sequence[GroupSummary]]],
+    rank_by: RankBy = RankBy.MIN,
+) -> str:
+    matrix_columns, matrix_groups = build_matrix(columns)
+    template = get_environment().get_template("matrix.html.jinja2")
+    return template.render(
+        columns=matrix_columns,
+        groups=matrix_groups,
+        rank_by=rank_by.value.capitalize(),
+    )
+
+
+MATRIX_NAME = "matrix.html"
+# Appended to the name of the output directory, the manifest is kept next to it.
+MANIFEST_SUFFIX = ".manifest.json"
+MANIFEST_VERSION = 6
+# The index page loads its data from here: an index, and a chunk per machine and group.
+DATA_DIR = "data"
+DATA_INDEX = "index.js"
+DATA_CALLBACK = "benchmarkReport"
+
+
+def _compact(value):
+    """Drop empty fields, which are most of a display benchmark's."""
+    if isinstance(value, dict):
+        return {key: _compact(item) for key, item in value.items() if item not in ("", None)}
+    if isinstance(value, list):
+        return [_compact(item) for item in value]
+    return value
+
+
+def data_script(method: str, *args) -> str:
+    """A script passing `args`, as JSON, to a method of the index page's data callback.
+
+    Browsers refuse to `fetch` files for a page opened from the file system,
+    but load its scripts, so the data comes as scripts to keep the site usable offline.
+    """
+    arguments = ",".join(json.dumps(_compact(arg), separators=(",", ":")) for arg in args)
+    return f"{DATA_CALLBACK}.{method}({arguments});\n"
+
+
+def group_chunk(machine: str, group: DisplayGroup) -> str:
+    return data_script("chunk", machine, group.key, cattrs.unstructure(group))
+
+
+def write_chunks(out_dir: Path, machine: str, groups: Sequence[DisplayGroup]):
+    """Write a chunk per group, replacing the machine's previous chunks."""
+    directory = out_dir / DATA_DIR / machine
+    directory.mkdir(parents=True, exist_ok=True)
+    for stale in directory.glob("*.js"):
+        stale.unlink()
+    for group in groups:
+        (directory / f"{group.key}.js").write_text(group_chunk(machine, group), "utf8")
+
+
+@attrs.define
+class DataMachine:
+    key: str
+    label: str
+    report: str
+    info: list[tuple[str, str]]
+
+
+@attrs.define
+class DataGroup:
+    name: str
+    # See `group_key`, names the group's chunks.
+    key: str
+    module: str
+    # The most benchmarks the group has on any machine.
+    benchmarks: int
+    # Keys of the machines with a chunk for the group.
+    machines: list[str] = attrs.field(factory=list)
+
+
+@attrs.define
+class DataIndex:
+    rank_by: str
+    machines: list[DataMachine]
+    groups: list[DataGroup]
+
+
+def file_digest(path: Path) -> str:
+    return hashlib.sha256(path.read_bytes()).hexdigest()
+
+
+def render_context_digest(*options: str | None) -> str:
+    """Digest of everything, other than the saves and test sources, that affects the output."""
+    digest = hashlib.sha256()
+    digest.update(str(MANIFEST_VERSION).encode())
+    for option in options:
+        digest.update(f"{option or ''}\0".encode())
+    package = Path(__file__).parent
+    for path in sorted(package.glob("*.py")) + sorted(package.glob("templates/*")):
+        digest.update(path.name.encode())
+        digest.update(path.read_bytes())
+    return digest.hexdigest()
+
+
+def report_name(machine_info: MachineInfo) -> str:
+    return f"{machine_info.key}.html"
+
+
+@attrs.define
+class ManifestEntry:
+    digest: str
+    machine: str
+    machine_info: MachineInfo
+    sources: dict[str, str] = attrs.field(factory=dict)
+    history: str | None = None
+    groups: list[GroupSummary] = attrs.field(factory=list)
+
+    @property
+    def report(self) -> str:
+        return f"{self.machine}.html"
+
+    def is_current(
+        self, digest: str, out_dir: Path, history: HistoryStore | None
+    ) -> bool:
+        if digest != self.digest or not (out_dir / self.report).exists():
+            return False
+        if (history.version(self.machine) if history else None) != self.history:
+            return False
+        if not (out_dir / DATA_DIR / self.machine).is_dir():
+            return False
+        for source, source_digest in self.sources.items():
+            try:
+                if file_digest(Path(source)) != source_digest:
+                    return False
+            except OSError:
+                return False
+        return True
+
+
+@attrs.define
+class Manifest:
+    context: str = ""
+    saves: dict[str, ManifestEntry] = attrs.field(factory=dict)
+    version: int = MANIFEST_VERSION
+
+    @staticmethod
+    def default_path(out_dir: Path) -> Path:
+        """Next to the output directory rather than in it, so it isn't published with the site."""
+        out_dir = out_dir.resolve()
+        return out_dir.with_name(out_dir.name + MANIFEST_SUFFIX)
+
+    @classmethod
+    def load(cls, path: Path, context: str) -> "Manifest":
+        """Load the manifest, discarding it if it was built with a different context."""
+        try:
+            manifest = cattrs.structure(json.loads(path.read_text("utf8")), cls)
+        except (OSError, ValueError, cattrs.BaseValidationError):
+            return cls(context=context)
+        if manifest.version != MANIFEST_VERSION or manifest.context != context:
+            return cls(context=context)
+        return manifest
+
+    def save(self, path: Path):
+        path.write_text(
+            json.dumps(cattrs.unstructure(self), indent=2, sort_keys=True), "utf8"
+        )
+
+
+def render_save(
+    file: Path,
     out_dir: Path,
-    repo_base_url: str | None = None,
-):
-    out_dir.mkdir(exist_ok=True)
+    link_base: str | None,
+    history_path: Path | None,
+    rank_by: RankBy = RankBy.MIN,
+    cache: bool = False,
+) -> ManifestEntry:
+    """Parse, group and render a single save. Runs inside worker processes."""
+    digest = file_digest(file)
+    save = BenchmarkSave.from_file(file, with_data=False, cache=cache)
+    machine = save.machine_info.key
+
+    trends = history_version = None
+    if history_path:
+        with HistoryStore(history_path, readonly=True) as history:
+            trends = history.trends(machine)
+            history_version = history.version(machine)
+
+    groups = group_benchmarks(save.benchmarks)
+    displayed = display_groups(groups, link_base=link_base, trends=trends, rank_by=rank_by)
+    (out_dir / report_name(save.machine_info)).write_text(
+        render_display_html(
+            displayed, save.machine_info, show_trends=trends is not None, rank_by=rank_by
+        ),
+        "utf8",
+    )
+    write_chunks(out_dir, machine, displayed)
+
+    sources = {group.module.path: group.module.digest for group in groups}
+    return ManifestEntry(
+        digest=digest,
+        machine=machine,
+        machine_info=save.machine_info,
+        sources=dict(sorted(sources.items())),
+        history=history_version,
+        groups=summarize_groups(groups, rank_by),
+    )
+
+
+def prune_outputs(out_dir: Path, entries: Sequence[ManifestEntry]):
+    """Delete the reports and data chunks of machines that no longer have a save."""
+    keep = {entry.report for entry in entries} | {"index.html", MATRIX_NAME}
+    for path in out_dir.glob("*.html"):
+        if path.name not in keep:
+            path.unlink()
+            print(f"Removed {path}")
+    machines = {entry.machine for entry in entries}
+    for path in (out_dir / DATA_DIR).glob("*"):
+        if path.is_dir() and path.name not in machines:
+            shutil.rmtree(path)
+            print(f"Removed {path}")
+
+
+def data_index(entries: Sequence[ManifestEntry], rank_by: RankBy) -> DataIndex:
+    """List the machines, and the groups with the machines that have them, for the index page."""
+    entries = sorted(entries, key=lambda entry: machine_order(entry.machine_info))
+    groups: dict[str, DataGroup] = {}
+    for entry in entries:
+        for summary in entry.groups:
+            key = group_key(summary.module, summary.name)
+            group = groups.setdefault(
+                key,
+                DataGroup(name=summary.name, key=key, module=summary.module, benchmarks=0),
+            )
+            group.benchmarks = max(group.benchmarks, len(summary.benchmarks))
+            group.machines.append(entry.machine)
+    return DataIndex(
+        rank_by=rank_by.value.capitalize(),
+        machines=[
+            DataMachine(
+                key=entry.machine,
+                label=" ".join(
+                    (
+                        entry.machine_info.system,
+                        entry.machine_info.python_implementation,
+                        entry.machine_info.run_label,
+                    )
+                ),
+                report=entry.report,
+                info=machine_details(entry.machine_info),
+            )
+            for entry in entries
+        ],
+        groups=list(groups.values()),
+    )
+
+
+def all_saves(benchmark_dir: Path) -> list[Path]:
+    return sorted(benchmark_dir.glob("**/*.json"))
+
 
+def latest_saves(benchmark_dir: Path) -> list[Path]:
     files_to_process = []
     for root, dirs, files in os.walk(benchmark_dir):
+        files = [file for file in files if file.endswith(".json")]
         if not files:
             continue
         last = sorted(files)[-1]
         files_to_process.append(Path(root, last))
+    return files_to_process
+
+
+@app.command()
+def directory_html(
+    benchmark_dir: Path,
+    out_dir: Path,
+    repo_base_url: str | None = None,
+    jobs: int | None = typer.Option(
+        None, help="Number of worker processes. Defaults to the number of CPUs."
+    ),
+    force: bool = typer.Option(False, help="Rebuild every report, ignoring the manifest."),
+    history: Path | None = typer.Option(
+        None, exists=True, dir_okay=False, help="History database created by `ingest`, used to draw trend lines."
+    ),
+    rank_by: RankBy = RANK_BY_OPTION,
+    cache: bool = typer.Option(
+        False, help="Keep a pre-parsed copy of each save next to it, for faster reloads."
+    ),
+    manifest_path: Path | None = typer.Option(
+        None,
+        "--manifest",
+        help="Where to keep track of what was built, to skip unchanged reports. "
+        "Defaults to OUT_DIR.manifest.json, next to OUT_DIR.",
+    ),
+):
+    out_dir.mkdir(exist_ok=True)
+
+    context = render_context_digest(repo_base_url, rank_by.value)
+    manifest_path = manifest_path or Manifest.default_path(out_dir)
+    manifest = Manifest(context=context) if force else Manifest.load(manifest_path, context)
+
+    entries: dict[str, ManifestEntry] = {}
+    stale: list[Path] = []
+    store = HistoryStore(history, readonly=True) if history else None
+    for file in latest_saves(benchmark_dir):
+        entry = manifest.saves.get(str(file))
+        if entry and entry.is_current(file_digest(file), out_dir, store):
+            entries[str(file)] = entry
+        else:
+            stale.append(file)
+    if store:
+        store.close()
+
+    if len(stale) > 1 and jobs != 1:
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            rendered = list(
+                executor.map(
+                    render_save,
+                    stale,
+                    [out_dir] * len(stale),
+                    [repo_base_url] * len(stale),
+                    [history] * len(stale),
+                    [rank_by] * len(stale),
+                    [cache] * len(stale),
+                )
+            )
+    else:
+        rendered = [
+            render_save(file, out_dir, repo_base_url, history, rank_by, cache)
+            for file in stale
+        ]
+
+    for file, entry in zip(stale, rendered):
+        entries[str(file)] = entry
+        print(f"Written report to {out_dir / entry.report}")
+    print(f"Skipped {len(entries) - len(stale)} unchanged reports")
+
+    manifest.saves = entries
+    manifest.save(manifest_path)
+    prune_outputs(out_dir, list(entries.values()))
+
+    (out_dir / MATRIX_NAME).write_text(
+        render_matrix_html(
+            [(entry.machine_info, entry.groups) for entry in entries.values()], rank_by
+        ),
+        "utf8",
+    )
+    print(f"Written matrix to {out_dir / MATRIX_NAME}")
 
-    saves = [BenchmarkSave.from_file(file) for file in files_to_process]
-    names = []
-    for save in saves:
-        name = f"{save.machine_info.system}-{save.machine_info.python_implementation}-{save.machine_info.python_version}.html"
-        names.append(name)
+    (out_dir / DATA_DIR).mkdir(exist_ok=True)
+    (out_dir / DATA_DIR / DATA_INDEX).write_text(
+        data_script("index", cattrs.unstructure(data_index(list(entries.values()), rank_by))),
+        "utf8",
+    )
 
+    names = {entry.report for entry in entries.values()}
+    template = get_environment().get_template("index.html.jinja2")
+    (out_dir / "index.html").write_text(
+        template.render(
+            names=sorted(names),
+            matrix=MATRIX_NAME,
+            data_dir=DATA_DIR,
+            data_index=f"{DATA_DIR}/{DATA_INDEX}",
+            callback=DATA_CALLBACK,
+        ),
+        "utf8",
+    )
+    print(f"Written index to {out_dir / 'index.html'}")
+
+
+@app.command()
+def matrix_html(
+    benchmark_dir: Path,
+    out: Path,
+    rank_by: RankBy = RANK_BY_OPTION,
+):
+    """Compare the latest save of every machine under BENCHMARK_DIR in a single page."""
+    columns = []
+    for file in latest_saves(benchmark_dir):
+        save = BenchmarkSave.from_file(file, with_data=False)
         groups = group_benchmarks(save.benchmarks)
-        (out_dir / name).write_text(
-            render_groups_html(groups, save.machine_info, link_base=repo_base_url),
-            "utf8",
+        columns.append((save.machine_info, summarize_groups(groups, rank_by)))
+    out.write_text(render_matrix_html(columns, rank_by), "utf8")
+
+
+@app.command()
+def ingest(benchmark_dir: Path, database: Path):
+    """Add every save under BENCHMARK_DIR to the history DATABASE."""
+    added = 0
+    with HistoryStore(database) as store:
+        for file in all_saves(benchmark_dir):
+            digest = file_digest(file)
+            if store.has_run(digest):
+                continue
+            store.add_run(file, digest, BenchmarkSave.from_file(file))
+            added += 1
+    print(f"Added {added} runs to {database}")
+
+
+def benchmark_key(benchmark: Benchmark) -> str:
+    if not benchmark.params:
+        return benchmark.fullname
+    return f"{benchmark.fullname} {json.dumps(benchmark.params, sort_keys=True)}"
+
+
+class Metric(str, enum.Enum):
+    # Instructions where both runs counted machine instructions with the same counter, time otherwise.
+    AUTO = "auto"
+    TIME = "time"
+    INSTRUCTIONS = "instructions"
+
+
+def instruction_counter(benchmarks: Sequence[Benchmark]) -> str | None:
+    """The machine instruction counter of a run, if its benchmarks were counted with one."""
+    for benchmark in benchmarks:
+        if (count := benchmark.instructions) is not None and count.is_machine:
+            return count.counter
+    return None
+
+
+def pick_metric(base: Sequence[Benchmark], head: Sequence[Benchmark]) -> Metric:
+    """`Metric.INSTRUCTIONS` when both runs have comparable machine instruction counts."""
+    counter = instruction_counter(base)
+    if counter is not None and counter == instruction_counter(head):
+        return Metric.INSTRUCTIONS
+    return Metric.TIME
+
+
+def compare_instructions(
+    key: str, old: Benchmark, new: Benchmark, threshold: float
+) -> stats_compare.Comparison:
+    old_count, new_count = old.instructions, new.instructions
+    if (
+        old_count is None
+        or new_count is None
+        or old_count.counter != new_count.counter
+        or not old_count.is_machine
+    ):
+        # Counts from different counters measure different things, and bytecode
+        # counts miss the work done in C.
+        return stats_compare.Comparison(
+            key,
+            old_count.count if old_count else None,
+            new_count.count if new_count else None,
+            verdict=stats_compare.Verdict.MISSING,
+        )
+    return stats_compare.compare_exact(key, old_count.count, new_count.count, threshold)
+
+
+def compare_benchmarks(
+    base: Sequence[Benchmark],
+    head: Sequence[Benchmark],
+    threshold: float,
+    alpha: float,
+    resamples: int,
+    metric: Metric = Metric.TIME,
+) -> list[stats_compare.Comparison]:
+    if metric == Metric.AUTO:
+        metric = pick_metric(base, head)
+    base_by_key = {benchmark_key(benchmark): benchmark for benchmark in base}
+    head_by_key = {benchmark_key(benchmark): benchmark for benchmark in head}
+
+    comparisons = []
+    for key in sorted(base_by_key.keys() | head_by_key.keys()):
+        old, new = base_by_key.get(key), head_by_key.get(key)
+        if old and new and metric == Metric.INSTRUCTIONS:
+            comparisons.append(compare_instructions(key, old, new, threshold))
+        elif not new:
+            comparisons.append(
+                stats_compare.Comparison(
+                    key, old.stats.min, None, verdict=stats_compare.Verdict.MISSING
+                )
+            )
+        elif not old:
+            comparisons.append(
+                stats_compare.Comparison(
+                    key, None, new.stats.min, verdict=stats_compare.Verdict.NEW
+                )
+            )
+        elif old.stats.data and new.stats.data:
+            comparisons.append(
+                stats_compare.compare_data(
+                    key, old.stats.data, new.stats.data, threshold, alpha, resamples
+                )
+            )
+        else:
+            comparisons.append(
+                stats_compare.compare_summary(
+                    key,
+                    (old.stats.mean, old.stats.stddev, old.stats.rounds or 0),
+                    (new.stats.mean, new.stats.stddev, new.stats.rounds or 0),
+                    threshold,
+                    alpha,
+                )
+            )
+    return comparisons
+
+
+def render_comparisons(title: str, comparisons: Sequence[stats_compare.Comparison]):
+    styles = {
+        stats_compare.Verdict.SLOWER: "red",
+        stats_compare.Verdict.FASTER: "green",
+        stats_compare.Verdict.MISSING: "yellow",
+        stats_compare.Verdict.NEW: "yellow",
+    }
+
+    table = Table(title=title)
+    table.add_column("Benchmark")
+    table.add_column("Base", justify="right")
+    table.add_column("Head", justify="right")
+    table.add_column("Change", justify="right")
+    table.add_column("CI", justify="right")
+    table.add_column("p", justify="right")
+    table.add_column("Verdict")
+
+    for comparison in comparisons:
+        table.add_row(
+            # Parametrized ids like `[n=10]` would be read as markup.
+            escape(comparison.key),
+            f"{comparison.base:g}" if comparison.base is not None else "",
+            f"{comparison.head:g}" if comparison.head is not None else "",
+            f"{comparison.change:+.1%}" if comparison.change is not None else "",
+            escape(f"[{comparison.low:+.1%}, {comparison.high:+.1%}]")
+            if comparison.low is not None
+            else "",
+            f"{comparison.p_value:.3g}" if comparison.p_value is not None else "",
+            comparison.verdict.value,
+            style=styles.get(comparison.verdict),
         )
-        print(f"Written report to {out_dir / name}")
 
-    env = Environment(loader=PackageLoader("python_benchmark", "templates"))
-    template = env.get_template("index.html.jinja2")
-    (out_dir / "index.html").write_text(template.render(names=sorted(names)), "utf8")
-    print(f"Written index to {out_dir / 'index.html'}")
+    console = Console()
+    console.print(table)
+
+
+def load_runs(
+    ref: str, history: Path | None, machine: str | None
+) -> dict[str, list[Benchmark]]:
+    """Benchmarks per machine, from either a save file or a commit in the history."""
+    path = Path(ref)
+    if path.is_file():
+        save = BenchmarkSave.from_file(path)
+        return {save.machine_info.key: save.benchmarks}
+    if not history:
+        raise typer.BadParameter(f"{ref} is not a file, and no --history was given")
+
+    with HistoryStore(history, readonly=True) as store:
+        runs = store.runs_for_commit(ref)
+        if machine:
+            runs = {key: run for key, run in runs.items() if key == machine}
+        if not runs:
+            raise typer.BadParameter(f"No runs found for commit {ref}")
+        return {
+            key: cattrs.structure(list(store.results(run)), list[Benchmark])
+            for key, run in runs.items()
+        }
+
+
+@app.command()
+def compare(
+    base: str,
+    head: str,
+    history: Path | None = typer.Option(
+        None, exists=True, dir_okay=False, help="History database, to compare commits instead of save files."
+    ),
+    machine: str | None = typer.Option(
+        None, help="Only compare runs of this machine, e.g. Linux-CPython-3.13.1."
+    ),
+    threshold: float = typer.Option(
+        0.05, help="Smallest relative change that is reported."
+    ),
+    alpha: float = typer.Option(0.01, help="Significance level."),
+    resamples: int = typer.Option(1000, help="Bootstrap resamples."),
+    metric: Metric = typer.Option(
+        Metric.AUTO,
+        help="Compare wall times, or machine instruction counts from --benchmark-instructions "
+        "runs. By default, instruction counts where both runs have them.",
+    ),
+    fail_on_regression: bool = typer.Option(
+        True, help="Exit with a non-zero code when a benchmark got slower."
+    ),
+):
+    """Compare two saves (or two commits) and flag significant changes."""
+    base_runs = load_runs(base, history, machine)
+    head_runs = load_runs(head, history, machine)
+
+    if len(base_runs) == len(head_runs) == 1:
+        # Comparing two files, possibly from different machines.
+        pairs = [(next(iter(head_runs)), *base_runs.values(), *head_runs.values())]
+    else:
+        pairs = [
+            (key, base_runs[key], head_runs[key])
+            for key in sorted(base_runs.keys() & head_runs.keys())
+        ]
+
+    regressions = 0
+    for key, old, new in pairs:
+        pair_metric = pick_metric(old, new) if metric == Metric.AUTO else metric
+        comparisons = compare_benchmarks(old, new, threshold, alpha, resamples, pair_metric)
+        render_comparisons(f"{key} ({pair_metric.value})", comparisons)
+        regressions += sum(
+            comparison.verdict == stats_compare.Verdict.SLOWER
+            for comparison in comparisons
+        )
+
+    if regressions:
+        print(f"{regressions} benchmarks got slower")
+        if fail_on_regression:
+            raise typer.Exit(code=1)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,219 @@
+"""
+Statistics for deciding whether a benchmark changed between two runs.
+
+When both runs were saved with `--benchmark-save-data` we use the per-round
+timings: a Mann-Whitney U test for significance and a bootstrap confidence
+interval for the relative change in the median.
+Otherwise we fall back to Welch's t-test on the saved summary statistics.
+"""
+
+from __future__ import annotations
+
+import enum
+import math
+import random
+import statistics
+from typing import Sequence
+
+import attrs
+
+
+class Verdict(enum.Enum):
+    UNCHANGED = "unchanged"
+    FASTER = "faster"
+    SLOWER = "slower"
+    MISSING = "missing"
+    NEW = "new"
+
+
+@attrs.define
+class Comparison:
+    key: str
+    base: float | None
+    head: float | None
+    change: float | None = None
+    low: float | None = None
+    high: float | None = None
+    p_value: float | None = None
+    method: str = ""
+    verdict: Verdict = Verdict.UNCHANGED
+
+
+def normal_sf(z: float) -> float:
+    return 0.5 * math.erfc(z / math.sqrt(2))
+
+
+def mann_whitney_u(x: Sequence[float], y: Sequence[float]) -> float:
+    """Two-sided p-value of the Mann-Whitney U test, using the normal approximation with tie correction."""
+    n1, n2 = len(x), len(y)
+    combined = sorted([(value, 0) for value in x] + [(value, 1) for value in y])
+
+    rank_sum_x = 0.0
+    tie_term = 0.0
+    i = 0
+    while i < len(combined):
+        j = i
+        while j + 1 < len(combined) and combined[j + 1][0] == combined[i][0]:
+            j += 1
+        rank = (i + j) / 2 + 1
+        ties = j - i + 1
+        tie_term += ties**3 - ties
+        rank_sum_x += rank * sum(1 for k in range(i, j + 1) if combined[k][1] == 0)
+        i = j + 1
+
+    u = rank_sum_x - n1 * (n1 + 1) / 2
+    n = n1 + n2
+    mean = n1 * n2 / 2
+    variance = n1 * n2 / 12 * ((n + 1) - tie_term / (n * (n - 1)))
+    if variance <= 0:
+        return 1.0
+    z = (abs(u - mean) - 0.5) / math.sqrt(variance)
+    return min(1.0, 2 * normal_sf(max(z, 0.0)))
+
+
+def welch_t_test(
+    mean1: float, stddev1: float, n1: int, mean2: float, stddev2: float, n2: int
+) -> float:
+    """Two-sided p-value of Welch's t-test from summary statistics.
+
+    The t distribution is approximated by the normal distribution,
+    which is accurate for the round counts pytest-benchmark produces.
+    """
+    if n1 < 2 or n2 < 2:
+        return 1.0
+    error = math.sqrt(stddev1**2 / n1 + stddev2**2 / n2)
+    if error == 0:
+        return 0.0 if mean1 != mean2 else 1.0
+    return 2 * normal_sf(abs(mean1 - mean2) / error)
+
+
+def bootstrap_medians(data: Sequence[float], resamples: int, rng: random.Random) -> list[float]:
+    """Medians of `resamples` bootstrap resamples of `data`, without drawing the resamples.
+
+    A resample takes the data's value at a uniform random position `n` times,
+    so its `m`-th smallest value is the data's value at the `m`-th smallest of
+    `n` uniform variates, which is Beta(m, n - m + 1) distributed. That makes
+    every resample cost the same, however many rounds were saved.
+    """
+    ordered = sorted(data)
+    n = len(ordered)
+    m = (n + 1) // 2
+
+    def at(position: float) -> float:
+        return ordered[min(int(position * n), n - 1)]
+
+    medians = []
+    for _ in range(resamples):
+        lower = rng.betavariate(m, n - m + 1)
+        if n % 2:
+            medians.append(at(lower))
+        else:
+            # The next order statistic, the smallest of the `n - m` variates above `lower`.
+            upper = lower + (1 - lower) * rng.betavariate(1, n - m)
+            medians.append((at(lower) + at(upper)) / 2)
+    return medians
+
+
+def bootstrap_ratio(
+    base: Sequence[float],
+    head: Sequence[float],
+    resamples: int = 1000,
+    confidence: float = 0.95,
+    seed: int = 0,
+) -> tuple[float, float]:
+    """Confidence interval of `median(head) / median(base) - 1`."""
+    rng = random.Random(seed)
+    ratios = sorted(
+        head_median / base_median - 1
+        for head_median, base_median in zip(
+            bootstrap_medians(head, resamples, rng), bootstrap_medians(base, resamples, rng)
+        )
+    )
+    tail = (1 - confidence) / 2
+    return (
+        ratios[int(tail * (resamples - 1))],
+        ratios[int((1 - tail) * (resamples - 1))],
+    )
+
+
+def compare_data(
+    key: str,
+    base: Sequence[float],
+    head: Sequence[float],
+    threshold: float,
+    alpha: float,
+    resamples: int,
+) -> Comparison:
+    base_median = statistics.median(base)
+    head_median = statistics.median(head)
+    low, high = bootstrap_ratio(base, head, resamples=resamples, confidence=1 - alpha)
+    comparison = Comparison(
+        key=key,
+        base=base_median,
+        head=head_median,
+        change=head_median / base_median - 1,
+        low=low,
+        high=high,
+        p_value=mann_whitney_u(base, head),
+        method="mann-whitney",
+    )
+    comparison.verdict = judge(comparison, threshold, alpha)
+    return comparison
+
+
+def compare_summary(
+    key: str,
+    base: tuple[float, float, int],
+    head: tuple[float, float, int],
+    threshold: float,
+    alpha: float,
+) -> Comparison:
+    """Compare (mean, stddev, rounds) summaries."""
+    base_mean, base_stddev, base_rounds = base
+    head_mean, head_stddev, head_rounds = head
+    comparison = Comparison(
+        key=key,
+        base=base_mean,
+        head=head_mean,
+        change=head_mean / base_mean - 1,
+        p_value=welch_t_test(
+            base_mean, base_stddev, base_rounds, head_mean, head_stddev, head_rounds
+        ),
+        method="welch",
+    )
+    comparison.verdict = judge(comparison, threshold, alpha)
+    return comparison
+
+
+def compare_exact(key: str, base: float, head: float, threshold: float) -> Comparison:
+    """Compare deterministic measurements, like instruction counts.
+
+    There is no noise to test against, so any change beyond the threshold counts.
+    """
+    if base:
+        change = head / base - 1
+    else:
+        # Any work at all is an unbounded increase over none.
+        change = math.inf if head else 0.0
+    if change >= threshold:
+        verdict = Verdict.SLOWER
+    elif change <= -threshold:
+        verdict = Verdict.FASTER
+    else:
+        verdict = Verdict.UNCHANGED
+    return Comparison(
+        key=key, base=base, head=head, change=change, method="exact", verdict=verdict
+    )
+
+
+def judge(comparison: Comparison, threshold: float, alpha: float) -> Verdict:
+    """A change must be both statistically significant and larger than the threshold."""
+    if comparison.p_value is None or comparison.p_value >= alpha:
+        return Verdict.UNCHANGED
+    if comparison.low is not None and comparison.low <= 0 <= comparison.high:
+        return Verdict.UNCHANGED
+    if comparison.change >= threshold:
+        return Verdict.SLOWER
+    if comparison.change <= -threshold:
+        return Verdict.FASTER
+    return Verdict.UNCHANGED
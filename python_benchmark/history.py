@@ -0,0 +1,246 @@
+"""
+A local store of every benchmark save we have seen.
+
+Runs are keyed by the digest of their save file, so ingesting is idempotent
+and only ever costs as much as the new saves.
+Results are stored clustered by machine, benchmark and time, so the history
+of a single benchmark is one indexed range scan.
+"""
+
+from __future__ import annotations
+
+import json
+import sqlite3
+from array import array
+from pathlib import Path
+from typing import TYPE_CHECKING, Iterator, Sequence
+
+
+if TYPE_CHECKING:
+    from python_benchmark.bench_reporter import BenchmarkSave
+
+SCHEMA_VERSION = 3
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    digest TEXT NOT NULL UNIQUE,
+    path TEXT NOT NULL,
+    machine TEXT NOT NULL,
+    datetime TEXT NOT NULL,
+    commit_id TEXT,
+    commit_time TEXT,
+    commit_branch TEXT,
+    system TEXT NOT NULL,
+    python_implementation TEXT NOT NULL,
+    python_version TEXT NOT NULL,
+    release TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS runs_by_commit ON runs (commit_id);
+
+CREATE TABLE IF NOT EXISTS results (
+    machine TEXT NOT NULL,
+    fullname TEXT NOT NULL,
+    datetime TEXT NOT NULL,
+    run_id INTEGER NOT NULL REFERENCES runs (id),
+    params TEXT,
+    min REAL NOT NULL,
+    max REAL NOT NULL,
+    mean REAL NOT NULL,
+    stddev REAL NOT NULL,
+    rounds INTEGER,
+    -- Per-round timings as native doubles, when saved with --benchmark-save-data.
+    data BLOB,
+    -- Instructions per call, when run with --benchmark-instructions.
+    instructions REAL,
+    instruction_counter TEXT,
+    PRIMARY KEY (machine, fullname, datetime, run_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS results_by_fullname ON results (fullname, datetime);
+"""
+
+MIGRATIONS = {
+    1: """
+    ALTER TABLE results ADD COLUMN rounds INTEGER;
+    ALTER TABLE results ADD COLUMN data BLOB;
+    """,
+    2: """
+    ALTER TABLE results ADD COLUMN instructions REAL;
+    ALTER TABLE results ADD COLUMN instruction_counter TEXT;
+    """,
+}
+
+
+class HistoryStore:
+    def __init__(self, path: Path, readonly: bool = False):
+        self.path = path
+        if readonly:
+            # SQLite's own error, "unable to open database file", doesn't say which.
+            if not path.is_file():
+                raise FileNotFoundError(f"No history database at {path}, create one with `ingest`")
+            self.connection = sqlite3.connect(f"{path.resolve().as_uri()}?mode=ro", uri=True)
+        else:
+            self.connection = sqlite3.connect(path)
+            self._create()
+
+    def _create(self):
+        version = self.connection.execute("PRAGMA user_version").fetchone()[0]
+        if version > SCHEMA_VERSION:
+            raise ValueError(
+                f"{self.path} has schema version {version}, expected {SCHEMA_VERSION}"
+            )
+        with self.connection:
+            if version:
+                for from_version in range(version, SCHEMA_VERSION):
+                    self.connection.executescript(MIGRATIONS[from_version])
+            self.connection.executescript(SCHEMA)
+            self.connection.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+    def close(self):
+        self.connection.close()
+
+    def __enter__(self) -> HistoryStore:
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def has_run(self, digest: str) -> bool:
+        row = self.connection.execute(
+            "SELECT 1 FROM runs WHERE digest = ?", (digest,)
+        ).fetchone()
+        return row is not None
+
+    def add_run(self, path: Path, digest: str, save: BenchmarkSave) -> int:
+        machine_info = save.machine_info
+        commit_info = save.commit_info
+        datetime = save.datetime or ""
+        with self.connection:
+            cursor = self.connection.execute(
+                """
+                INSERT INTO runs (
+                    digest, path, machine, datetime, commit_id, commit_time, commit_branch,
+                    system, python_implementation, python_version, release
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                (
+                    digest,
+                    str(path),
+                    machine_info.key,
+                    datetime,
+                    commit_info.id if commit_info else None,
+                    commit_info.time if commit_info else None,
+                    commit_info.branch if commit_info else None,
+                    machine_info.system,
+                    machine_info.python_implementation,
+                    machine_info.python_version,
+                    machine_info.release,
+                ),
+            )
+            run_id = cursor.lastrowid
+            self.connection.executemany(
+                """
+                INSERT INTO results (
+                    machine, fullname, datetime, run_id, params,
+                    min, max, mean, stddev, rounds, data,
+                    instructions, instruction_counter
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                [
+                    (
+                        machine_info.key,
+                        benchmark.fullname,
+                        datetime,
+                        run_id,
+                        json.dumps(benchmark.params, sort_keys=True)
+                        if benchmark.params is not None
+                        else None,
+                        benchmark.stats.min,
+                        benchmark.stats.max,
+                        benchmark.stats.mean,
+                        benchmark.stats.stddev,
+                        benchmark.stats.rounds,
+                        array("d", benchmark.stats.data).tobytes()
+                        if benchmark.stats.data
+                        else None,
+                        *(
+                            (instructions.count, instructions.counter)
+                            if (instructions := benchmark.instructions)
+                            else (None, None)
+                        ),
+                    )
+                    for benchmark in save.benchmarks
+                ],
+            )
+        return run_id
+
+    def machines(self) -> Sequence[str]:
+        rows = self.connection.execute("SELECT DISTINCT machine FROM runs ORDER BY machine")
+        return [machine for machine, in rows]
+
+    def version(self, machine: str) -> str:
+        """A token that changes whenever a run is added for the machine."""
+        count, last = self.connection.execute(
+            "SELECT count(*), max(id) FROM runs WHERE machine = ?", (machine,)
+        ).fetchone()
+        return f"{count}:{last}"
+
+    def trends(self, machine: str) -> dict[str, list[float]]:
+        """The series of `min` times of every benchmark run on the machine, oldest first."""
+        trends: dict[str, list[float]] = {}
+        rows = self.connection.execute(
+            """
+            SELECT fullname, min FROM results
+            WHERE machine = ?
+            ORDER BY fullname, datetime, run_id
+            """,
+            (machine,),
+        )
+        for fullname, min_ in rows:
+            trends.setdefault(fullname, []).append(min_)
+        return trends
+
+    def runs_for_commit(self, commit_id: str) -> dict[str, int]:
+        """The latest run of a commit on each machine. Accepts commit prefixes."""
+        rows = self.connection.execute(
+            """
+            SELECT machine, id FROM runs
+            WHERE substr(commit_id, 1, ?) = ?
+            ORDER BY datetime, id
+            """,
+            (len(commit_id), commit_id),
+        )
+        return dict(rows)
+
+    def results(self, run_id: int) -> Iterator[dict]:
+        """The results of a run, in the layout of a pytest-benchmark save."""
+        rows = self.connection.execute(
+            """
+            SELECT fullname, params, min, max, mean, stddev, rounds, data,
+                   instructions, instruction_counter
+            FROM results WHERE run_id = ?
+            """,
+            (run_id,),
+        )
+        for (
+            fullname, params, min_, max_, mean, stddev, rounds, data,
+            instructions, instruction_counter,
+        ) in rows:
+            yield {
+                "name": fullname.rpartition("::")[2],
+                "fullname": fullname,
+                "params": json.loads(params) if params is not None else None,
+                "stats": {
+                    "min": min_,
+                    "max": max_,
+                    "mean": mean,
+                    "stddev": stddev,
+                    "rounds": rounds,
+                    "data": array("d", data) if data is not None else None,
+                },
+                "extra_info": {
+                    "instructions": {"counter": instruction_counter, "count": instructions}
+                }
+                if instructions is not None
+                else {},
+            }
@@ -0,0 +1,234 @@
+"""
+Streaming reader for pytest-benchmark saves.
+
+`json.loads` needs the whole file in memory, both as text and as a tree of
+Python objects. Saves with per-round data get large, and the reporter only
+needs a handful of fields, so we decode the save one value at a time and
+only keep what was asked for.
+
+The trimmed result can be cached next to the save in `marshal` format,
+which loads several times faster than JSON and cannot execute code.
+"""
+
+from __future__ import annotations
+
+import json
+import marshal
+import re
+import sys
+from array import array
+from pathlib import Path
+from typing import IO, Any, Iterator
+
+CACHE_SUFFIX = ".cache"
+CACHE_VERSION = 1
+CHUNK_SIZE = 1 << 16
+
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+_NUMBERS = re.compile(r"[-+0-9.eE, \t\n\r]*")
+_NUMBER_TAIL = re.compile(r"[-+0-9.eE]*")
+_decoder = json.JSONDecoder()
+
+
+class StreamingDecoder:
+    """Decode JSON values one at a time from a text stream."""
+
+    def __init__(self, stream: IO[str], chunk_size: int = CHUNK_SIZE):
+        self.stream = stream
+        self.chunk_size = chunk_size
+        self.buffer = ""
+        self.pos = 0
+        self.eof = False
+
+    def _fill(self, size: int):
+        if self.eof:
+            raise ValueError("Unexpected end of JSON input")
+        chunk = self.stream.read(size)
+        if not chunk:
+            self.eof = True
+        self.buffer = self.buffer[self.pos :] + chunk
+        self.pos = 0
+
+    def peek(self) -> str:
+        """The next non-whitespace character."""
+        while True:
+            self.pos = _WHITESPACE.match(self.buffer, self.pos).end()
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            self._fill(self.chunk_size)
+
+    def expect(self, char: str):
+        if self.peek() != char:
+            raise ValueError(
+                f"Expected {char!r}, found {self.buffer[self.pos : self.pos + 20]!r}"
+            )
+        self.pos += 1
+
+    def accept(self, char: str) -> bool:
+        if self.peek() == char:
+            self.pos += 1
+            return True
+        return False
+
+    def value(self) -> Any:
+        self.peek()
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            else:
+                # A number that ends the buffer may continue in the next chunk,
+                # even past a "." or an "e" the decoder stopped before.
+                if self.eof or not _NUMBER_TAIL.fullmatch(self.buffer, end):
+                    self.pos = end
+                    return value
+            # Grow geometrically, so a huge value costs linear time overall.
+            self._fill(max(self.chunk_size, len(self.buffer)))
+
+    def skip(self):
+        """Skip a value.
+
+        Flat arrays of numbers, like the per-round data, are skipped without decoding them.
+        """
+        if self.peek() == "[":
+            end = self.buffer.find("]", self.pos)
+            while end == -1:
+                searched = len(self.buffer) - self.pos
+                self._fill(max(self.chunk_size, len(self.buffer)))
+                end = self.buffer.find("]", self.pos + searched)
+            if _NUMBERS.fullmatch(self.buffer, self.pos + 1, end):
+                self.pos = end + 1
+                return
+        self.value()
+
+    def object_items(self) -> Iterator[str]:
+        """Iterate over the keys of an object, leaving the stream at each value."""
+        self.expect("{")
+        if self.accept("}"):
+            return
+        while True:
+            key = self.value()
+            self.expect(":")
+            yield key
+            if self.accept("}"):
+                return
+            self.expect(",")
+
+    def array_items(self) -> Iterator[None]:
+        """Iterate over an array, leaving the stream at each item."""
+        self.expect("[")
+        if self.accept("]"):
+            return
+        while True:
+            yield
+            if self.accept("]"):
+                return
+            self.expect(",")
+
+
+def read_benchmark(
+    decoder: StreamingDecoder, fields: frozenset[str], with_data: bool
+) -> dict:
+    benchmark: dict[str, Any] = {}
+    for key in decoder.object_items():
+        if key == "stats":
+            stats = benchmark["stats"] = {}
+            for stat in decoder.object_items():
+                if stat != "data":
+                    stats[stat] = decoder.value()
+                elif with_data:
+                    stats[stat] = array("d", decoder.value()).tobytes()
+                else:
+                    decoder.skip()
+        elif key in fields:
+            benchmark[key] = decoder.value()
+        else:
+            decoder.skip()
+    return benchmark
+
+
+def stream_save(
+    file: Path,
+    save_fields: frozenset[str],
+    benchmark_fields: frozenset[str],
+    with_data: bool,
+) -> dict:
+    """Read the wanted fields of a save, trimming each benchmark as soon as it is decoded.
+
+    Per-round data is returned as the bytes of an `array("d")`.
+    """
+    save: dict[str, Any] = {}
+    with file.open("r", encoding="utf8") as stream:
+        decoder = StreamingDecoder(stream)
+        for key in decoder.object_items():
+            if key == "benchmarks":
+                save[key] = [
+                    read_benchmark(decoder, benchmark_fields, with_data)
+                    for _ in decoder.array_items()
+                ]
+            elif key in save_fields:
+                save[key] = decoder.value()
+            else:
+                decoder.skip()
+    return save
+
+
+def cache_path(file: Path) -> Path:
+    return file.with_name(file.name + CACHE_SUFFIX)
+
+
+def _cache_key(file: Path, fields: tuple[str, ...], with_data: bool) -> tuple:
+    stat = file.stat()
+    return (
+        CACHE_VERSION,
+        tuple(sys.version_info[:2]),
+        stat.st_size,
+        stat.st_mtime_ns,
+        fields,
+        with_data,
+    )
+
+
+def read_cache(file: Path, fields: tuple[str, ...], with_data: bool) -> dict | None:
+    try:
+        key, save = marshal.loads(cache_path(file).read_bytes())
+    except (OSError, EOFError, ValueError, TypeError):
+        return None
+    if key == _cache_key(file, fields, with_data):
+        return save
+    # A cache with data also serves loads without it.
+    if not with_data and key == _cache_key(file, fields, True):
+        for benchmark in save.get("benchmarks", []):
+            benchmark["stats"].pop("data", None)
+        return save
+    return None
+
+
+def write_cache(file: Path, fields: tuple[str, ...], with_data: bool, save: dict):
+    try:
+        cache_path(file).write_bytes(
+            marshal.dumps((_cache_key(file, fields, with_data), save))
+        )
+    except OSError:
+        # Caching is best-effort, the save directory may well be read-only.
+        pass
+
+
+def load_save(
+    file: Path,
+    save_fields: frozenset[str],
+    benchmark_fields: frozenset[str],
+    with_data: bool = True,
+    cache: bool = False,
+) -> dict:
+    fields = tuple(sorted(save_fields)) + tuple(sorted(benchmark_fields))
+    if cache:
+        save = read_cache(file, fields, with_data)
+        if save is not None:
+            return save
+    save = stream_save(file, save_fields, benchmark_fields, with_data)
+    if cache:
+        write_cache(file, fields, with_data, save)
+    return save
@@ -0,0 +1,282 @@
+"""
+Run the benchmark suite sharded across worker processes.
+
+Each worker is a separate pytest process pinned to its own CPU core.
+Whole groups (test classes) are assigned to a single worker, so the
+benchmarks that get compared with each other always run on the same
+core. The workers' outputs are merged into a single pytest-benchmark
+save that the reporter reads like any other.
+
+Workers still share caches and memory bandwidth, so absolute times
+can differ from a serial run; reserve cores to keep the machine's own
+noise off the benchmark cores.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Optional, Sequence
+
+import attrs
+import typer
+
+app = typer.Typer()
+
+# Set in worker processes, to the file listing the node ids of their shard.
+SHARD_ENV = "PYTHON_BENCHMARK_SHARD"
+# Set in the collection run, to the file to list the collected node ids in.
+COLLECT_ENV = "PYTHON_BENCHMARK_COLLECT"
+
+
+def pytest_collection_modifyitems(config, items):
+    """Deselect everything outside this worker's shard.
+
+    Workers load this module as a pytest plugin, so they can be given the
+    exact same arguments as the collection run.
+    """
+    shard_file = os.environ.get(SHARD_ENV)
+    if not shard_file:
+        return
+    selected = set(Path(shard_file).read_text("utf8").splitlines())
+    deselected = [item for item in items if item.nodeid not in selected]
+    items[:] = [item for item in items if item.nodeid in selected]
+    config.hook.pytest_deselected(items=deselected)
+
+
+def pytest_collection_finish(session):
+    """List the collected node ids for `collect`, whatever the verbosity of the output."""
+    collect_file = os.environ.get(COLLECT_ENV)
+    if collect_file:
+        Path(collect_file).write_text("\n".join(item.nodeid for item in session.items), "utf8")
+
+
+@attrs.define
+class SaveOptions:
+    """pytest-benchmark's saving options, applied to the merged save."""
+
+    name: Optional[str] = None
+    with_data: bool = False
+    storage: Optional[Path] = None
+
+
+def storage_path(storage: str) -> Path:
+    # pytest-benchmark takes a path or a `file://` URI.
+    return Path(storage[len("file://") :] if storage.startswith("file://") else storage)
+
+
+def split_save_args(pytest_args: Sequence[str]) -> tuple[list[str], SaveOptions]:
+    """Take pytest-benchmark's saving options out of `pytest_args`.
+
+    Every worker would otherwise save its own shard to the storage, next to
+    the merged save. `--benchmark-storage` is still passed on, for options
+    like `--benchmark-compare` that read from it.
+    """
+    args = []
+    options = SaveOptions()
+    rest = iter(pytest_args)
+    for arg in rest:
+        if arg == "--benchmark-autosave":
+            continue
+        elif arg == "--benchmark-save-data":
+            options.with_data = True
+        elif arg == "--benchmark-save":
+            options.name = next(rest, None)
+        elif arg.startswith("--benchmark-save="):
+            options.name = arg.partition("=")[2]
+        else:
+            args.append(arg)
+            if arg == "--benchmark-storage":
+                storage = next(rest, None)
+                if storage is not None:
+                    args.append(storage)
+                    options.storage = storage_path(storage)
+            elif arg.startswith("--benchmark-storage="):
+                options.storage = storage_path(arg.partition("=")[2])
+    return args, options
+
+
+def collect(pytest_args: Sequence[str]) -> list[str]:
+    """The node ids pytest would run, listed by this module loaded as a plugin."""
+    with tempfile.TemporaryDirectory(prefix="benchmark-collect-") as tmp:
+        collect_file = Path(tmp, "nodeids.txt")
+        subprocess.run(
+            [
+                sys.executable,
+                "-m",
+                "pytest",
+                "--collect-only",
+                "-p",
+                "python_benchmark.runner",
+                *pytest_args,
+            ],
+            check=True,
+            capture_output=True,
+            env={**os.environ, COLLECT_ENV: str(collect_file)},
+        )
+        return collect_file.read_text("utf8").splitlines()
+
+
+def group_key(nodeid: str) -> str:
+    """`path::Class` for methods, `path::function` for plain functions."""
+    parts = nodeid.split("::")
+    return "::".join(parts[:2])
+
+
+def available_cores(reserve: int) -> list[int]:
+    if hasattr(os, "sched_getaffinity"):
+        cores = sorted(os.sched_getaffinity(0))
+    else:
+        cores = list(range(os.cpu_count() or 1))
+    # Core 0 usually handles most interrupts, so reserve from the bottom.
+    return cores[reserve:] or cores[-1:]
+
+
+def shard(nodeids: Sequence[str], workers: int) -> list[list[str]]:
+    """Split into `workers` shards of whole groups, balancing the number of tests."""
+    groups: dict[str, list[str]] = {}
+    for nodeid in nodeids:
+        groups.setdefault(group_key(nodeid), []).append(nodeid)
+
+    shards: list[list[str]] = [[] for _ in range(workers)]
+    for group in sorted(groups.values(), key=len, reverse=True):
+        min(shards, key=len).extend(group)
+    return [shard for shard in shards if shard]
+
+
+def pin_to(core: int):
+    def pin():
+        os.sched_setaffinity(0, {core})
+
+    return pin
+
+
+def merge(outputs: Sequence[Path], order: Sequence[str]) -> dict:
+    """Merge pytest-benchmark JSON outputs, keeping the collection order."""
+    saves = [json.loads(output.read_text("utf8")) for output in outputs if output.exists()]
+    if not saves:
+        raise ValueError("No worker produced any benchmark output")
+    position = {nodeid: index for index, nodeid in enumerate(order)}
+    merged = dict(saves[0])
+    merged["benchmarks"] = sorted(
+        (benchmark for save in saves for benchmark in save["benchmarks"]),
+        key=lambda benchmark: position.get(benchmark["fullname"], len(position)),
+    )
+    return merged
+
+
+def machine_id() -> str:
+    # The same directory name pytest-benchmark uses for its storage.
+    return "{}-{}-{}-{}".format(
+        platform.system(),
+        platform.python_implementation(),
+        ".".join(platform.python_version_tuple()[:2]),
+        platform.architecture()[0],
+    )
+
+
+def next_save_path(storage: Path, save: dict, name: Optional[str] = None) -> Path:
+    """The next numbered save in `storage`, named like `--benchmark-save` or autosave name them."""
+    directory = storage / machine_id()
+    directory.mkdir(parents=True, exist_ok=True)
+    numbers = [
+        int(path.name.split("_")[0])
+        for path in directory.glob("[0-9][0-9][0-9][0-9]_*.json")
+    ]
+    if name is None:
+        commit_id = save.get("commit_info", {}).get("id", "unversioned")
+        now = datetime.now(timezone.utc).strftime("%Y%m%d_%H%M%S")
+        name = f"{commit_id}_{now}"
+    return directory / f"{max(numbers, default=0) + 1:04}_{name}.json"
+
+
+@app.command(context_settings={"allow_extra_args": True, "ignore_unknown_options": True})
+def run(
+    ctx: typer.Context,
+    workers: Optional[int] = typer.Option(
+        None, help="Number of workers. Defaults to one per available core."
+    ),
+    reserve_cores: int = typer.Option(
+        0, help="Cores to leave free for the OS and the runner itself."
+    ),
+    pin: bool = typer.Option(True, help="Pin each worker to its own core, where supported."),
+    output: Optional[Path] = typer.Option(
+        None, help="Write the merged save here, instead of autosaving to --storage."
+    ),
+    storage: Optional[Path] = typer.Option(
+        None,
+        help="pytest-benchmark storage directory. "
+        "Defaults to the --benchmark-storage passed to pytest, or .benchmarks.",
+    ),
+):
+    """Run pytest sharded across cores. Extra arguments are passed on to pytest.
+
+    Only the merged result is saved: `--benchmark-save` and `--benchmark-autosave`
+    are not passed on to the workers, but name the merged save instead.
+    """
+    pytest_args, save = split_save_args(ctx.args)
+    nodeids = collect(pytest_args)
+    if not nodeids:
+        print("No benchmarks collected")
+        raise typer.Exit(code=1)
+
+    cores = available_cores(reserve_cores)
+    can_pin = pin and hasattr(os, "sched_setaffinity")
+    # Only pinned workers need a core each.
+    if can_pin:
+        shards = shard(nodeids, min(workers or len(cores), len(cores)))
+    else:
+        shards = shard(nodeids, workers or len(cores))
+        cores = [None] * len(shards)
+
+    with tempfile.TemporaryDirectory(prefix="benchmark-workers-") as tmp:
+        outputs = []
+        processes = []
+        for index, (core, nodes) in enumerate(zip(cores, shards)):
+            out = Path(tmp, f"worker-{index}.json")
+            outputs.append(out)
+            shard_file = Path(tmp, f"worker-{index}.txt")
+            shard_file.write_text("\n".join(nodes), "utf8")
+            where = f" on core {core}" if can_pin else ""
+            print(f"Worker {index}: {len(nodes)} benchmarks{where}")
+            processes.append(
+                subprocess.Popen(
+                    [
+                        sys.executable,
+                        "-m",
+                        "pytest",
+                        "-q",
+                        "-p",
+                        "python_benchmark.runner",
+                        f"--benchmark-json={out}",
+                        *pytest_args,
+                    ],
+                    env={**os.environ, SHARD_ENV: str(shard_file)},
+                    preexec_fn=pin_to(core) if can_pin else None,
+                )
+            )
+        returncodes = [process.wait() for process in processes]
+        merged = merge(outputs, nodeids)
+
+    if not output and not save.with_data:
+        # Like pytest-benchmark's own saves, keep the per-round data only when asked to.
+        for benchmark in merged["benchmarks"]:
+            benchmark["stats"].pop("data", None)
+    storage = storage or save.storage or Path(".benchmarks")
+    path = output or next_save_path(storage, merged, save.name)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(merged, indent=4), "utf8")
+    print(f"Saved {len(merged['benchmarks'])} benchmarks to {path}")
+
+    if any(returncodes):
+        raise typer.Exit(code=1)
+
+
+if __name__ == "__main__":
+    app()
@@ -0,0 +1,44 @@
+"""
+Analysis of benchmarks that were run on a growing number of workers.
+
+Every worker does the same amount of work (weak scaling), so with perfect
+scaling the time stays flat as workers are added. We report the throughput
+speedup over the smallest number of workers, and the efficiency: the
+fraction of the ideal speedup that was achieved.
+"""
+
+from __future__ import annotations
+
+from typing import Sequence
+
+import attrs
+
+
+@attrs.define
+class ScalingSeries:
+    key: str
+    name: str
+    # "thread" or "process".
+    executor: str
+    # Time per call, by number of workers.
+    times: dict[int, float] = attrs.field(factory=dict)
+
+    @property
+    def base_workers(self) -> int:
+        return min(self.times)
+
+    def speedup(self, workers: int) -> float | None:
+        """Throughput with `workers` workers, relative to the smallest number of workers."""
+        if workers not in self.times:
+            return None
+        base = self.base_workers
+        return (workers / base) * self.times[base] / self.times[workers]
+
+    def efficiency(self, workers: int) -> float | None:
+        if workers not in self.times:
+            return None
+        return self.times[self.base_workers] / self.times[workers]
+
+
+def worker_counts(series: Sequence[ScalingSeries]) -> list[int]:
+    return sorted({workers for variant in series for workers in variant.times})
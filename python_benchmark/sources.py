@@ -0,0 +1,122 @@
+"""
+Static introspection of benchmark sources.
+
+The reporter needs the docstrings and line ranges of test classes and
+functions. Importing the test modules to get them would execute their
+class bodies (which build benchmark data), and requires every benchmark
+dependency on the report machine. Instead we read them from the AST.
+"""
+
+from __future__ import annotations
+
+import ast
+import hashlib
+import os
+from pathlib import Path
+
+import attrs
+
+
+@attrs.frozen
+class FunctionInfo:
+    name: str
+    doc: str | None
+    start: int
+    end: int
+
+
+@attrs.frozen
+class ClassInfo:
+    name: str
+    doc: str | None
+    start: int
+    end: int
+    bases: tuple[str, ...] = ()
+    functions: dict[str, FunctionInfo] = attrs.field(factory=dict, hash=False)
+
+
+@attrs.frozen
+class ModuleInfo:
+    path: str
+    digest: str
+    classes: dict[str, ClassInfo] = attrs.field(factory=dict, hash=False)
+
+    def get_function(self, classname: str, funcname: str) -> tuple[ClassInfo, FunctionInfo]:
+        """Find a test method, following base classes defined in the same module."""
+        cls = self.classes[classname]
+        pending = [cls]
+        while pending:
+            current = pending.pop(0)
+            if funcname in current.functions:
+                return cls, current.functions[funcname]
+            pending.extend(
+                self.classes[base] for base in current.bases if base in self.classes
+            )
+        raise LookupError(f"{classname}.{funcname} not found in {self.path}")
+
+
+def _start(node: ast.ClassDef | ast.FunctionDef | ast.AsyncFunctionDef) -> int:
+    # Like `inspect.getsourcelines`, ranges include the decorators.
+    return min([node.lineno] + [decorator.lineno for decorator in node.decorator_list])
+
+
+def _class_functions(body: list[ast.stmt]) -> dict[str, FunctionInfo]:
+    functions = {}
+    for node in body:
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            functions[node.name] = FunctionInfo(
+                name=node.name,
+                doc=ast.get_docstring(node, clean=False),
+                start=_start(node),
+                end=node.end_lineno,
+            )
+        elif isinstance(node, (ast.If, ast.Try, ast.With)):
+            # Conditionally defined tests, e.g. `if hasattr(typing, "TypedDict"):`.
+            for block in ("body", "orelse", "finalbody"):
+                functions.update(_class_functions(getattr(node, block, [])))
+            for handler in getattr(node, "handlers", []):
+                functions.update(_class_functions(handler.body))
+    return functions
+
+
+def parse_module(path: str, source: bytes, digest: str) -> ModuleInfo:
+    tree = ast.parse(source, filename=path)
+    classes = {}
+    for node in tree.body:
+        if not isinstance(node, ast.ClassDef):
+            continue
+        classes[node.name] = ClassInfo(
+            name=node.name,
+            doc=ast.get_docstring(node, clean=False),
+            start=_start(node),
+            end=node.end_lineno,
+            bases=tuple(base.id for base in node.bases if isinstance(base, ast.Name)),
+            functions=_class_functions(node.body),
+        )
+    return ModuleInfo(path=path, digest=digest, classes=classes)
+
+
+# Parsed modules by path, with the size and modification time of the file they were read from.
+_modules: dict[str, tuple[tuple[int, int], ModuleInfo]] = {}
+
+
+def module_info(path: str) -> ModuleInfo:
+    """Parse a test module, once per file.
+
+    The reporter calls this for every benchmark, so the file is only read again
+    when its size or modification time changed, and only parsed again when its
+    content did.
+    """
+    stat = os.stat(path)
+    signature = (stat.st_size, stat.st_mtime_ns)
+    cached = _modules.get(path)
+    if cached is not None and cached[0] == signature:
+        return cached[1]
+    source = Path(path).read_bytes()
+    digest = hashlib.sha256(source).hexdigest()
+    if cached is not None and cached[1].digest == digest:
+        info = cached[1]
+    else:
+        info = parse_module(path, source, digest)
+    _modules[path] = (signature, info)
+    return info
@@ -0,0 +1,138 @@
+"""
+Analysis of benchmarks that were run over a range of input sizes.
+
+Each variant of a group gets an empirical power law, `time ≈ constant * n ** exponent`,
+fitted by least squares on log–log axes. Where the fastest variant changes
+between two neighbouring sizes we estimate the crossover size by interpolating
+the ratio of the two variants' times, again on log–log axes.
+"""
+
+from __future__ import annotations
+
+import math
+from typing import Mapping, Sequence
+
+import attrs
+
+
+@attrs.define
+class Fit:
+    exponent: float
+    constant: float
+
+    def __call__(self, size: float) -> float:
+        return self.constant * size**self.exponent
+
+
+@attrs.define
+class Series:
+    key: str
+    name: str
+    # (size, time) pairs, by increasing size.
+    points: list[tuple[int, float]]
+    fit: Fit | None = None
+
+    def time_at(self, size: int) -> float | None:
+        for point_size, time in self.points:
+            if point_size == size:
+                return time
+        return None
+
+
+@attrs.define
+class Crossover:
+    # Estimated, so usually between two of the measured sizes.
+    size: float
+    before: str
+    after: str
+
+
+@attrs.define
+class Sweep:
+    sizes: list[int]
+    series: list[Series]
+    # The key of the fastest series at each size.
+    winners: dict[int, str]
+    crossovers: list[Crossover]
+
+
+def fit_power_law(points: Sequence[tuple[int, float]]) -> Fit | None:
+    """Least-squares fit of `log(time) = log(constant) + exponent * log(size)`."""
+    points = [(size, time) for size, time in points if size > 0 and time > 0]
+    if len(points) < 2:
+        return None
+    xs = [math.log(size) for size, _ in points]
+    ys = [math.log(time) for _, time in points]
+    mean_x = sum(xs) / len(xs)
+    mean_y = sum(ys) / len(ys)
+    sxx = sum((x - mean_x) ** 2 for x in xs)
+    if not sxx:
+        return None
+    exponent = sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys)) / sxx
+    return Fit(exponent=exponent, constant=math.exp(mean_y - exponent * mean_x))
+
+
+def find_winners(sizes: Sequence[int], series: Sequence[Series]) -> dict[int, str]:
+    winners = {}
+    for size in sizes:
+        times = [
+            (time, variant.key)
+            for variant in series
+            if (time := variant.time_at(size)) is not None
+        ]
+        if times:
+            winners[size] = min(times)[1]
+    return winners
+
+
+def crossover_size(
+    size0: int, size1: int, before: Series, after: Series
+) -> float:
+    """Where `after` overtakes `before`, interpolating `log(before / after)` over `log(size)`."""
+    d0 = math.log(before.time_at(size0) / after.time_at(size0))
+    d1 = math.log(before.time_at(size1) / after.time_at(size1))
+    if d1 == d0:
+        return math.sqrt(size0 * size1)
+    fraction = d0 / (d0 - d1)
+    return math.exp(math.log(size0) + fraction * (math.log(size1) - math.log(size0)))
+
+
+def find_crossovers(
+    sizes: Sequence[int], series: Sequence[Series], winners: Mapping[int, str]
+) -> list[Crossover]:
+    by_key = {variant.key: variant for variant in series}
+    crossovers = []
+    for size0, size1 in zip(sizes, sizes[1:]):
+        before, after = winners.get(size0), winners.get(size1)
+        if before is None or after is None or before == after:
+            continue
+        first, second = by_key[before], by_key[after]
+        if None in (
+            first.time_at(size0),
+            first.time_at(size1),
+            second.time_at(size0),
+            second.time_at(size1),
+        ):
+            continue
+        crossovers.append(
+            Crossover(
+                size=crossover_size(size0, size1, first, second),
+                before=before,
+                after=after,
+            )
+        )
+    return crossovers
+
+
+def analyze(series: Sequence[Series]) -> Sweep:
+    sizes = sorted({size for variant in series for size, _ in variant.points})
+    for variant in series:
+        variant.points.sort()
+        variant.fit = fit_power_law(variant.points)
+    winners = find_winners(sizes, series)
+    return Sweep(
+        sizes=sizes,
+        series=list(series),
+        winners=winners,
+        crossovers=find_crossovers(sizes, series, winners),
+    )
@@ -0,0 +1,191 @@
+"""
+Synthetic pytest-benchmark saves, for measuring the reporter on more data than we have.
+
+The reporter groups benchmarks by the class of the test that produced them, and
+reads the class's docstring from the test module, so the saves come with a test
+module of their own: `groups` classes of `benchmarks // groups` tests each.
+Every save is for a different machine, in a directory of its own, the way
+`pytest --benchmark-autosave` lays them out.
+"""
+
+from __future__ import annotations
+
+import json
+import random
+import statistics
+from pathlib import Path
+
+import typer
+
+MODULE_NAME = "test_synthetic.py"
+
+
+def group_sizes(benchmarks: int, groups: int) -> list[int]:
+    """Spread the benchmarks over the groups, as evenly as possible."""
+    groups = max(1, min(groups, benchmarks))
+    size, extra = divmod(benchmarks, groups)
+    return [size + (group < extra) for group in range(groups)]
+
+
+def module_source(benchmarks: int, groups: int) -> str:
+    """A test module declaring the classes and functions the synthetic benchmarks name."""
+    lines = []
+    for group, size in enumerate(group_sizes(benchmarks, groups)):
+        lines += [
+            f"class TestGroup{group}:",
+            '    """',
+            f"    Synthetic group {group}, of {size} benchmarks.",
+            "",
+            "    Its description is rendered as *Markdown*, like every other group's.",
+            '    """',
+            "",
+        ]
+        for test in range(size):
+            lines += [
+                f"    def test_{test}(self, benchmark):",
+                f'        """Variant {test}"""',
+                "",
+            ]
+    return "\n".join(lines)
+
+
+def machine_info(machine: int) -> dict:
+    """Machine info with a key of its own for every `machine`."""
+    return {
+        "python_implementation": "CPython",
+        "python_version": f"3.{machine // 100 + 13}.{machine % 100}",
+        "system": "Linux",
+        "release": "6.8.0",
+        "cpu": {"flags": ["avx"] * 100},
+    }
+
+
+def stats(rng: random.Random, rounds: int) -> dict:
+    """Summary statistics around a random time, with `rounds` rounds of data if any."""
+    base = rng.uniform(1e-7, 1e-3)
+    data = [base * rng.uniform(1.0, 2.0) for _ in range(rounds)]
+    if len(data) > 1:
+        quartiles = statistics.quantiles(data, n=4)
+        mean = statistics.fmean(data)
+        summary = {
+            "min": min(data),
+            "max": max(data),
+            "mean": mean,
+            "stddev": statistics.stdev(data),
+            "median": quartiles[1],
+            "iqr": quartiles[2] - quartiles[0],
+            "q1": quartiles[0],
+            "q3": quartiles[2],
+        }
+    else:
+        mean = base * 1.5
+        summary = {
+            "min": base,
+            "max": base * 2,
+            "mean": mean,
+            "stddev": base / 10,
+            "median": mean,
+            "iqr": base / 10,
+            "q1": base * 1.4,
+            "q3": base * 1.6,
+        }
+    return {
+        **summary,
+        "rounds": rounds,
+        "iqr_outliers": 0,
+        "stddev_outliers": 0,
+        "ops": 1 / mean,
+        "data": data,
+    }
+
+
+def synthetic_save(
+    benchmarks: int,
+    rounds: int,
+    groups: int = 1,
+    module: str = f"tests/{MODULE_NAME}",
+    machine: int = 0,
+    seed: int = 0,
+) -> dict:
+    """A save of `benchmarks` benchmarks in `groups` groups, with `rounds` rounds of data each.
+
+    `module` is the test module the benchmarks name, see `module_source`.
+    """
+    rng = random.Random(seed)
+    return {
+        "machine_info": machine_info(machine),
+        "commit_info": {"id": f"{seed:040x}", "time": "2024-12-20T00:00:00+00:00"},
+        "benchmarks": [
+            {
+                "group": None,
+                "name": f"test_{test}",
+                "fullname": f"{module}::TestGroup{group}::test_{test}",
+                "params": None,
+                "param": None,
+                "extra_info": {},
+                "options": {"timer": "perf_counter", "min_rounds": 5},
+                "stats": stats(rng, rounds),
+            }
+            for group, size in enumerate(group_sizes(benchmarks, groups))
+            for test in range(size)
+        ],
+        "datetime": "2024-12-20T00:00:00",
+        "version": "5.1.0",
+    }
+
+
+def write_saves(
+    directory: Path,
+    saves: int,
+    benchmarks: int,
+    rounds: int = 0,
+    groups: int = 1,
+    history: int = 1,
+) -> list[Path]:
+    """Write `saves` machines' saves under `directory`, with their test module.
+
+    Every machine gets `history` saves, of which the reporter renders the latest.
+    Returns the paths of the saves.
+    """
+    directory.mkdir(parents=True, exist_ok=True)
+    module = directory / MODULE_NAME
+    module.write_text(module_source(benchmarks, groups), "utf8")
+
+    paths = []
+    for machine in range(saves):
+        machine_dir = directory / f"machine_{machine}"
+        machine_dir.mkdir(exist_ok=True)
+        for run in range(history):
+            save = synthetic_save(
+                benchmarks,
+                rounds,
+                groups=groups,
+                module=str(module.resolve()),
+                machine=machine,
+                seed=machine * history + run,
+            )
+            path = machine_dir / f"{run + 1:04d}_synthetic.json"
+            path.write_text(json.dumps(save, indent=4), "utf8")
+            paths.append(path)
+    return paths
+
+
+app = typer.Typer()
+
+
+@app.command()
+def generate(
+    directory: Path,
+    saves: int = typer.Option(1, help="Number of machines, each with its own save."),
+    benchmarks: int = typer.Option(1000, help="Number of benchmarks in every save."),
+    groups: int = typer.Option(100, help="Number of groups the benchmarks are spread over."),
+    rounds: int = typer.Option(0, help="Rounds of per-round data saved for every benchmark."),
+    history: int = typer.Option(1, help="Number of saves for every machine."),
+):
+    """Write synthetic saves and the test module they refer to under DIRECTORY."""
+    paths = write_saves(directory, saves, benchmarks, rounds, groups, history)
+    print(f"Written {len(paths)} saves to {directory}")
+
+
+if __name__ == "__main__":
+    app()
@@ -0,0 +1,97 @@
+"""
+Detection of the warmup at the start of a benchmark's rounds.
+
+A JIT, like PyPy's, makes the first rounds slower than the rest, which skews
+the mean and leaves the minimum to whichever round got a lucky trace. CPython
+only specializes for a few calls, so its rounds are checked only on request.
+We find where the steady state starts
+with MSER-5, the marginal standard error rule: average the rounds in batches
+of 5, and cut the batches that minimize the standard error of the remaining
+mean. If the rounds after the cut still drift, they never settled.
+"""
+
+from __future__ import annotations
+
+import math
+import statistics
+from typing import Sequence
+
+import attrs
+
+BATCH = 5
+# Fewer rounds than this are too few to tell warmup from noise.
+MIN_ROUNDS = 4 * BATCH
+# Differences in time smaller than this fraction, or than this many standard errors,
+# are noise: they neither make rounds warmup nor make the steady state drift.
+MARGIN = 0.05
+SIGNIFICANCE = 4
+
+
+@attrs.define
+class Warmup:
+    # Rounds before the steady state. The saved stats still include them.
+    rounds: int
+    # Time spent in those rounds, in seconds, over all their iterations.
+    time: float
+    # False when the timings never settled. All rounds are then kept.
+    steady: bool
+
+
+def mser_cut(batches: Sequence[float]) -> int:
+    """The number of leading batches to cut, minimizing the marginal standard error.
+
+    Only cuts in the first half are considered, as usual for MSER.
+    """
+    scale = statistics.fmean(batches) or 1.0
+    values = [value / scale for value in batches]
+    best, best_error = 0, None
+    # Sums over the batches after the cut, updated as the cut moves back from the end.
+    total = total_squares = 0.0
+    for cut in range(len(values) - 1, -1, -1):
+        total += values[cut]
+        total_squares += values[cut] ** 2
+        count = len(values) - cut
+        if cut > len(values) // 2:
+            continue
+        error = max(total_squares - total**2 / count, 0.0) / count**2
+        if best_error is None or error <= best_error:
+            best, best_error = cut, error
+    return best
+
+
+def _standard_error(times: Sequence[float], count: int) -> float:
+    """The standard error of the mean of `count` rounds with the spread of `times`."""
+    return statistics.stdev(times) / math.sqrt(count)
+
+
+def _significant(difference: float, base: float, error: float) -> bool:
+    return difference > max(MARGIN * base, SIGNIFICANCE * error)
+
+
+def settled(times: Sequence[float]) -> bool:
+    """Whether the two halves of the rounds have about the same median."""
+    half = len(times) // 2
+    first, second = statistics.median(times[:half]), statistics.median(times[half:])
+    error = _standard_error(times, half) * math.sqrt(2)
+    return not _significant(abs(first - second), min(first, second), error)
+
+
+def detect_warmup(times: Sequence[float], iterations: int = 1) -> Warmup | None:
+    """Find the warmup in per-iteration round times, or None with too few rounds."""
+    if len(times) < MIN_ROUNDS:
+        return None
+    batches = [
+        statistics.fmean(times[start : start + BATCH])
+        for start in range(0, len(times) - BATCH + 1, BATCH)
+    ]
+    rounds = mser_cut(batches) * BATCH
+    warmup, steady = times[:rounds], times[rounds:]
+    if not settled(steady):
+        return Warmup(rounds=0, time=0.0, steady=False)
+    # Medians, so that a single slow round is not mistaken for warmup.
+    steady_median = statistics.median(steady)
+    if not warmup or not _significant(
+        statistics.median(warmup) - steady_median, steady_median, _standard_error(steady, rounds)
+    ):
+        return Warmup(rounds=0, time=0.0, steady=True)
+    return Warmup(rounds=rounds, time=sum(warmup) * iterations, steady=True)
@@ -1,8 +1,55 @@
-from typing import Any, Optional
+import asyncio
+import sys
+import sysconfig
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Dict, Optional
 
 import attrs
 import pytest
 
+from tests import instrumentation
+from tests.fingerprint import Fingerprint
+from tests.utils import INSTRUCTION_COUNTER, Benchmark, fan_out
+
+
+def pytest_addoption(parser):
+    parser.addoption(
+        "--benchmark-instructions",
+        choices=instrumentation.INSTRUCTION_COUNTERS,
+        default=None,
+        metavar="COUNTER",
+        help="Also count the machine instructions executed per benchmark call. "
+        "Unlike times, the counts are stable on shared machines. "
+        "'perf' reads the hardware counters, where the kernel permits it. "
+        "'callgrind' runs each module again under Valgrind, which is slow but needs no hardware counters. "
+        "Runs counting instructions are reported apart from plain timing runs.",
+    )
+
+
+def pytest_configure(config):
+    counter = config.getoption("benchmark_instructions")
+    if counter:
+        try:
+            instrumentation.check_instruction_counter(counter)
+        except (instrumentation.CountersUnavailable, OSError) as e:
+            raise pytest.UsageError(f"--benchmark-instructions={counter}: {e}") from e
+        config.stash[INSTRUCTION_COUNTER] = counter
+
+
+def pytest_benchmark_update_machine_info(config, machine_info):
+    # Free-threaded builds can still turn the GIL on, e.g. with PYTHON_GIL=1.
+    is_gil_enabled = getattr(sys, "_is_gil_enabled", None)
+    machine_info["python_gil"] = is_gil_enabled() if is_gil_enabled else True
+    machine_info["free_threaded_build"] = bool(sysconfig.get_config_var("Py_GIL_DISABLED"))
+    machine_info["instruction_counter"] = config.stash.get(INSTRUCTION_COUNTER, None)
+
+
+def pytest_report_header(config):
+    counter = config.stash.get(INSTRUCTION_COUNTER, None)
+    if counter:
+        return f"instruction counter: {counter}"
+
 
 @pytest.fixture(
     params=[
@@ -16,12 +63,64 @@ def set_of_range(request):
 @attrs.define
 class TestResult:
     nodeid: Optional[str] = None
-    result: Any = attrs.field(default=None, repr=False)
+    result: Optional[Fingerprint] = None
 
     def __bool__(self):
         return self.nodeid is not None
 
 
+@attrs.define
+class SavedResults:
+    """The fingerprint of the first result of each parametrization of a group, for `@verify`.
+
+    Benchmarks are only comparable with the same parameters,
+    e.g. the same input size in a sweep.
+    """
+
+    results: Dict[str, TestResult] = attrs.field(factory=dict)
+
+    def get(self, key: str) -> TestResult:
+        return self.results.setdefault(key, TestResult())
+
+
+EXECUTORS = {"thread": ThreadPoolExecutor, "process": ProcessPoolExecutor}
+
+
+@pytest.fixture
+def pool(executor, workers):
+    """An executor for `@scaling` groups, with all of its workers running."""
+    with EXECUTORS[executor](max_workers=workers) as pool:
+        # Workers start lazily. Keep each one busy for a moment so that all of them do.
+        fan_out(pool, workers, time.sleep, 0.01)
+        yield pool
+
+
+@pytest.fixture
+def event_loop(request):
+    """A new event loop for `@async_benchmark` groups, of the kind they are parametrized with."""
+    if request.param == "uvloop":
+        import uvloop
+
+        loop = uvloop.new_event_loop()
+    else:
+        loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    yield loop
+    # Stop background tasks the test started.
+    tasks = asyncio.all_tasks(loop)
+    for task in tasks:
+        task.cancel()
+    loop.run_until_complete(asyncio.gather(*tasks, return_exceptions=True))
+    asyncio.set_event_loop(None)
+    loop.close()
+
+
 @pytest.fixture(scope="class")
 def saved_result():
-    return TestResult()
+    return SavedResults()
+
+
+@pytest.fixture
+def benchmark(benchmark, request, saved_result):
+    """Wrap every benchmark, so options like `--benchmark-instructions` apply to all groups."""
+    return Benchmark(benchmark, None, request, saved_result)
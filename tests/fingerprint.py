@@ -0,0 +1,128 @@
+"""
+Structural digests of benchmark results, for `@verify`.
+
+Holding the first result of a group until every variant has run keeps
+it alive for the whole group, and comparing with `!=` walks both results
+in full. Instead we stream each result through a hash once, keep the digest
+and a short `repr` for the failure message, and let the result go.
+
+Digests follow `==` where they can: numbers that compare equal hash the same
+(`1`, `1.0` and `True`), so do `bytes` and `bytearray`, or `set` and `frozenset`,
+and dicts and sets are hashed regardless of their order.
+"""
+
+import dataclasses
+import hashlib
+import reprlib
+from array import array
+from itertools import islice
+from typing import Optional, Tuple
+
+import attrs
+
+# Elements hashed at once when a sequence holds only ints or only strings.
+CHUNK = 1024
+# Unordered collections add up the digests of their elements, modulo this.
+MODULUS = 1 << 128
+# Sequences compare equal to their own kind only, like `[1] != (1,)`.
+SEQUENCES = ((list, "[", "]"), (tuple, "(", ")"), (array, "a[", "]"))
+
+_sample_repr = reprlib.Repr()
+_sample_repr.maxlist = _sample_repr.maxtuple = _sample_repr.maxarray = 6
+_sample_repr.maxset = _sample_repr.maxfrozenset = _sample_repr.maxdict = 6
+_sample_repr.maxstring = _sample_repr.maxother = 60
+
+
+@attrs.frozen
+class Fingerprint:
+    digest: str
+    # A shortened `repr` of the result, for messages.
+    sample: str
+
+
+def _scalar_token(value) -> Optional[str]:
+    """The token of a value compared by value, or None if it is not one."""
+    if value is None:
+        return "n"
+    kind = type(value)
+    if kind is int or kind is bool:
+        return f"i{int(value)}"
+    if kind is float:
+        return f"i{int(value)}" if value.is_integer() else f"f{value!r}"
+    if kind is str:
+        return f"s{value!r}"
+    return None
+
+
+def _brackets(value) -> Optional[Tuple[str, str]]:
+    for kind, opening, closing in SEQUENCES:
+        if isinstance(value, kind):
+            return opening, closing
+    return None
+
+
+def _update(hasher, text: str):
+    hasher.update(text.encode("utf-8", "surrogatepass"))
+
+
+def _unordered(items) -> str:
+    """Add up the digests of the items, so that their order does not matter."""
+    total = 0
+    for item in items:
+        element = hashlib.blake2b(digest_size=16)
+        _feed(element, item)
+        total = (total + int.from_bytes(element.digest(), "little")) % MODULUS
+    return f"{total:032x}"
+
+
+def _feed_sequence(hasher, values):
+    iterator = iter(values)
+    while chunk := list(islice(iterator, CHUNK)):
+        kinds = set(map(type, chunk))
+        if kinds == {int}:
+            _update(hasher, "i" + ",i".join(map(str, chunk)) + ",")
+        elif kinds == {str}:
+            _update(hasher, "s" + ",s".join(map(repr, chunk)) + ",")
+        else:
+            for value in chunk:
+                _feed(hasher, value)
+                _update(hasher, ",")
+
+
+def _feed(hasher, value, ordered: bool = True):
+    token = _scalar_token(value)
+    if token is not None:
+        _update(hasher, token)
+    elif isinstance(value, (bytes, bytearray, memoryview)):
+        data = value if isinstance(value, (bytes, bytearray)) else value.tobytes()
+        _update(hasher, f"b{len(data)}:")
+        hasher.update(data)
+    elif (brackets := _brackets(value)) is not None:
+        opening, closing = brackets
+        _update(hasher, f"{opening}{len(value)}:")
+        if ordered:
+            _feed_sequence(hasher, value)
+        else:
+            _update(hasher, _unordered(value))
+        _update(hasher, closing)
+    elif isinstance(value, dict):
+        _update(hasher, f"{{{len(value)}:{_unordered(value.items())}}}")
+    elif isinstance(value, (set, frozenset)):
+        _update(hasher, f"<{len(value)}:{_unordered(value)}>")
+    elif attrs.has(type(value)):
+        _update(hasher, f"o{type(value).__qualname__}(")
+        _feed_sequence(hasher, [getattr(value, field.name) for field in attrs.fields(type(value))])
+        _update(hasher, ")")
+    elif dataclasses.is_dataclass(value) and not isinstance(value, type):
+        _update(hasher, f"o{type(value).__qualname__}(")
+        _feed_sequence(hasher, [getattr(value, field.name) for field in dataclasses.fields(value)])
+        _update(hasher, ")")
+    else:
+        _update(hasher, f"r{type(value).__qualname__}:{value!r}")
+
+
+def fingerprint(value, ordered: bool = True) -> Fingerprint:
+    """Digest a result. With `ordered=False`, a list or tuple result is compared as a multiset."""
+    hasher = hashlib.blake2b(digest_size=16)
+    _feed(hasher, value, ordered)
+    return Fingerprint(digest=hasher.hexdigest(), sample=_sample_repr.repr(value))
@@ -0,0 +1,411 @@
+"""
+Hardware performance counters and GC activity for benchmarks.
+
+Counters come from Linux's `perf_event_open`, called through `ctypes`.
+They are often unavailable: other platforms, containers without the syscall,
+or a `kernel.perf_event_paranoid` setting that forbids them. In that case we
+only record why, and still measure the GC.
+
+Instruction counts for `--benchmark-instructions` can also come from
+Valgrind's callgrind, which needs no hardware counters, see
+`callgrind_instructions`.
+"""
+
+import ctypes
+import ctypes.util
+import functools
+import gc
+import os
+import platform
+import shutil
+import statistics
+import struct
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+import attrs
+
+try:
+    import fcntl
+except ImportError:
+    # Windows. `perf_event_open` is Linux only anyway, see `PerfCounters.open`.
+    fcntl = None
+
+# `perf_event_open` is not wrapped by libc, so we need its syscall number.
+PERF_EVENT_OPEN_SYSCALL = {
+    "x86_64": 298,
+    "amd64": 298,
+    "i386": 336,
+    "i686": 336,
+    "aarch64": 241,
+    "arm64": 241,
+    "riscv64": 241,
+    "armv7l": 364,
+    "ppc64le": 319,
+    "s390x": 331,
+}
+
+PERF_TYPE_HARDWARE = 0
+# Counters we read, by their `PERF_COUNT_HW_*` config.
+HARDWARE_COUNTERS = {
+    "instructions": 1,
+    "cycles": 0,
+    "cache_misses": 3,
+    "branch_misses": 5,
+}
+
+PERF_FORMAT_TOTAL_TIME_ENABLED = 1 << 0
+PERF_FORMAT_TOTAL_TIME_RUNNING = 1 << 1
+PERF_FORMAT_GROUP = 1 << 3
+
+ATTR_DISABLED = 1 << 0
+ATTR_EXCLUDE_KERNEL = 1 << 5
+ATTR_EXCLUDE_HV = 1 << 6
+
+PERF_EVENT_IOC_ENABLE = 0x2400
+PERF_EVENT_IOC_DISABLE = 0x2401
+PERF_EVENT_IOC_RESET = 0x2403
+PERF_IOC_FLAG_GROUP = 1
+
+# The original, 64 byte, `struct perf_event_attr`. Newer kernels accept it too.
+PERF_ATTR_FORMAT = "=IIQQQQQIIQ"
+
+# Instrumented rounds should last about this long, to amortize reading the counters.
+ROUND_TIME = 1e-3
+
+# Instruction counts use fixed rounds and iterations, so they do not depend on timing.
+INSTRUCTION_ROUNDS = 5
+INSTRUCTION_ITERATIONS = 10
+# Instruction counters for `--benchmark-instructions`.
+INSTRUCTION_COUNTERS = ("perf", "callgrind")
+# Set in the pytest processes run under callgrind, to the file listing the counted benchmarks.
+CALLGRIND_ENV = "PYTHON_BENCHMARK_CALLGRIND"
+# Under callgrind, calls are counted for about this long, slowdown included.
+CALLGRIND_ROUND_TIME = 1.0
+CALLGRIND_MAX_ITERATIONS = 10_000
+# Fresh inputs are all made before the counted calls, so keep fewer of them around.
+CALLGRIND_MAX_FRESH_ITERATIONS = 20
+# libc functions that mark the counted calls, for callgrind's `--zero-before` and
+# `--dump-before`. Nothing else in a benchmark run calls them.
+CALLGRIND_ZERO = "getpgrp"
+CALLGRIND_DUMP = "getsid"
+
+
+class CountersUnavailable(Exception):
+    pass
+
+
+def _perf_event_attr(config: int, leader: bool) -> bytes:
+    flags = ATTR_EXCLUDE_KERNEL | ATTR_EXCLUDE_HV
+    if leader:
+        flags |= ATTR_DISABLED
+    read_format = (
+        PERF_FORMAT_GROUP | PERF_FORMAT_TOTAL_TIME_ENABLED | PERF_FORMAT_TOTAL_TIME_RUNNING
+    )
+    return struct.pack(
+        PERF_ATTR_FORMAT,
+        PERF_TYPE_HARDWARE,
+        struct.calcsize(PERF_ATTR_FORMAT),
+        config,
+        0,
+        0,
+        read_format,
+        flags,
+        0,
+        0,
+        0,
+    )
+
+
+class PerfCounters:
+    """A group of hardware counters for the current thread, read all at once."""
+
+    def __init__(self, fds: Dict[str, int]):
+        self.fds = fds
+        self.leader = next(iter(fds.values()))
+
+    @classmethod
+    def open(cls, names: Sequence[str] = tuple(HARDWARE_COUNTERS)) -> "PerfCounters":
+        if sys.platform != "linux":
+            raise CountersUnavailable(f"perf_event_open is Linux only, not {sys.platform}")
+        syscall_number = PERF_EVENT_OPEN_SYSCALL.get(platform.machine().lower())
+        if syscall_number is None:
+            raise CountersUnavailable(f"Unknown perf_event_open syscall on {platform.machine()}")
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+
+        fds: Dict[str, int] = {}
+        errors: Dict[str, None] = {}
+        for name in names:
+            config = HARDWARE_COUNTERS[name]
+            attr = ctypes.create_string_buffer(_perf_event_attr(config, leader=not fds))
+            group_fd = next(iter(fds.values())) if fds else -1
+            fd = libc.syscall(syscall_number, attr, 0, -1, group_fd, 0)
+            if fd < 0:
+                # Some counters are missing on some CPUs and VMs, keep the rest.
+                errors[os.strerror(ctypes.get_errno())] = None
+                continue
+            fds[name] = fd
+        if "instructions" not in fds:
+            for fd in fds.values():
+                os.close(fd)
+            raise CountersUnavailable(f"perf_event_open failed: {'; '.join(errors)}")
+        return cls(fds)
+
+    def close(self):
+        for fd in self.fds.values():
+            os.close(fd)
+        self.fds = {}
+
+    def __enter__(self) -> "PerfCounters":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def reset(self):
+        fcntl.ioctl(self.leader, PERF_EVENT_IOC_RESET, PERF_IOC_FLAG_GROUP)
+
+    def enable(self):
+        fcntl.ioctl(self.leader, PERF_EVENT_IOC_ENABLE, PERF_IOC_FLAG_GROUP)
+
+    def disable(self):
+        fcntl.ioctl(self.leader, PERF_EVENT_IOC_DISABLE, PERF_IOC_FLAG_GROUP)
+
+    def read(self) -> Dict[str, float]:
+        """Counter values, scaled up if the kernel had to multiplex the counters."""
+        size = 8 * (3 + len(self.fds))
+        _, enabled, running, *values = struct.unpack(
+            f"={3 + len(self.fds)}Q", os.read(self.leader, size)
+        )
+        scale = enabled / running if running else 0.0
+        return {name: value * scale for name, value in zip(self.fds, values)}
+
+
+class GCMonitor:
+    """Count collections and the time spent in them, using `gc.callbacks`."""
+
+    def __init__(self):
+        self.collections = 0
+        self.time = 0.0
+        self._start = None
+
+    def _callback(self, phase, info):
+        if phase == "start":
+            self._start = time.perf_counter()
+        elif self._start is not None:
+            self.time += time.perf_counter() - self._start
+            self.collections += 1
+            self._start = None
+
+    def __enter__(self) -> "GCMonitor":
+        gc.callbacks.append(self._callback)
+        return self
+
+    def __exit__(self, *exc_info):
+        gc.callbacks.remove(self._callback)
+
+
+@attrs.define
+class Instrumentation:
+    rounds: int
+    iterations: int
+    # Medians over the rounds, per call.
+    counters: Optional[Dict[str, float]]
+    # Why there are no counters, if there are none.
+    counters_error: Optional[str]
+    gc_collections: float
+    gc_time: float
+
+
+def _iterations_for(function, make_inputs, round_time: float = ROUND_TIME) -> int:
+    args, kwargs = make_inputs()
+    start = time.perf_counter()
+    function(*args, **kwargs)
+    elapsed = time.perf_counter() - start
+    return max(1, min(int(round_time / max(elapsed, 1e-9)), 100_000))
+
+
+def instrument(function, make_inputs, rounds: int, fresh_inputs: bool) -> Instrumentation:
+    """Count what a call does, in separate untimed rounds.
+
+    With `fresh_inputs`, every call gets its own inputs, so there is a single call per round.
+    """
+    iterations = 1 if fresh_inputs else _iterations_for(function, make_inputs)
+    try:
+        counters = PerfCounters.open()
+        error = None
+    except (CountersUnavailable, OSError) as e:
+        counters = None
+        error = str(e)
+
+    samples: Dict[str, List[float]] = {}
+    with GCMonitor() as monitor:
+        try:
+            for _ in range(rounds):
+                args, kwargs = make_inputs()
+                if counters is not None:
+                    counters.reset()
+                    counters.enable()
+                for _ in range(iterations):
+                    function(*args, **kwargs)
+                if counters is not None:
+                    counters.disable()
+                    for name, value in counters.read().items():
+                        samples.setdefault(name, []).append(value / iterations)
+        finally:
+            if counters is not None:
+                counters.close()
+
+    calls = rounds * iterations
+    return Instrumentation(
+        rounds=rounds,
+        iterations=iterations,
+        counters={name: statistics.median(values) for name, values in samples.items()}
+        if counters is not None
+        else None,
+        counters_error=error,
+        gc_collections=monitor.collections / calls,
+        gc_time=monitor.time / calls,
+    )
+
+
+def _min_instructions(counters: PerfCounters, function, make_inputs, rounds, iterations) -> float:
+    counts = []
+    for _ in range(rounds):
+        args, kwargs = make_inputs()
+        counters.reset()
+        counters.enable()
+        for _ in range(iterations):
+            function(*args, **kwargs)
+        counters.disable()
+        counts.append(counters.read()["instructions"])
+    return min(counts)
+
+
+def count_instructions(function, make_inputs, iterations: int) -> float:
+    """Machine instructions executed per call, in user space.
+
+    We take the smallest count over a few rounds, and subtract the count of
+    calling a no-op the same way, which leaves only the work of the call itself.
+    """
+
+    def noop(*args, **kwargs):
+        pass
+
+    with PerfCounters.open(("instructions",)) as counters:
+        baseline = _min_instructions(counters, noop, make_inputs, INSTRUCTION_ROUNDS, iterations)
+        count = _min_instructions(counters, function, make_inputs, INSTRUCTION_ROUNDS, iterations)
+    return max(count - baseline, 0.0) / iterations
+
+
+def _noop(*args, **kwargs):
+    pass
+
+
+def count_under_callgrind(nodeid: str, function, make_inputs, fresh_inputs: bool):
+    """Make callgrind count the calls of `function`, from inside a process run by `callgrind_module`.
+
+    The calls, and as many calls of a no-op, each go between a call of
+    `CALLGRIND_ZERO` and one of `CALLGRIND_DUMP`, so callgrind saves the
+    instructions of each loop and nothing else. The inputs are made beforehand.
+    """
+    limit = CALLGRIND_MAX_FRESH_ITERATIONS if fresh_inputs else CALLGRIND_MAX_ITERATIONS
+    iterations = min(_iterations_for(function, make_inputs, CALLGRIND_ROUND_TIME), limit)
+    inputs = [make_inputs() for _ in range(iterations)] if fresh_inputs else [make_inputs()] * iterations
+    for target in (_noop, function):
+        os.getpgrp()
+        for args, kwargs in inputs:
+            target(*args, **kwargs)
+        os.getsid(0)
+    with open(os.environ[CALLGRIND_ENV], "a", encoding="utf8") as counted:
+        counted.write(f"{os.getpid()}\t{iterations}\t{nodeid}\n")
+
+
+def _callgrind_total(path: Path) -> int:
+    """The total of the first event, `Ir`, in a callgrind output file."""
+    for line in path.read_text("utf8").splitlines():
+        if line.startswith(("totals:", "summary:")):
+            return int(line.split()[1])
+    raise CountersUnavailable(f"No totals in {path}")
+
+
+@functools.lru_cache(maxsize=None)
+def callgrind_module(path: str, rootdir: Path) -> Dict[str, float]:
+    """Machine instructions executed per call by every benchmark of a module, by node id.
+
+    The module runs once under callgrind, with `count_under_callgrind` in place
+    of the timing, which saves one count for each no-op loop and benchmark loop.
+    """
+    with tempfile.TemporaryDirectory(prefix="callgrind-") as tmp:
+        counted = Path(tmp, "counted.txt")
+        counted.touch()
+        result = subprocess.run(
+            [
+                "valgrind",
+                "--tool=callgrind",
+                f"--zero-before={CALLGRIND_ZERO}",
+                f"--dump-before={CALLGRIND_DUMP}",
+                # Forked workers, as in `@scaling` groups, write files of their own.
+                f"--callgrind-out-file={tmp}/callgrind.out.%p",
+                sys.executable,
+                "-m",
+                "pytest",
+                "-q",
+                "-p",
+                "no:cacheprovider",
+                "--benchmark-disable",
+                path,
+            ],
+            cwd=rootdir,
+            # Hash randomization would change the work of set and dict benchmarks between runs.
+            env={**os.environ, CALLGRIND_ENV: str(counted), "PYTHONHASHSEED": "0"},
+            capture_output=True,
+            text=True,
+        )
+        if result.returncode:
+            raise CountersUnavailable(
+                f"callgrind run of {path} failed:\n{result.stdout}{result.stderr}"
+            )
+        benchmarks = [line.split("\t", 2) for line in counted.read_text("utf8").splitlines()]
+        if not benchmarks:
+            return {}
+        pid = benchmarks[0][0]
+        # Dumps are numbered from 1, the last one is made at exit.
+        dumps = sorted(
+            Path(tmp).glob(f"callgrind.out.{pid}.*"), key=lambda dump: int(dump.suffix[1:])
+        )
+        if len(dumps) < 2 * len(benchmarks):
+            raise CountersUnavailable(
+                f"callgrind saved {len(dumps)} counts for the {len(benchmarks)} benchmarks of {path}"
+            )
+        totals = [_callgrind_total(dump) for dump in dumps]
+    return {
+        nodeid: max(totals[2 * index + 1] - totals[2 * index], 0) / int(iterations)
+        for index, (_, iterations, nodeid) in enumerate(benchmarks)
+    }
+
+
+def callgrind_instructions(nodeid: str, rootdir: Path) -> Optional[float]:
+    """Machine instructions executed per call, counted by Valgrind's callgrind.
+
+    Callgrind simulates the CPU, so it needs no hardware counters and gives the
+    same count on every run, but it can't be read from inside the process it runs.
+    So every benchmark of the module is counted at once, in a pytest process of its
+    own, see `callgrind_module`. None for benchmarks that were not counted there.
+    """
+    return callgrind_module(nodeid.partition("::")[0], rootdir).get(nodeid)
+
+
+def check_instruction_counter(counter: str):
+    """Raise `CountersUnavailable` if `counter` can't be used here."""
+    if counter == "perf":
+        PerfCounters.open(("instructions",)).close()
+    elif counter == "callgrind":
+        if shutil.which("valgrind") is None:
+            raise CountersUnavailable("valgrind is not installed")
+    else:
+        raise CountersUnavailable(f"Unknown instruction counter {counter!r}")
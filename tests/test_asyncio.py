@@ -0,0 +1,184 @@
+"""
+Overheads of asyncio: coroutine calls, fan-out, queues and scheduling.
+
+Every group runs on the standard event loop, and on uvloop when it is installed.
+"""
+
+import asyncio
+import sys
+
+from tests.utils import async_benchmark, sweep
+
+CALLS = 1000
+ITEMS = 10_000
+
+
+def add(a, b):
+    return a + b
+
+
+async def async_add(a, b):
+    return a + b
+
+
+@async_benchmark()
+class TestCoroutineCall:
+    """
+    Call a function 1000 times from a coroutine.
+
+    Like `TestCall`, but comparing plain calls to awaiting coroutines and tasks.
+    """
+
+    def test_plain_call(self, benchmark):
+        """Call a plain function"""
+
+        async def run():
+            for _ in range(CALLS):
+                add(1, 2)
+
+        benchmark(run)
+
+    def test_await_coroutine(self, benchmark):
+        """Await a coroutine"""
+
+        async def run():
+            for _ in range(CALLS):
+                await async_add(1, 2)
+
+        benchmark(run)
+
+    def test_await_task(self, benchmark):
+        """Await a task wrapping the coroutine"""
+
+        async def run():
+            for _ in range(CALLS):
+                await asyncio.ensure_future(async_add(1, 2))
+
+        benchmark(run)
+
+
+async def yield_once():
+    await asyncio.sleep(0)
+
+
+@async_benchmark()
+@sweep("tasks", start=10, stop=100_000)
+class TestFanOut:
+    """
+    Run many small tasks concurrently, and wait for all of them.
+
+    Every task yields to the event loop once.
+    """
+
+    def test_gather(self, benchmark, tasks):
+        """`asyncio.gather`"""
+
+        async def run():
+            await asyncio.gather(*(yield_once() for _ in range(tasks)))
+
+        benchmark(run)
+
+    def test_wait(self, benchmark, tasks):
+        """`asyncio.create_task` and `asyncio.wait`"""
+
+        async def run():
+            await asyncio.wait([asyncio.create_task(yield_once()) for _ in range(tasks)])
+
+        benchmark(run)
+
+    if sys.version_info >= (3, 11):
+
+        def test_task_group(self, benchmark, tasks):
+            """`asyncio.TaskGroup`"""
+
+            async def run():
+                async with asyncio.TaskGroup() as group:
+                    for _ in range(tasks):
+                        group.create_task(yield_once())
+
+            benchmark(run)
+
+
+async def produce(queue: asyncio.Queue):
+    for i in range(ITEMS):
+        await queue.put(i)
+    await queue.put(None)
+
+
+async def consume(queue: asyncio.Queue):
+    while await queue.get() is not None:
+        pass
+
+
+@async_benchmark()
+class TestQueueThroughput:
+    """
+    Pass 10,000 items from a producer task to a consumer task through an `asyncio.Queue`.
+
+    With a small queue, the tasks have to take turns more often.
+    """
+
+    def test_unbounded(self, benchmark):
+        """Unbounded queue"""
+
+        async def run():
+            queue = asyncio.Queue()
+            await asyncio.gather(produce(queue), consume(queue))
+
+        benchmark(run)
+
+    def test_bounded_100(self, benchmark):
+        """Queue of up to 100 items"""
+
+        async def run():
+            queue = asyncio.Queue(maxsize=100)
+            await asyncio.gather(produce(queue), consume(queue))
+
+        benchmark(run)
+
+    def test_bounded_1(self, benchmark):
+        """Queue of a single item"""
+
+        async def run():
+            queue = asyncio.Queue(maxsize=1)
+            await asyncio.gather(produce(queue), consume(queue))
+
+        benchmark(run)
+
+
+async def spin():
+    while True:
+        await asyncio.sleep(0)
+
+
+@async_benchmark()
+@sweep("load", start=1, stop=1000)
+class TestSchedulingLatency:
+    """
+    Get scheduled again while other tasks keep the event loop busy.
+
+    `load` tasks yield to the loop in an endless loop, so every round trip
+    through the loop waits for all of them.
+    """
+
+    def test_sleep_zero(self, benchmark, event_loop, load):
+        """Yield with `asyncio.sleep(0)`"""
+        for _ in range(load):
+            event_loop.create_task(spin())
+
+        async def run():
+            await asyncio.sleep(0)
+
+        benchmark(run)
+
+    def test_call_soon(self, benchmark, event_loop, load):
+        """Wait for a future resolved by `loop.call_soon`"""
+        for _ in range(load):
+            event_loop.create_task(spin())
+
+        async def run():
+            future = event_loop.create_future()
+            event_loop.call_soon(future.set_result, None)
+            await future
+
+        benchmark(run)
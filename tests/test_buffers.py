@@ -0,0 +1,194 @@
+"""
+Zero-copy handling of binary data: slicing, parsing fixed-width records, and building output.
+
+Groups record their allocations, as avoiding copies is the point.
+"""
+
+import io
+import os
+import struct
+import sys
+from array import array
+
+import pytest
+
+from tests.utils import sweep, track_memory, verify
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+requires_numpy = pytest.mark.skipif(numpy is None, reason="numpy is not installed")
+
+
+@track_memory()
+@sweep("size", start=64, stop=1024 * 1024, factor=16)
+class TestSlicing:
+    """
+    Take everything but the first byte of a buffer.
+
+    Slicing `bytes` and `bytearray` copies, slicing a `memoryview` does not.
+    """
+
+    def test_bytes(self, benchmark, size):
+        """Slice `bytes`"""
+
+        def run(data):
+            return data[1:]
+
+        benchmark(run, os.urandom(size))
+
+    def test_bytearray(self, benchmark, size):
+        """Slice a `bytearray`"""
+
+        def run(data):
+            return data[1:]
+
+        benchmark(run, bytearray(os.urandom(size)))
+
+    def test_memoryview(self, benchmark, size):
+        """Slice a `memoryview` of `bytes`"""
+
+        def run(data):
+            return data[1:]
+
+        benchmark(run, memoryview(os.urandom(size)))
+
+
+RECORD = struct.Struct("<4I")
+RECORDS = 10_000
+RECORDS_DATA = b"".join(RECORD.pack(i, i % 7, i % 251, i ^ 0xFFFF) for i in range(RECORDS))
+
+
+@verify
+@track_memory()
+class TestParseRecords:
+    """
+    Get the first field of 10,000 fixed-width records.
+
+    Each record is four little-endian 32-bit unsigned ints.
+    `array`, `memoryview.cast` and `numpy` use native byte order,
+    so they only apply as-is on little-endian machines.
+    """
+
+    def test_struct_unpack_from(self, benchmark):
+        """`struct.unpack_from` at each offset"""
+
+        def run(data, _unpack_from=struct.Struct("<I").unpack_from):
+            return [_unpack_from(data, offset)[0] for offset in range(0, len(data), RECORD.size)]
+
+        benchmark(run, RECORDS_DATA)
+
+    def test_struct_iter_unpack(self, benchmark):
+        """`struct.iter_unpack` of whole records"""
+
+        def run(data):
+            return [record[0] for record in RECORD.iter_unpack(data)]
+
+        benchmark(run, RECORDS_DATA)
+
+    def test_int_from_bytes(self, benchmark):
+        """`int.from_bytes` of a `memoryview` slice"""
+
+        def run(data):
+            view = memoryview(data)
+            return [
+                int.from_bytes(view[offset : offset + 4], "little")
+                for offset in range(0, len(data), RECORD.size)
+            ]
+
+        benchmark(run, RECORDS_DATA)
+
+    if sys.byteorder == "little":
+
+        def test_memoryview_cast(self, benchmark):
+            """`memoryview.cast("I")`, taking every 4th item"""
+
+            def run(data):
+                return memoryview(data).cast("I")[::4].tolist()
+
+            benchmark(run, RECORDS_DATA)
+
+        def test_array(self, benchmark):
+            """`array("I")`, taking every 4th item"""
+
+            def run(data):
+                return array("I", data)[::4].tolist()
+
+            benchmark(run, RECORDS_DATA)
+
+        @requires_numpy
+        def test_numpy_frombuffer(self, benchmark):
+            """`numpy.frombuffer`, taking every 4th item"""
+
+            def run(data):
+                return numpy.frombuffer(data, dtype="<u4")[::4].tolist()
+
+            benchmark(run, RECORDS_DATA)
+
+
+CHUNKS = [os.urandom(16) for _ in range(1000)]
+
+
+@verify
+@track_memory()
+class TestBuildBuffer:
+    """
+    Build an output buffer from 1000 chunks of 16 bytes.
+    """
+
+    def test_join(self, benchmark):
+        """`b"".join`"""
+
+        def run(chunks):
+            return b"".join(chunks)
+
+        benchmark(run, CHUNKS)
+
+    def test_bytes_concat(self, benchmark):
+        """`bytes +=`"""
+
+        def run(chunks):
+            output = b""
+            for chunk in chunks:
+                output += chunk
+            return output
+
+        benchmark(run, CHUNKS)
+
+    def test_bytearray_extend(self, benchmark):
+        """`bytearray +=`"""
+
+        def run(chunks):
+            output = bytearray()
+            for chunk in chunks:
+                output += chunk
+            return output
+
+        benchmark(run, CHUNKS)
+
+    def test_bytesio(self, benchmark):
+        """`io.BytesIO.write`"""
+
+        def run(chunks):
+            output = io.BytesIO()
+            for chunk in chunks:
+                output.write(chunk)
+            return output.getvalue()
+
+        benchmark(run, CHUNKS)
+
+    def test_preallocated(self, benchmark):
+        """Preallocated `bytearray`, assigning into a `memoryview`"""
+
+        def run(chunks):
+            output = bytearray(sum(len(chunk) for chunk in chunks))
+            view = memoryview(output)
+            offset = 0
+            for chunk in chunks:
+                view[offset : offset + len(chunk)] = chunk
+                offset += len(chunk)
+            return output
+
+        benchmark(run, CHUNKS)
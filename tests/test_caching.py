@@ -0,0 +1,394 @@
+"""
+Caching and memoization: `functools.lru_cache` and `cache`, a dict memo,
+hand-written LRU and FIFO caches, and `functools.cached_property`.
+
+The cached function returns its key, so the times are the caches' own overhead.
+Keys are generated once, at import, so their generation is never timed.
+"""
+
+import collections
+import functools
+import itertools
+import math
+import random
+import threading
+
+import pytest
+
+from tests.utils import fan_out, fresh_inputs, pedantic, scaling, sweep, track_memory
+
+KEY_SPACE = 100_000
+ACCESSES = 10_000
+# Zipf's law: the key of rank k is accessed proportionally to 1 / k ** ZIPF_EXPONENT.
+ZIPF_EXPONENT = 1.1
+# The bound of the caches in `TestCacheDistribution` and `TestCacheContention`.
+MAXSIZE = 1024
+# Cache misses per call in `TestCacheMiss`, so the net allocation in KiB is in bytes per entry.
+ENTRIES = 1024
+
+_rng = random.Random(0)
+HIT_KEYS = _rng.sample(range(KEY_SPACE), 1000)
+MISS_KEYS = _rng.sample(range(KEY_SPACE), ENTRIES)
+# Beyond the keys that prefill the caches in `TestCacheEviction`.
+EVICTION_KEYS = list(range(KEY_SPACE, KEY_SPACE + 1000))
+ACCESS_KEYS = {
+    "uniform": [_rng.randrange(KEY_SPACE) for _ in range(ACCESSES)],
+    "zipf": _rng.choices(
+        _rng.sample(range(KEY_SPACE), KEY_SPACE),
+        cum_weights=list(
+            itertools.accumulate(1 / rank**ZIPF_EXPONENT for rank in range(1, KEY_SPACE + 1))
+        ),
+        k=ACCESSES,
+    ),
+}
+
+
+def compute(key):
+    return key
+
+
+_MISSING = object()
+
+
+def dict_memo(function):
+    memo = {}
+
+    def cached(key):
+        value = memo.get(key, _MISSING)
+        if value is _MISSING:
+            value = memo[key] = function(key)
+        return value
+
+    return cached
+
+
+def locked_dict_memo(function):
+    memo = {}
+    lock = threading.Lock()
+
+    def cached(key):
+        with lock:
+            value = memo.get(key, _MISSING)
+            if value is _MISSING:
+                value = memo[key] = function(key)
+            return value
+
+    return cached
+
+
+class LRUCache:
+    """Least recently used eviction, keeping the entries in an `OrderedDict`."""
+
+    def __init__(self, function, maxsize: int):
+        self.function = function
+        self.maxsize = maxsize
+        self.entries = collections.OrderedDict()
+
+    def __call__(self, key):
+        entries = self.entries
+        if key in entries:
+            entries.move_to_end(key)
+            return entries[key]
+        value = entries[key] = self.function(key)
+        if len(entries) > self.maxsize:
+            entries.popitem(last=False)
+        return value
+
+
+class LockedLRUCache(LRUCache):
+    def __init__(self, function, maxsize: int):
+        super().__init__(function, maxsize)
+        self.lock = threading.Lock()
+
+    def __call__(self, key):
+        with self.lock:
+            return super().__call__(key)
+
+
+class FIFOCache:
+    """First in, first out eviction, using the insertion order of a dict. Hits cost nothing extra."""
+
+    def __init__(self, function, maxsize: int):
+        self.function = function
+        self.maxsize = maxsize
+        self.entries = {}
+
+    def __call__(self, key):
+        entries = self.entries
+        value = entries.get(key, _MISSING)
+        if value is _MISSING:
+            value = entries[key] = self.function(key)
+            if len(entries) > self.maxsize:
+                del entries[next(iter(entries))]
+        return value
+
+
+def look_up(cached, keys):
+    for key in keys:
+        cached(key)
+
+
+def prefilled(cached, keys):
+    look_up(cached, keys)
+    return cached
+
+
+class TestCacheHit:
+    """
+    Look up 1000 keys that are all in the cache.
+    """
+
+    def test_lru_cache(self, benchmark):
+        """`functools.lru_cache` with a `maxsize`"""
+        benchmark(look_up, prefilled(functools.lru_cache(maxsize=MAXSIZE)(compute), HIT_KEYS), HIT_KEYS)
+
+    def test_cache(self, benchmark):
+        """`functools.cache`"""
+        benchmark(look_up, prefilled(functools.cache(compute), HIT_KEYS), HIT_KEYS)
+
+    def test_dict_memo(self, benchmark):
+        """A dict memo in a closure"""
+        benchmark(look_up, prefilled(dict_memo(compute), HIT_KEYS), HIT_KEYS)
+
+    def test_locked_dict_memo(self, benchmark):
+        """A dict memo behind a `threading.Lock`"""
+        benchmark(look_up, prefilled(locked_dict_memo(compute), HIT_KEYS), HIT_KEYS)
+
+    def test_lru_ordered_dict(self, benchmark):
+        """A hand-written LRU cache on an `OrderedDict`"""
+        benchmark(look_up, prefilled(LRUCache(compute, MAXSIZE), HIT_KEYS), HIT_KEYS)
+
+    def test_locked_lru_ordered_dict(self, benchmark):
+        """The hand-written LRU cache behind a `threading.Lock`"""
+        benchmark(look_up, prefilled(LockedLRUCache(compute, MAXSIZE), HIT_KEYS), HIT_KEYS)
+
+    def test_fifo_dict(self, benchmark):
+        """A hand-written FIFO cache on a dict"""
+        benchmark(look_up, prefilled(FIFOCache(compute, MAXSIZE), HIT_KEYS), HIT_KEYS)
+
+
+def fill(cached):
+    look_up(cached, MISS_KEYS)
+
+
+@track_memory()
+@fresh_inputs(lambda make_cache: make_cache())
+class TestCacheMiss:
+    """
+    Add 1024 keys to an empty cache, all of them misses.
+
+    The net allocation is for the 1024 entries, so in KiB it is the bytes per entry.
+    """
+
+    def test_lru_cache(self, benchmark):
+        """`functools.lru_cache` with a `maxsize`"""
+        benchmark(fill, lambda: functools.lru_cache(maxsize=ENTRIES)(compute))
+
+    def test_cache(self, benchmark):
+        """`functools.cache`"""
+        benchmark(fill, lambda: functools.cache(compute))
+
+    def test_dict_memo(self, benchmark):
+        """A dict memo in a closure"""
+        benchmark(fill, lambda: dict_memo(compute))
+
+    def test_locked_dict_memo(self, benchmark):
+        """A dict memo behind a `threading.Lock`"""
+        benchmark(fill, lambda: locked_dict_memo(compute))
+
+    def test_lru_ordered_dict(self, benchmark):
+        """A hand-written LRU cache on an `OrderedDict`"""
+        benchmark(fill, lambda: LRUCache(compute, ENTRIES))
+
+    def test_fifo_dict(self, benchmark):
+        """A hand-written FIFO cache on a dict"""
+        benchmark(fill, lambda: FIFOCache(compute, ENTRIES))
+
+
+def evict(cached):
+    look_up(cached, EVICTION_KEYS)
+
+
+@sweep("maxsize", start=16, stop=4096, factor=4)
+@fresh_inputs(lambda make_cache: make_cache())
+class TestCacheEviction:
+    """
+    Look up 1000 new keys in a full cache, so every lookup evicts an entry.
+
+    The caches are filled before each round, outside the timed region.
+    """
+
+    def test_lru_cache(self, benchmark, maxsize):
+        """`functools.lru_cache`"""
+        benchmark(
+            evict,
+            lambda: prefilled(functools.lru_cache(maxsize=maxsize)(compute), range(maxsize)),
+        )
+
+    def test_lru_ordered_dict(self, benchmark, maxsize):
+        """A hand-written LRU cache on an `OrderedDict`"""
+        benchmark(evict, lambda: prefilled(LRUCache(compute, maxsize), range(maxsize)))
+
+    def test_locked_lru_ordered_dict(self, benchmark, maxsize):
+        """The hand-written LRU cache behind a `threading.Lock`"""
+        benchmark(evict, lambda: prefilled(LockedLRUCache(compute, maxsize), range(maxsize)))
+
+    def test_fifo_dict(self, benchmark, maxsize):
+        """A hand-written FIFO cache on a dict"""
+        benchmark(evict, lambda: prefilled(FIFOCache(compute, maxsize), range(maxsize)))
+
+
+@pytest.fixture
+def accesses(distribution):
+    return ACCESS_KEYS[distribution]
+
+
+@pytest.mark.parametrize("distribution", list(ACCESS_KEYS))
+class TestCacheDistribution:
+    """
+    Look up 10,000 keys out of 100,000, with a cache of 1024 entries.
+
+    Under Zipf's law a few keys get most of the accesses, so most lookups hit.
+    Uniform keys mostly miss, and then bounded caches evict an entry.
+    """
+
+    def test_lru_cache(self, benchmark, distribution, accesses):
+        """`functools.lru_cache` with a `maxsize`"""
+        benchmark(look_up, functools.lru_cache(maxsize=MAXSIZE)(compute), accesses)
+
+    def test_cache(self, benchmark, distribution, accesses):
+        """`functools.cache`, which never evicts"""
+        benchmark(look_up, functools.cache(compute), accesses)
+
+    def test_lru_ordered_dict(self, benchmark, distribution, accesses):
+        """A hand-written LRU cache on an `OrderedDict`"""
+        benchmark(look_up, LRUCache(compute, MAXSIZE), accesses)
+
+    def test_locked_lru_ordered_dict(self, benchmark, distribution, accesses):
+        """The hand-written LRU cache behind a `threading.Lock`"""
+        benchmark(look_up, LockedLRUCache(compute, MAXSIZE), accesses)
+
+    def test_fifo_dict(self, benchmark, distribution, accesses):
+        """A hand-written FIFO cache on a dict"""
+        benchmark(look_up, FIFOCache(compute, MAXSIZE), accesses)
+
+
+def look_up_zipf(cached):
+    look_up(cached, ACCESS_KEYS["zipf"])
+
+
+# The hand-written LRU cache without a lock is left out: `move_to_end` races with eviction.
+# Caches cannot be shared with other processes.
+@scaling(executors=("thread",))
+@pedantic(rounds=10)
+class TestCacheContention:
+    """
+    Look up 10,000 Zipf-distributed keys in a cache shared by all workers.
+
+    The hand-written caches need a lock to be used from several threads,
+    `functools.lru_cache` is thread-safe as is.
+    """
+
+    def test_lru_cache(self, benchmark, pool, workers):
+        """`functools.lru_cache` with a `maxsize`"""
+        benchmark(fan_out, pool, workers, look_up_zipf, functools.lru_cache(maxsize=MAXSIZE)(compute))
+
+    def test_cache(self, benchmark, pool, workers):
+        """`functools.cache`"""
+        benchmark(fan_out, pool, workers, look_up_zipf, functools.cache(compute))
+
+    def test_dict_memo(self, benchmark, pool, workers):
+        """A dict memo in a closure, whose races only compute a value twice"""
+        benchmark(fan_out, pool, workers, look_up_zipf, dict_memo(compute))
+
+    def test_locked_dict_memo(self, benchmark, pool, workers):
+        """A dict memo behind a `threading.Lock`"""
+        benchmark(fan_out, pool, workers, look_up_zipf, locked_dict_memo(compute))
+
+    def test_locked_lru_ordered_dict(self, benchmark, pool, workers):
+        """The hand-written LRU cache behind a `threading.Lock`"""
+        benchmark(fan_out, pool, workers, look_up_zipf, LockedLRUCache(compute, MAXSIZE))
+
+
+class Polygon:
+    POINTS = [(math.cos(i / 8 * math.pi), math.sin(i / 8 * math.pi)) for i in range(16)]
+
+    @property
+    def perimeter(self) -> float:
+        points = self.POINTS
+        return sum(math.dist(a, b) for a, b in zip(points, points[1:] + points[:1]))
+
+
+class CachedPolygon(Polygon):
+    @functools.cached_property
+    def perimeter(self) -> float:
+        return Polygon.perimeter.fget(self)
+
+
+class ManuallyCachedPolygon(Polygon):
+    def __init__(self):
+        self._perimeter = None
+
+    @property
+    def perimeter(self) -> float:
+        if self._perimeter is None:
+            self._perimeter = Polygon.perimeter.fget(self)
+        return self._perimeter
+
+
+INSTANCES = 1000
+
+
+def read_perimeters(polygons):
+    for polygon in polygons:
+        polygon.perimeter
+
+
+def polygons(cls) -> list:
+    return [cls() for _ in range(INSTANCES)]
+
+
+class TestCachedPropertyHit:
+    """
+    Read an attribute that is already cached, on 1000 instances.
+
+    The plain property computes the value every time.
+    """
+
+    def test_property(self, benchmark):
+        """A plain `property`"""
+        benchmark(read_perimeters, polygons(Polygon))
+
+    def test_cached_property(self, benchmark):
+        """`functools.cached_property`"""
+        instances = polygons(CachedPolygon)
+        read_perimeters(instances)
+        benchmark(read_perimeters, instances)
+
+    def test_manual(self, benchmark):
+        """A property caching its value in an attribute"""
+        instances = polygons(ManuallyCachedPolygon)
+        read_perimeters(instances)
+        benchmark(read_perimeters, instances)
+
+
+@track_memory()
+@fresh_inputs(polygons)
+class TestCachedPropertyMiss:
+    """
+    Read an attribute for the first time, on 1000 new instances.
+
+    The net allocation is what caching adds to the instances.
+    """
+
+    def test_property(self, benchmark):
+        """A plain `property`"""
+        benchmark(read_perimeters, Polygon)
+
+    def test_cached_property(self, benchmark):
+        """`functools.cached_property`"""
+        benchmark(read_perimeters, CachedPolygon)
+
+    def test_manual(self, benchmark):
+        """A property caching its value in an attribute"""
+        benchmark(read_perimeters, ManuallyCachedPolygon)
@@ -1,3 +1,7 @@
+from tests.utils import pedantic
+
+
+@pedantic(calibrate=True)
 class TestCall:
     """Call global or local functions"""
 
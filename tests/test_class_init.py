@@ -4,7 +4,11 @@ import typing
 
 import attrs
 
+from tests.utils import instrumented, track_memory
 
+
+@instrumented()
+@track_memory()
 class TestBasicClassInit:
     """Compare initialization of different class types.
     The idea is to compare attrs, dataclasses, and plain classes"""
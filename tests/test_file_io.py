@@ -0,0 +1,83 @@
+"""
+Ways to read a whole file into memory, at several file sizes.
+
+The files are local temporary files, so after the first round they are read
+from the page cache: these measure the copies and system calls, not the disk.
+"""
+
+import mmap
+import os
+
+import pytest
+
+from tests.utils import sweep
+
+
+@pytest.fixture(scope="module")
+def files(tmp_path_factory):
+    directory = tmp_path_factory.mktemp("files")
+    paths = {}
+
+    def get(size: int):
+        if size not in paths:
+            path = paths[size] = directory / f"{size}.bin"
+            path.write_bytes(os.urandom(size))
+        return paths[size]
+
+    return get
+
+
+@sweep("size", start=4096, stop=16 * 1024 * 1024, factor=16)
+class TestFileRead:
+    """
+    Read a whole file.
+
+    Sizes go from a single page to 16 MiB.
+    """
+
+    def test_read(self, benchmark, files, size):
+        """Buffered `read()`"""
+
+        def run(path):
+            with open(path, "rb") as f:
+                return f.read()
+
+        benchmark(run, files(size))
+
+    def test_read_unbuffered(self, benchmark, files, size):
+        """Unbuffered `read()`"""
+
+        def run(path):
+            with open(path, "rb", buffering=0) as f:
+                return f.read()
+
+        benchmark(run, files(size))
+
+    def test_readinto(self, benchmark, files, size):
+        """`readinto` a preallocated `bytearray`"""
+        buffer = bytearray(size)
+
+        def run(path):
+            with open(path, "rb", buffering=0) as f:
+                f.readinto(buffer)
+            return buffer
+
+        benchmark(run, files(size))
+
+    def test_mmap_copy(self, benchmark, files, size):
+        """`mmap`, copying the contents out"""
+
+        def run(path):
+            with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m:
+                return m[:]
+
+        benchmark(run, files(size))
+
+    def test_mmap_touch(self, benchmark, files, size):
+        """`mmap`, reading one byte of every page"""
+
+        def run(path):
+            with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m:
+                return m[:: mmap.PAGESIZE]
+
+        benchmark(run, files(size))
@@ -0,0 +1,76 @@
+import json
+import sys
+
+import pytest
+
+# The reporter's attrs classes use `X | None` annotations, which cattrs evaluates,
+# so skip before importing it.
+if sys.version_info < (3, 10):
+    pytest.skip("The reporter needs Python 3.10+", allow_module_level=True)
+
+import cattrs
+
+from python_benchmark.bench_reporter import BenchmarkSave
+from python_benchmark.loader import cache_path
+from python_benchmark.synthetic import synthetic_save
+from tests.utils import verify
+
+BENCHMARKS = 100
+ROUNDS = 1000
+
+
+@pytest.fixture(scope="class")
+def save_file(tmp_path_factory):
+    path = tmp_path_factory.mktemp("saves") / "0001_synthetic.json"
+    path.write_text(json.dumps(synthetic_save(BENCHMARKS, ROUNDS), indent=4), "utf8")
+    yield path
+
+
+@verify
+class TestSaveLoading:
+    """
+    Load a large pytest-benchmark save, the way the reporter does.
+
+    The save has 100 benchmarks with 1000 rounds of per-round data each.
+    Every variant reads the `min` of every benchmark.
+    """
+
+    def test_json_cattrs(self, benchmark, save_file):
+        """`json.loads` and `cattrs.structure` of the whole save"""
+
+        def run():
+            save = cattrs.structure(
+                json.loads(save_file.read_text("utf8")), BenchmarkSave
+            )
+            return [b.stats.min for b in save.benchmarks]
+
+        benchmark(run)
+
+    def test_streaming_with_data(self, benchmark, save_file):
+        """Streaming loader, keeping per-round data"""
+
+        def run():
+            save = BenchmarkSave.from_file(save_file, with_data=True)
+            return [b.stats.min for b in save.benchmarks]
+
+        benchmark(run)
+
+    def test_streaming(self, benchmark, save_file):
+        """Streaming loader, skipping per-round data"""
+
+        def run():
+            save = BenchmarkSave.from_file(save_file, with_data=False)
+            return [b.stats.min for b in save.benchmarks]
+
+        benchmark(run)
+
+    def test_cached(self, benchmark, save_file):
+        """Streaming loader with a warm cache, skipping per-round data"""
+        cache_path(save_file).unlink(missing_ok=True)
+        BenchmarkSave.from_file(save_file, with_data=False, cache=True)
+
+        def run():
+            save = BenchmarkSave.from_file(save_file, with_data=False, cache=True)
+            return [b.stats.min for b in save.benchmarks]
+
+        benchmark(run)
@@ -1,6 +1,9 @@
 import random
 
+from tests.utils import instrumented
 
+
+@instrumented()
 class TestLookup:
     """
     Compare using a list or a dict to index-based lookups.
@@ -0,0 +1,194 @@
+"""
+The reporter itself, on synthetic saves of growing size.
+
+Every group is swept over the amount of data: the number of benchmarks in
+a save, or the number of saves in a directory. The benchmarks come in groups
+of 10, like the ones in this repository, and their saves are made by
+`python_benchmark.synthetic`. Peak memory is tracked too, since the reporter
+keeps whole saves in memory. It is measured in a single round, as the largest
+saves take seconds to process.
+"""
+
+import sys
+
+import pytest
+
+# The reporter's attrs classes use `X | None` annotations, which cattrs evaluates,
+# so skip before importing it.
+if sys.version_info < (3, 10):
+    pytest.skip("The reporter needs Python 3.10+", allow_module_level=True)
+
+from python_benchmark import sources
+from python_benchmark.bench_reporter import (
+    BenchmarkSave,
+    RankBy,
+    directory_html,
+    display_groups,
+    group_benchmarks,
+    group_chunk,
+    render_groups_html,
+    render_matrix_html,
+    summarize_groups,
+)
+from python_benchmark.loader import cache_path
+from python_benchmark.synthetic import write_saves
+from tests.utils import pedantic, sweep, track_memory
+
+GROUP_SIZE = 10
+# Benchmarks in every save of `TestReportDirectory`.
+DIRECTORY_BENCHMARKS = 100
+
+
+@pytest.fixture(scope="class")
+def benchmarks(request, tmp_path_factory):
+    """A save of `request.param` benchmarks, with the test module they refer to."""
+    count = request.param
+    directory = tmp_path_factory.mktemp(f"benchmarks_{count}")
+    [path] = write_saves(directory, saves=1, benchmarks=count, groups=count // GROUP_SIZE)
+    return path
+
+
+@pytest.fixture(scope="class")
+def saves(request, tmp_path_factory):
+    """A directory with the saves of `request.param` machines."""
+    count = request.param
+    directory = tmp_path_factory.mktemp(f"saves_{count}")
+    write_saves(
+        directory,
+        saves=count,
+        benchmarks=DIRECTORY_BENCHMARKS,
+        groups=DIRECTORY_BENCHMARKS // GROUP_SIZE,
+    )
+    return directory
+
+
+def load(path, cache=False):
+    save = BenchmarkSave.from_file(path, with_data=False, cache=cache)
+    # Structure every benchmark, as grouping them does.
+    save.benchmarks = list(save.benchmarks)
+    return save
+
+
+@pytest.fixture(scope="class")
+def grouped(benchmarks):
+    """The save of `benchmarks`, loaded and grouped."""
+    save = load(benchmarks)
+    return save, group_benchmarks(save.benchmarks)
+
+
+@track_memory(rounds=1)
+@sweep("benchmarks", start=100, stop=10**4, indirect=True)
+class TestReportLoad:
+    """
+    Load a save, without its per-round data.
+    """
+
+    def test_streaming(self, benchmark, benchmarks):
+        """Streaming loader"""
+        benchmark(load, benchmarks)
+
+    def test_cached(self, benchmark, benchmarks):
+        """Streaming loader with a warm cache"""
+        cache_path(benchmarks).unlink(missing_ok=True)
+        load(benchmarks, cache=True)
+        benchmark(load, benchmarks, cache=True)
+
+
+@track_memory(rounds=1)
+@sweep("benchmarks", start=100, stop=10**4, indirect=True)
+class TestReportGrouping:
+    """
+    Group a save's benchmarks by test class, finding each test's source.
+
+    The test module is parsed once, and only read again when its size or
+    modification time change.
+    """
+
+    def test_parsed(self, benchmark, benchmarks):
+        """Test module already parsed"""
+        save = load(benchmarks)
+        group_benchmarks(save.benchmarks)
+        benchmark(group_benchmarks, save.benchmarks)
+
+    def test_unparsed(self, benchmark, benchmarks):
+        """Reading and parsing the test module first"""
+        save = load(benchmarks)
+        module = save.benchmarks[0].fullname.partition("::")[0]
+
+        def run():
+            sources._modules.pop(module, None)
+            return group_benchmarks(save.benchmarks)
+
+        benchmark(run)
+
+
+@track_memory(rounds=1)
+@sweep("benchmarks", start=100, stop=10**4, indirect=True)
+class TestReportRendering:
+    """
+    Render a save's grouped benchmarks.
+
+    The report is a page of tables, the data chunks hold the same tables as
+    JSON for the index page to load one group at a time, and the summary is what
+    the manifest keeps of every group for the matrix.
+    """
+
+    def test_report_html(self, benchmark, benchmarks, grouped):
+        """HTML report"""
+        save, groups = grouped
+        benchmark(render_groups_html, groups, save.machine_info)
+
+    def test_data_chunks(self, benchmark, benchmarks, grouped):
+        """Data chunks for the index page"""
+        save, groups = grouped
+        machine = save.machine_info.key
+
+        def run():
+            return [group_chunk(machine, group) for group in display_groups(groups)]
+
+        benchmark(run)
+
+    def test_summary(self, benchmark, benchmarks, grouped):
+        """Group summaries"""
+        _, groups = grouped
+        benchmark(summarize_groups, groups, RankBy.MIN)
+
+    def test_matrix_html(self, benchmark, benchmarks, grouped):
+        """HTML matrix of a single machine"""
+        save, groups = grouped
+        summaries = summarize_groups(groups, RankBy.MIN)
+        benchmark(render_matrix_html, [(save.machine_info, summaries)], RankBy.MIN)
+
+
+@track_memory(rounds=1)
+@pedantic(rounds=3)
+@sweep("saves", start=1, stop=100, indirect=True)
+class TestReportDirectory:
+    """
+    Build the reports, matrix and index of a directory of saves, one per machine.
+
+    Every save has 100 benchmarks. Rebuilding with nothing changed only
+    checks the manifest and writes the matrix and index again.
+    """
+
+    def _build(self, saves, out_dir, force):
+        directory_html(
+            saves,
+            out_dir,
+            repo_base_url=None,
+            jobs=1,
+            force=force,
+            history=None,
+            rank_by=RankBy.MIN,
+            cache=False,
+            manifest_path=None,
+        )
+
+    def test_full(self, benchmark, saves, tmp_path):
+        """Every report, in a single process"""
+        benchmark(self._build, saves, tmp_path, force=True)
+
+    def test_unchanged(self, benchmark, saves, tmp_path):
+        """Nothing changed, matrix and index only"""
+        self._build(saves, tmp_path, force=True)
+        benchmark(self._build, saves, tmp_path, force=False)
@@ -0,0 +1,227 @@
+"""
+Serialization formats for the data we store: per-round timings and benchmark records.
+"""
+
+import json
+import marshal
+import pickle
+import random
+import struct
+import sys
+from array import array
+from typing import Dict, List
+
+import cattrs
+import pytest
+
+from python_benchmark.synthetic import synthetic_save
+from tests.utils import verify
+
+ROUNDS = 100_000
+RECORDS = 1000
+
+# The reporter's attrs classes use `X | None` annotations, which cattrs evaluates.
+# Its imports are in the tests, so the other groups still run on older Pythons.
+requires_reporter = pytest.mark.skipif(
+    sys.version_info < (3, 10), reason="The reporter needs Python 3.10+"
+)
+
+TIMINGS = [random.Random(0).uniform(1e-6, 2e-6) for _ in range(ROUNDS)]
+
+
+@pytest.fixture
+def out_file(tmp_path):
+    return tmp_path / "timings"
+
+
+class TestWriteTimings:
+    """
+    Write 100,000 per-round timings (floats) to a file.
+    """
+
+    def test_json(self, benchmark, out_file):
+        """`json.dump`"""
+
+        def run(timings):
+            with out_file.open("w") as f:
+                json.dump(timings, f)
+
+        benchmark(run, TIMINGS)
+
+    def test_pickle(self, benchmark, out_file):
+        """`pickle.dump`"""
+
+        def run(timings):
+            with out_file.open("wb") as f:
+                pickle.dump(timings, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+        benchmark(run, TIMINGS)
+
+    def test_marshal(self, benchmark, out_file):
+        """`marshal.dump`"""
+
+        def run(timings):
+            with out_file.open("wb") as f:
+                marshal.dump(timings, f)
+
+        benchmark(run, TIMINGS)
+
+    def test_struct(self, benchmark, out_file):
+        """`struct.pack`"""
+
+        def run(timings):
+            with out_file.open("wb") as f:
+                f.write(struct.pack(f"{len(timings)}d", *timings))
+
+        benchmark(run, TIMINGS)
+
+    def test_array_tofile(self, benchmark, out_file):
+        """`array.tofile`, converting from a list"""
+
+        def run(timings):
+            with out_file.open("wb") as f:
+                array("d", timings).tofile(f)
+
+        benchmark(run, TIMINGS)
+
+
+@pytest.fixture(scope="class")
+def timing_files(tmp_path_factory):
+    directory = tmp_path_factory.mktemp("timings")
+    files = {
+        "json": json.dumps(TIMINGS).encode(),
+        "pickle": pickle.dumps(TIMINGS, protocol=pickle.HIGHEST_PROTOCOL),
+        "marshal": marshal.dumps(TIMINGS),
+        "raw": array("d", TIMINGS).tobytes(),
+    }
+    for name, content in files.items():
+        (directory / name).write_bytes(content)
+    return directory
+
+
+class TestReadTimings:
+    """
+    Read 100,000 per-round timings (floats) back from a file.
+
+    `struct` and `array` read raw doubles, the others their own formats.
+    """
+
+    def test_json(self, benchmark, timing_files):
+        """`json.load`"""
+
+        def run(path):
+            with path.open() as f:
+                return json.load(f)
+
+        benchmark(run, timing_files / "json")
+
+    def test_pickle(self, benchmark, timing_files):
+        """`pickle.load`"""
+
+        def run(path):
+            with path.open("rb") as f:
+                return pickle.load(f)
+
+        benchmark(run, timing_files / "pickle")
+
+    def test_marshal(self, benchmark, timing_files):
+        """`marshal.load`"""
+
+        def run(path):
+            with path.open("rb") as f:
+                return marshal.load(f)
+
+        benchmark(run, timing_files / "marshal")
+
+    def test_struct(self, benchmark, timing_files):
+        """`struct.unpack` into a tuple"""
+
+        def run(path):
+            content = path.read_bytes()
+            return struct.unpack(f"{len(content) // 8}d", content)
+
+        benchmark(run, timing_files / "raw")
+
+    def test_array_fromfile(self, benchmark, timing_files):
+        """`array.fromfile`"""
+
+        def run(path):
+            timings = array("d")
+            with path.open("rb") as f:
+                timings.fromfile(f, path.stat().st_size // timings.itemsize)
+            return timings
+
+        benchmark(run, timing_files / "raw")
+
+
+def records() -> List[Dict]:
+    """Benchmark records as they appear in a save, without their per-round data."""
+    benchmarks = synthetic_save(RECORDS, rounds=0)["benchmarks"]
+    for benchmark in benchmarks:
+        del benchmark["stats"]["data"]
+    return benchmarks
+
+
+RECORDS_DATA = records()
+
+
+@verify
+class TestLoadRecords:
+    """
+    Load 1000 benchmark records (dicts of strings and numbers) from bytes.
+    """
+
+    def test_json(self, benchmark):
+        """`json.loads`"""
+        benchmark(json.loads, json.dumps(RECORDS_DATA))
+
+    def test_pickle(self, benchmark):
+        """`pickle.loads`"""
+        benchmark(pickle.loads, pickle.dumps(RECORDS_DATA, protocol=pickle.HIGHEST_PROTOCOL))
+
+    def test_marshal(self, benchmark):
+        """`marshal.loads`"""
+        benchmark(marshal.loads, marshal.dumps(RECORDS_DATA))
+
+
+@requires_reporter
+@verify
+class TestStructureRecords:
+    """
+    Turn 1000 benchmark records into the reporter's attrs classes.
+    """
+
+    def test_cattrs(self, benchmark):
+        """`cattrs.structure` of the whole list"""
+        from python_benchmark.bench_reporter import Benchmark
+
+        benchmark(cattrs.structure, RECORDS_DATA, List[Benchmark])
+
+    def test_cattrs_converter(self, benchmark):
+        """A `cattrs.Converter` without detailed validation"""
+        from python_benchmark.bench_reporter import Benchmark
+
+        converter = cattrs.Converter(detailed_validation=False)
+
+        def run(records):
+            return converter.structure(records, List[Benchmark])
+
+        benchmark(run, RECORDS_DATA)
+
+    def test_by_hand(self, benchmark):
+        """Hand-written structuring, passing each dict to the constructors"""
+        from python_benchmark.bench_reporter import Benchmark, Stats
+
+        def structure(record):
+            return Benchmark(
+                name=record["name"],
+                fullname=record["fullname"],
+                params=record["params"],
+                stats=Stats(**record["stats"]),
+                extra_info=record["extra_info"],
+            )
+
+        def run(records):
+            return [structure(record) for record in records]
+
+        benchmark(run, RECORDS_DATA)
@@ -2,9 +2,10 @@
 Various tests relating to set access.
 """
 
+from tests.utils import sweep
 
 
-
+@sweep("set_of_range", stop=10**6, indirect=True)
 class TestSetAccess:
     """
     Get any item from set
@@ -1,7 +1,8 @@
-from tests.utils import pedantic, verify
+from tests.utils import fresh_inputs, pedantic, verify
 
 
-@pedantic(iterations=50, rounds=20000)
+@pedantic(rounds=20000)
+@fresh_inputs()
 class TestSetUpdateWithGen:
     """
     Update sets in different ways when generating the additional set
@@ -16,7 +17,7 @@ class TestSetUpdateWithGen:
             base.update(x for x in range(100_000, 3))
             return base
 
-        benchmark(run, self.BASE_SET.copy())
+        benchmark(run, self.BASE_SET)
 
     def test_update_listcomp(self, benchmark):
         """Call `set.update` with a list compregension"""
@@ -25,7 +26,7 @@ class TestSetUpdateWithGen:
             base.update([x for x in range(100_000, 3)])
             return base
 
-        benchmark(run, self.BASE_SET.copy())
+        benchmark(run, self.BASE_SET)
 
     def test_update_setcomp(self, benchmark):
         """Call `set.update` with a set compregension"""
@@ -34,7 +35,7 @@ class TestSetUpdateWithGen:
             base.update({x for x in range(100_000, 3)})
             return base
 
-        benchmark(run, self.BASE_SET.copy())
+        benchmark(run, self.BASE_SET)
 
     def test_set_or_assign(self, benchmark):
         """Use `|=` with a set compregension"""
@@ -43,10 +44,11 @@ class TestSetUpdateWithGen:
             base |= {x for x in range(100_000, 3)}
             return base
 
-        benchmark(run, self.BASE_SET.copy())
+        benchmark(run, self.BASE_SET)
 
 
-@pedantic(iterations=50, rounds=20000)
+@pedantic(rounds=20000)
+@fresh_inputs()
 class TestSetUpdate:
     """
     Compare `set.update` and `set |=`
@@ -58,9 +60,9 @@ class TestSetUpdate:
     def test_update(self, benchmark):
         """Call `set.update` with a generator compregension"""
 
-        benchmark(self.BASE_SET.copy().update, self.UPDATE_SET.copy())
+        benchmark(set.update, self.BASE_SET, self.UPDATE_SET)
 
     def test_set_or_assign(self, benchmark):
         """Use `|=` with a set compregension"""
 
-        benchmark(self.BASE_SET.copy().__ior__, self.UPDATE_SET.copy())
+        benchmark(set.__ior__, self.BASE_SET, self.UPDATE_SET)
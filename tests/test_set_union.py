@@ -1,7 +1,8 @@
 import itertools
-from tests.utils import verify
+from tests.utils import track_memory, verify
 
 
+@track_memory()
 class TestSetUnion:
     """
     Test the performance of different ways to unify multiple sets.
@@ -0,0 +1,56 @@
+import heapq
+import random
+
+import pytest
+
+from tests.utils import sweep, verify
+
+K = 10
+
+
+@pytest.fixture
+def shuffled(n):
+    data = list(range(n))
+    random.Random(0).shuffle(data)
+    return data
+
+
+@verify
+@sweep("n", start=10, stop=10**6)
+class TestSmallest:
+    """
+    Get the 10 smallest items of a list.
+
+    Sorting does more work overall, but all of it in C.
+    `heapq.nsmallest` only keeps 10 items, but compares each new item from Python-level code.
+    """
+
+    def test_sorted_slice(self, benchmark, n, shuffled):
+        """`sorted(data)[:10]`"""
+
+        def run(data):
+            return sorted(data)[:K]
+
+        benchmark(run, shuffled)
+
+    def test_heapq_nsmallest(self, benchmark, n, shuffled):
+        """`heapq.nsmallest(10, data)`"""
+
+        def run(data):
+            return heapq.nsmallest(K, data)
+
+        benchmark(run, shuffled)
+
+    def test_min_repeated(self, benchmark, n, shuffled):
+        """`min` ten times, removing each minimum from a copy"""
+
+        def run(data):
+            data = list(data)
+            result = []
+            for _ in range(min(K, len(data))):
+                smallest = min(data)
+                data.remove(smallest)
+                result.append(smallest)
+            return result
+
+        benchmark(run, shuffled)
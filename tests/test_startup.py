@@ -0,0 +1,390 @@
+"""
+Interpreter startup and import times, measured by starting a new interpreter every round.
+
+The times include starting the interpreter, compare them with `python -c pass`
+in `TestInterpreterStartup`. Import groups also save what `python -X importtime`
+reports for the imported module, which the reporter shows next to the times.
+
+Every group runs with a warm filesystem cache, and a cold one: before every round
+the files the interpreter will read are evicted from the page cache, with
+`posix_fadvise`. Files the test process itself maps, like the interpreter's
+executable, stay cached.
+"""
+
+import compileall
+import os
+import py_compile
+import subprocess
+import sys
+import textwrap
+from typing import Callable, Optional, Tuple
+
+import attrs
+import pytest
+
+from tests.utils import fresh_inputs, pedantic
+
+ROUNDS = 20
+
+CACHES = [
+    "warm",
+    pytest.param(
+        "cold",
+        marks=pytest.mark.skipif(
+            not hasattr(os, "posix_fadvise"), reason="posix_fadvise is not available"
+        ),
+    ),
+]
+
+requires_frozen_modules = pytest.mark.skipif(
+    sys.implementation.name != "cpython" or sys.version_info < (3, 11),
+    reason="-X frozen_modules is CPython 3.11+",
+)
+
+# Printed by the interpreter after running a command, to list the files it read.
+LIST_FILES = """
+import sys
+for module in list(sys.modules.values()):
+    for name in ("__file__", "__cached__"):
+        print(getattr(module, name, None) or "")
+"""
+
+
+@attrs.frozen
+class Command:
+    argv: Tuple[str, ...]
+    env: Optional[dict] = None
+    # Files to evict from the page cache before each round, for a cold cache.
+    evict: Tuple[str, ...] = ()
+
+
+def run(command: Command) -> subprocess.CompletedProcess:
+    return subprocess.run(
+        command.argv, env=command.env, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE
+    )
+
+
+def evict(command: Command) -> Command:
+    """Drop the command's files from the page cache. Their pages are clean, so this is allowed."""
+    for path in command.evict:
+        try:
+            fd = os.open(path, os.O_RDONLY)
+        except OSError:
+            continue
+        try:
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+        finally:
+            os.close(fd)
+    return command
+
+
+def read_files(argv: Tuple[str, ...], env: Optional[dict]) -> Tuple[str, ...]:
+    """The source and bytecode files of every module a `-c` command imports."""
+    *flags, code = argv
+    result = subprocess.run(
+        (*flags, f"{code}\n{LIST_FILES}"), env=env, check=True, capture_output=True, text=True
+    )
+    paths = {line for line in result.stdout.splitlines() if line}
+    paths.add(os.path.realpath(sys.executable))
+    return tuple(sorted(path for path in paths if os.path.isfile(path)))
+
+
+@pytest.fixture
+def startup(request) -> Callable[..., Command]:
+    """Make commands running `python -c code` with the cache state the test is parametrized with."""
+    cold = request.param == "cold"
+
+    def command(code: str, *flags: str, path=None) -> Command:
+        env = None
+        if path is not None:
+            env = {**os.environ, "PYTHONPATH": os.fspath(path)}
+        argv = (sys.executable, *flags, "-c", code)
+        if cold:
+            return Command(argv, env, evict=read_files(argv, env))
+        command = Command(argv, env)
+        # Read everything once, so the first round finds it cached too.
+        run(command)
+        return command
+
+    return command
+
+
+def parse_import_time(stderr: str, module: str) -> Optional[dict]:
+    """Self and cumulative times of `module` in `-X importtime` output, in seconds."""
+    for line in reversed(stderr.splitlines()):
+        if not line.startswith("import time:"):
+            continue
+        self_time, cumulative, name = (field.strip() for field in line[12:].split("|"))
+        if name == module:
+            return {
+                "module": module,
+                "self_time": int(self_time) / 1e6,
+                "cumulative": int(cumulative) / 1e6,
+            }
+    return None
+
+
+def benchmark_import(benchmark, startup, module: str, path=None):
+    """Time `import module` in a new interpreter, and save its `-X importtime` breakdown."""
+    timed = startup(f"import {module}", path=path)
+    profiled = startup(f"import {module}", "-X", "importtime", path=path)
+    import_time = parse_import_time(run(evict(profiled)).stderr.decode(), module)
+    if import_time is not None:
+        benchmark.extra_info["import_time"] = import_time
+    benchmark(run, timed)
+
+
+@pytest.mark.parametrize("startup", CACHES, indirect=True)
+@pedantic(rounds=ROUNDS)
+@fresh_inputs(evict)
+class TestInterpreterStartup:
+    """
+    Start an interpreter that does nothing.
+    """
+
+    def test_default(self, benchmark, startup):
+        """`python -c pass`"""
+        benchmark(run, startup("pass"))
+
+    def test_no_site(self, benchmark, startup):
+        """`python -S -c pass`, without importing `site`"""
+        benchmark(run, startup("pass", "-S"))
+
+    def test_isolated(self, benchmark, startup):
+        """`python -I -c pass`, ignoring the environment and user site-packages"""
+        benchmark(run, startup("pass", "-I"))
+
+    @requires_frozen_modules
+    def test_unfrozen(self, benchmark, startup):
+        """`python -X frozen_modules=off -c pass`, loading startup modules from files"""
+        benchmark(run, startup("pass", "-X", "frozen_modules=off"))
+
+
+@pytest.mark.parametrize("startup", CACHES, indirect=True)
+@pedantic(rounds=ROUNDS)
+@fresh_inputs(evict)
+class TestStdlibImport:
+    """
+    Import a standard library module in a new interpreter.
+    """
+
+    def test_json(self, benchmark, startup):
+        """`import json`"""
+        benchmark_import(benchmark, startup, "json")
+
+    def test_re(self, benchmark, startup):
+        """`import re`"""
+        benchmark_import(benchmark, startup, "re")
+
+    def test_typing(self, benchmark, startup):
+        """`import typing`"""
+        benchmark_import(benchmark, startup, "typing")
+
+    def test_dataclasses(self, benchmark, startup):
+        """`import dataclasses`"""
+        benchmark_import(benchmark, startup, "dataclasses")
+
+    def test_decimal(self, benchmark, startup):
+        """`import decimal`"""
+        benchmark_import(benchmark, startup, "decimal")
+
+    def test_asyncio(self, benchmark, startup):
+        """`import asyncio`"""
+        benchmark_import(benchmark, startup, "asyncio")
+
+
+@pytest.mark.parametrize("startup", CACHES, indirect=True)
+@pedantic(rounds=ROUNDS)
+@fresh_inputs(evict)
+class TestDependencyImport:
+    """
+    Import one of this project's dependencies in a new interpreter.
+
+    The last variant imports the reporter with all of them, as its CLI does.
+    """
+
+    def test_attrs(self, benchmark, startup):
+        """`import attrs`"""
+        benchmark_import(benchmark, startup, "attrs")
+
+    def test_cattrs(self, benchmark, startup):
+        """`import cattrs`"""
+        benchmark_import(benchmark, startup, "cattrs")
+
+    def test_rich_console(self, benchmark, startup):
+        """`import rich.console`"""
+        benchmark_import(benchmark, startup, "rich.console")
+
+    def test_typer(self, benchmark, startup):
+        """`import typer`"""
+        benchmark_import(benchmark, startup, "typer")
+
+    def test_jinja2(self, benchmark, startup):
+        """`import jinja2`"""
+        benchmark_import(benchmark, startup, "jinja2")
+
+    def test_markdown_it(self, benchmark, startup):
+        """`import markdown_it`"""
+        benchmark_import(benchmark, startup, "markdown_it")
+
+    def test_bench_reporter(self, benchmark, startup):
+        """`import python_benchmark.bench_reporter`"""
+        benchmark_import(benchmark, startup, "python_benchmark.bench_reporter")
+
+
+# Modules that need a few standard library modules, but only in one function.
+LAZY_MODULES = {
+    "eager": """
+        import asyncio
+        import decimal
+        import email.message
+        import json
+
+        def dump(value):
+            return json.dumps(value)
+    """,
+    "deferred": """
+        def dump(value):
+            import json
+
+            return json.dumps(value)
+    """,
+    "module_getattr": """
+        import importlib
+
+        _LAZY = {"asyncio", "decimal", "email", "json"}
+
+        def __getattr__(name):
+            if name in _LAZY:
+                module = importlib.import_module(name)
+                globals()[name] = module
+                return module
+            raise AttributeError(name)
+
+        def dump(value):
+            # Names used within the module do not go through `__getattr__`.
+            return __getattr__("json").dumps(value)
+    """,
+    "lazy_loader": """
+        import importlib.util
+        import sys
+
+        def _lazy(name):
+            spec = importlib.util.find_spec(name)
+            loader = importlib.util.LazyLoader(spec.loader)
+            spec.loader = loader
+            module = importlib.util.module_from_spec(spec)
+            sys.modules[name] = module
+            loader.exec_module(module)
+            return module
+
+        asyncio = _lazy("asyncio")
+        decimal = _lazy("decimal")
+        email = _lazy("email")
+        json = _lazy("json")
+
+        def dump(value):
+            return json.dumps(value)
+    """,
+}
+
+
+@pytest.fixture(scope="class")
+def lazy_modules(tmp_path_factory):
+    directory = tmp_path_factory.mktemp("lazy")
+    for name, source in LAZY_MODULES.items():
+        (directory / f"{name}.py").write_text(textwrap.dedent(source))
+    compileall.compile_dir(directory, quiet=1)
+    return directory
+
+
+@pytest.mark.parametrize("startup", CACHES, indirect=True)
+@pedantic(rounds=ROUNDS)
+@fresh_inputs(evict)
+class TestLazyImport:
+    """
+    Import a module that needs `asyncio`, `decimal`, `email` and `json`, without using it.
+
+    Lazy imports only pay for the modules once they are used.
+    """
+
+    def test_eager(self, benchmark, startup, lazy_modules):
+        """Imports at the top of the module"""
+        benchmark_import(benchmark, startup, "eager", path=lazy_modules)
+
+    def test_deferred(self, benchmark, startup, lazy_modules):
+        """Imports inside the function that needs them"""
+        benchmark_import(benchmark, startup, "deferred", path=lazy_modules)
+
+    def test_module_getattr(self, benchmark, startup, lazy_modules):
+        """A module `__getattr__` importing on first access (PEP 562)"""
+        benchmark_import(benchmark, startup, "module_getattr", path=lazy_modules)
+
+    def test_lazy_loader(self, benchmark, startup, lazy_modules):
+        """`importlib.util.LazyLoader`"""
+        benchmark_import(benchmark, startup, "lazy_loader", path=lazy_modules)
+
+
+FUNCTIONS = 500
+GENERATED = "\n".join(
+    f"""
+def function_{i}(x):
+    if x > {i}:
+        return [x * {i} for x in range(10)]
+    return {{"value": x, "index": {i}}}
+"""
+    for i in range(FUNCTIONS)
+)
+
+BYTECODE_CACHES = {
+    # Never compiled, and `-B` keeps the interpreter from writing a `.pyc`.
+    "source": None,
+    "timestamp": py_compile.PycInvalidationMode.TIMESTAMP,
+    "checked_hash": py_compile.PycInvalidationMode.CHECKED_HASH,
+    "unchecked_hash": py_compile.PycInvalidationMode.UNCHECKED_HASH,
+}
+
+
+@pytest.fixture(scope="class")
+def generated_modules(tmp_path_factory):
+    """A directory per kind of bytecode cache, each holding the same 500-function module."""
+    directories = {}
+    for name, invalidation_mode in BYTECODE_CACHES.items():
+        directory = tmp_path_factory.mktemp(name)
+        (directory / "generated.py").write_text(GENERATED)
+        if invalidation_mode is not None:
+            compileall.compile_dir(directory, quiet=1, invalidation_mode=invalidation_mode)
+        directories[name] = directory
+    return directories
+
+
+@pytest.mark.parametrize("startup", CACHES, indirect=True)
+@pedantic(rounds=ROUNDS)
+@fresh_inputs(evict)
+class TestBytecodeCache:
+    """
+    Import a generated module of 500 functions, with and without a `.pyc`.
+
+    Timestamp `.pyc` files are checked against the source's modification time,
+    checked hash-based ones against a hash of the whole source, and unchecked
+    ones are used as they are.
+    """
+
+    def _import(self, benchmark, startup, directory):
+        benchmark(run, startup("import generated", "-B", path=directory))
+
+    def test_source(self, benchmark, startup, generated_modules):
+        """No `.pyc`, compiling the source every time"""
+        self._import(benchmark, startup, generated_modules["source"])
+
+    def test_timestamp(self, benchmark, startup, generated_modules):
+        """Timestamp-based `.pyc`, the default"""
+        self._import(benchmark, startup, generated_modules["timestamp"])
+
+    def test_checked_hash(self, benchmark, startup, generated_modules):
+        """Checked hash-based `.pyc`"""
+        self._import(benchmark, startup, generated_modules["checked_hash"])
+
+    def test_unchecked_hash(self, benchmark, startup, generated_modules):
+        """Unchecked hash-based `.pyc`"""
+        self._import(benchmark, startup, generated_modules["unchecked_hash"])
@@ -0,0 +1,181 @@
+"""
+Scaling of common operations over threads and processes.
+
+Every worker does the same amount of work, so perfect scaling keeps the time flat.
+With the GIL, threads take turns and the time grows with the number of workers.
+Processes work on their own copies of the shared objects, so they show the scaling
+we could get without any sharing at all.
+"""
+
+import collections
+import dataclasses
+import queue
+import typing
+
+import attrs
+
+from tests.utils import fan_out, pedantic, scaling
+
+OPERATIONS = 20_000
+KEYS = 1024
+
+
+def write_dict(shared: dict):
+    for i in range(OPERATIONS):
+        shared[i % KEYS] = i
+
+
+def write_private_dict(_shared: dict):
+    private = {}
+    for i in range(OPERATIONS):
+        private[i % KEYS] = i
+
+
+def add_discard_set(shared: set):
+    for i in range(OPERATIONS):
+        shared.add(i % KEYS)
+        shared.discard((i + 1) % KEYS)
+
+
+@scaling()
+@pedantic(rounds=10)
+class TestDictSetContention:
+    """
+    Write to a dict or set shared by all workers.
+
+    Writing to a private dict shows the cost of sharing.
+    """
+
+    def test_shared_dict(self, benchmark, pool, workers):
+        """Write to a shared dict"""
+        benchmark(fan_out, pool, workers, write_dict, {})
+
+    def test_private_dict(self, benchmark, pool, workers):
+        """Write to a dict private to each worker"""
+        benchmark(fan_out, pool, workers, write_private_dict, {})
+
+    def test_shared_set(self, benchmark, pool, workers):
+        """Add to and discard from a shared set"""
+        benchmark(fan_out, pool, workers, add_discard_set, set())
+
+
+# The class variants of `TestBasicClassMemberAccess`, at module level so processes can unpickle them.
+class PlainPerson:
+    def __init__(self, name, age):
+        self.name = name
+        self.age = age
+
+
+class SlotsPerson:
+    __slots__ = ["name", "age"]
+
+    def __init__(self, name, age):
+        self.name = name
+        self.age = age
+
+
+@attrs.define
+class AttrsPerson:
+    name: str
+    age: int
+
+
+@attrs.frozen
+class FrozenAttrsPerson:
+    name: str
+    age: int
+
+
+@dataclasses.dataclass
+class DataclassPerson:
+    name: str
+    age: int
+
+
+class TypingNamedTuplePerson(typing.NamedTuple):
+    name: str
+    age: int
+
+
+CollectionsNamedTuplePerson = collections.namedtuple(
+    "CollectionsNamedTuplePerson", "name age"
+)
+
+
+def read_members(person):
+    for _ in range(OPERATIONS):
+        person.name
+        person.age
+
+
+@scaling()
+@pedantic(rounds=10)
+class TestSharedMemberAccess:
+    """
+    Read the members of an object shared by all workers.
+
+    The class variants are those of `TestBasicClassMemberAccess`.
+    """
+
+    def test_plain(self, benchmark, pool, workers):
+        """Access members of a plain class"""
+        benchmark(fan_out, pool, workers, read_members, PlainPerson("Arthur", 42))
+
+    def test_plain_with_slots(self, benchmark, pool, workers):
+        """Access members of a plain class with slots"""
+        benchmark(fan_out, pool, workers, read_members, SlotsPerson("Arthur", 42))
+
+    def test_attrs(self, benchmark, pool, workers):
+        """Access members of an attrs class"""
+        benchmark(fan_out, pool, workers, read_members, AttrsPerson("Arthur", 42))
+
+    def test_attrs_frozen(self, benchmark, pool, workers):
+        """Access members of a frozen attrs class"""
+        benchmark(fan_out, pool, workers, read_members, FrozenAttrsPerson("Arthur", 42))
+
+    def test_dataclass(self, benchmark, pool, workers):
+        """Access members of a dataclass"""
+        benchmark(fan_out, pool, workers, read_members, DataclassPerson("Arthur", 42))
+
+    def test_typing_namedtuple(self, benchmark, pool, workers):
+        """Access members of a typing.NamedTuple class"""
+        benchmark(
+            fan_out, pool, workers, read_members, TypingNamedTuplePerson("Arthur", 42)
+        )
+
+    def test_collections_namedtuple(self, benchmark, pool, workers):
+        """Access members of a collections.namedtuple class"""
+        benchmark(
+            fan_out, pool, workers, read_members, CollectionsNamedTuplePerson("Arthur", 42)
+        )
+
+
+def handoff(shared: queue.Queue):
+    for i in range(OPERATIONS // 10):
+        shared.put(i)
+        shared.get()
+
+
+def handoff_simple(shared: queue.SimpleQueue):
+    for i in range(OPERATIONS // 10):
+        shared.put(i)
+        shared.get()
+
+
+# Queues hold locks, which cannot be sent to other processes.
+@scaling(executors=("thread",))
+@pedantic(rounds=10)
+class TestQueueHandoff:
+    """
+    Pass items through a queue shared by all workers.
+
+    Each worker puts an item and takes one out, so items pass between workers.
+    """
+
+    def test_queue(self, benchmark, pool, workers):
+        """`queue.Queue`"""
+        benchmark(fan_out, pool, workers, handoff, queue.Queue())
+
+    def test_simple_queue(self, benchmark, pool, workers):
+        """`queue.SimpleQueue`"""
+        benchmark(fan_out, pool, workers, handoff_simple, queue.SimpleQueue())
@@ -1,6 +1,8 @@
-from tests.utils import verify
+from tests.utils import track_memory, verify
 
 
+@verify
+@track_memory(rounds=3)
 class TestTupleComprehension:
     """
     Compare various ways to write "tuple comprehensions"
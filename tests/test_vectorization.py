@@ -0,0 +1,284 @@
+"""
+The same batch operations in pure Python, on `array`, and vectorized with NumPy.
+
+NumPy pays a fixed cost per call, and a conversion if the data starts as a list,
+so every group is swept over the input size to show where vectorizing pays off.
+The "ndarray" variants get their data as an array already, the "from a list" ones
+include converting to and from lists.
+
+NumPy is an optional extra, its variants are skipped when it is not installed.
+"""
+
+import functools
+import itertools
+import operator
+import random
+from array import array
+
+import pytest
+
+from tests.utils import sweep, verify
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+requires_numpy = pytest.mark.skipif(numpy is None, reason="numpy is not installed")
+
+GROUPS = 16
+# Keys looked up by `TestBatchedMembership`: every other value in the data's range.
+LOOKUP_KEYS = range(0, 1000, 2)
+
+
+@pytest.fixture
+def values(n):
+    rng = random.Random(0)
+    return [rng.randrange(1000) for _ in range(n)]
+
+
+@pytest.fixture
+def values_array(values):
+    return array("q", values)
+
+
+@pytest.fixture
+def values_ndarray(values):
+    return numpy.array(values, dtype=numpy.int64)
+
+
+@sweep("n", start=10, stop=10**6)
+class TestBatchedFilter:
+    """
+    Keep the even values.
+
+    The batched version of `TestFilter`.
+    """
+
+    def test_list_comprehension(self, benchmark, n, values):
+        """List comprehension"""
+
+        def run(data):
+            return [x for x in data if x % 2 == 0]
+
+        benchmark(run, values)
+
+    def test_array(self, benchmark, n, values_array):
+        """Into a new `array`"""
+
+        def run(data):
+            return array("q", [x for x in data if x % 2 == 0])
+
+        benchmark(run, values_array)
+
+    @requires_numpy
+    def test_numpy(self, benchmark, n, values_ndarray):
+        """Boolean mask on an ndarray"""
+
+        def run(data):
+            return data[data % 2 == 0]
+
+        benchmark(run, values_ndarray)
+
+    @requires_numpy
+    def test_numpy_from_list(self, benchmark, n, values):
+        """Boolean mask, from a list and back"""
+
+        def run(data):
+            data = numpy.array(data, dtype=numpy.int64)
+            return data[data % 2 == 0].tolist()
+
+        benchmark(run, values)
+
+
+@sweep("n", start=10, stop=10**6)
+class TestBatchedMap:
+    """
+    Compute `2 * x + 1` for every value.
+    """
+
+    def test_list_comprehension(self, benchmark, n, values):
+        """List comprehension"""
+
+        def run(data):
+            return [2 * x + 1 for x in data]
+
+        benchmark(run, values)
+
+    def test_map(self, benchmark, n, values):
+        """`map` with a lambda"""
+
+        def run(data):
+            return list(map(lambda x: 2 * x + 1, data))
+
+        benchmark(run, values)
+
+    def test_array(self, benchmark, n, values_array):
+        """Into a new `array`"""
+
+        def run(data):
+            return array("q", [2 * x + 1 for x in data])
+
+        benchmark(run, values_array)
+
+    @requires_numpy
+    def test_numpy(self, benchmark, n, values_ndarray):
+        """Arithmetic on an ndarray"""
+
+        def run(data):
+            return 2 * data + 1
+
+        benchmark(run, values_ndarray)
+
+    @requires_numpy
+    def test_numpy_from_list(self, benchmark, n, values):
+        """Arithmetic, from a list and back"""
+
+        def run(data):
+            return (2 * numpy.array(data, dtype=numpy.int64) + 1).tolist()
+
+        benchmark(run, values)
+
+
+@verify
+@sweep("n", start=10, stop=10**6)
+class TestBatchedReduce:
+    """
+    Sum the values.
+    """
+
+    def test_sum(self, benchmark, n, values):
+        """`sum` of a list"""
+        benchmark(sum, values)
+
+    def test_reduce(self, benchmark, n, values):
+        """`functools.reduce` with `operator.add`"""
+
+        def run(data):
+            return functools.reduce(operator.add, data, 0)
+
+        benchmark(run, values)
+
+    def test_array(self, benchmark, n, values_array):
+        """`sum` of an `array`"""
+        benchmark(sum, values_array)
+
+    @requires_numpy
+    def test_numpy(self, benchmark, n, values_ndarray):
+        """`ndarray.sum`"""
+
+        def run(data):
+            return int(data.sum())
+
+        benchmark(run, values_ndarray)
+
+    @requires_numpy
+    def test_numpy_from_list(self, benchmark, n, values):
+        """`ndarray.sum`, from a list"""
+
+        def run(data):
+            return int(numpy.array(data, dtype=numpy.int64).sum())
+
+        benchmark(run, values)
+
+
+@verify
+@sweep("n", start=10, stop=10**6)
+class TestBatchedMembership:
+    """
+    Count the values that are among 500 keys.
+
+    A set lookup is constant time per value, `numpy.isin` sorts instead.
+    """
+
+    def test_set(self, benchmark, n, values):
+        """`in` a set, for every value"""
+        keys = set(LOOKUP_KEYS)
+
+        def run(data):
+            return sum(1 for x in data if x in keys)
+
+        benchmark(run, values)
+
+    def test_map_contains(self, benchmark, n, values):
+        """`sum` of booleans from `set.__contains__`"""
+        keys = set(LOOKUP_KEYS)
+
+        def run(data):
+            return sum(map(keys.__contains__, data))
+
+        benchmark(run, values)
+
+    @requires_numpy
+    def test_numpy_isin(self, benchmark, n, values_ndarray):
+        """`numpy.isin` on an ndarray"""
+        keys = numpy.array(LOOKUP_KEYS, dtype=numpy.int64)
+
+        def run(data):
+            return int(numpy.isin(data, keys).sum())
+
+        benchmark(run, values_ndarray)
+
+    @requires_numpy
+    def test_numpy_isin_from_list(self, benchmark, n, values):
+        """`numpy.isin`, from a list"""
+        keys = numpy.array(LOOKUP_KEYS, dtype=numpy.int64)
+
+        def run(data):
+            return int(numpy.isin(numpy.array(data, dtype=numpy.int64), keys).sum())
+
+        benchmark(run, values)
+
+
+@verify
+@sweep("n", start=10, stop=10**6)
+class TestBatchedGroupBy:
+    """
+    Sum the values by group, the group being the value modulo 16.
+    """
+
+    def test_loop(self, benchmark, n, values):
+        """Add to a list of sums in a loop"""
+
+        def run(data):
+            sums = [0] * GROUPS
+            for x in data:
+                sums[x % GROUPS] += x
+            return sums
+
+        benchmark(run, values)
+
+    def test_sorted_groupby(self, benchmark, n, values):
+        """`itertools.groupby` over the sorted values"""
+
+        def key(x):
+            return x % GROUPS
+
+        def run(data):
+            sums = [0] * GROUPS
+            for group, items in itertools.groupby(sorted(data, key=key), key=key):
+                sums[group] = sum(items)
+            return sums
+
+        benchmark(run, values)
+
+    @requires_numpy
+    def test_numpy_bincount(self, benchmark, n, values_ndarray):
+        """`numpy.bincount` with weights on an ndarray"""
+
+        def run(data):
+            sums = numpy.bincount(data % GROUPS, weights=data, minlength=GROUPS)
+            return sums.astype(numpy.int64).tolist()
+
+        benchmark(run, values_ndarray)
+
+    @requires_numpy
+    def test_numpy_add_at(self, benchmark, n, values_ndarray):
+        """`numpy.add.at` on an ndarray"""
+
+        def run(data):
+            sums = numpy.zeros(GROUPS, dtype=numpy.int64)
+            numpy.add.at(sums, data % GROUPS, data)
+            return sums.tolist()
+
+        benchmark(run, values_ndarray)
@@ -1,62 +1,440 @@
-from typing import Optional
+import copy
+import gc
+import importlib.util
+import inspect
+import math
+import os
+import platform
+import statistics
+import time
+from typing import Any, Callable, List, Optional, Sequence
 
 import attrs
 import pytest
+from pytest_benchmark.fixture import BenchmarkFixture
+
+from python_benchmark.warmup import detect_warmup
+from tests import instrumentation
+from tests.fingerprint import fingerprint
+
+try:
+    import tracemalloc
+except ImportError:
+    # PyPy has no `_tracemalloc`.
+    tracemalloc = None
 
 CONFIG_NAME = "__benchmark_config__"
 
+# Only a JIT warms up for long enough to skew the stats, elsewhere warmup detection is opt-in.
+JIT = platform.python_implementation() != "CPython"
 
-def get_custom_benchmark(cls):
-    @pytest.fixture(name="benchmark")
-    def custom_benchmark(self, request, saved_result, benchmark):
-        class Benchmark:
-            def _check_result(self, function_to_benchmark, *args, **kwargs):
-                result = function_to_benchmark(*args, **kwargs)
-                nodeid = request.node.nodeid
-                if saved_result and saved_result.result != result:
-                    pytest.fail(reason=f"Result different from {saved_result.nodeid}")
-                    return
-                saved_result.result = result
-                saved_result.nodeid = nodeid
-
-            def __call__(self, function_to_benchmark, *args, **kwargs):
-
-                config: BenchmarkConfig = getattr(cls, "__benchmark_config__", None)
-                if config:
-                    if config.verify:
-                        self._check_result(function_to_benchmark, *args, **kwargs)
-                    return benchmark.pedantic(
-                        target=function_to_benchmark,
-                        rounds=config.rounds,
-                        iterations=config.iterations,
-                        args=args,
-                        kwargs=kwargs,
-                    )
-                return benchmark(function_to_benchmark, *args, **kwargs)
-
-            def pedantic(
-                self,
-                target,
-                args=(),
-                kwargs=None,
-                setup=None,
-                rounds=1,
-                warmup_rounds=0,
-                iterations=1,
-            ):
-                self._check_result(target, *args, **(kwargs or {}))
+# z-score for a two-sided 95% confidence interval.
+CONFIDENCE_Z = 1.96
+# A round must be this many times longer than the timer resolution.
+RESOLUTION_FACTOR = 1000
+# Rounds for groups with fresh inputs that don't set `rounds` themselves.
+FRESH_INPUT_ROUNDS = 1000
+
+# `measure_memory` needs `tracemalloc.reset_peak`, new in Python 3.9.
+CAN_MEASURE_MEMORY = tracemalloc is not None and hasattr(tracemalloc, "reset_peak")
+
+# The instruction counter chosen for `--benchmark-instructions`, None when it is off.
+INSTRUCTION_COUNTER = pytest.StashKey[Optional[str]]()
+
+
+def timer_resolution(timer=time.perf_counter, samples: int = 20) -> float:
+    """The smallest non-zero difference between two timer readings."""
+    resolution = math.inf
+    for _ in range(samples):
+        start = timer()
+        end = timer()
+        while end == start:
+            end = timer()
+        resolution = min(resolution, end - start)
+    return resolution
+
+
+def time_round(timer, function, args, kwargs, iterations: int) -> float:
+    """Time a round the way pytest-benchmark does, returning the time per iteration."""
+    loops = range(iterations)
+    start = timer()
+    for _ in loops:
+        function(*args, **kwargs)
+    return (timer() - start) / iterations
+
+
+@attrs.define
+class Calibration:
+    iterations: int
+    rounds: int
+    timer_resolution: float
+    call_overhead: float
+    pilot_mean: float
+    pilot_stddev: float
+
+
+def calibrate(
+    timer, function, args, kwargs, config: "BenchmarkConfig"
+) -> Calibration:
+    """Pick iterations so a round lasts `config.round_time`, and enough rounds for `config.precision`.
+
+    The number of rounds comes from the variance of a short pilot run:
+    we stop adding rounds once the 95% confidence interval of the mean
+    is expected to be within `precision` of it. The pilot times have the
+    call overhead taken out, see `subtract_overhead`.
+    """
+    resolution = timer_resolution(timer)
+    round_time = max(config.round_time, resolution * RESOLUTION_FACTOR)
+
+    def noop(*args, **kwargs):
+        pass
+
+    # The loop and call overhead is part of every round, so it is part of the
+    # measured per-iteration time we scale the iterations by.
+    call_overhead = min(time_round(timer, noop, args, kwargs, 1000) for _ in range(5))
+
+    iterations = 1
+    while True:
+        per_iteration = time_round(timer, function, args, kwargs, iterations)
+        elapsed = per_iteration * iterations
+        if elapsed >= round_time / 10 or iterations >= 2**30:
+            break
+        iterations *= 10
+    iterations = max(1, math.ceil(iterations * round_time / max(elapsed, resolution)))
+
+    pilot = [
+        time_round(timer, function, args, kwargs, iterations)
+        for _ in range(config.pilot_rounds)
+    ]
+    pilot = subtract_overhead(pilot, call_overhead)
+    mean = statistics.fmean(pilot)
+    stddev = statistics.stdev(pilot) if len(pilot) > 1 else 0.0
+    # A call no slower than a no-op has no mean to be precise about.
+    needed = math.ceil((CONFIDENCE_Z * stddev / (config.precision * mean)) ** 2) if mean else 0
+    rounds = min(max(needed, config.min_rounds), config.max_rounds)
+
+    return Calibration(
+        iterations=iterations,
+        rounds=rounds,
+        timer_resolution=resolution,
+        call_overhead=call_overhead,
+        pilot_mean=mean,
+        pilot_stddev=stddev,
+    )
+
+
+def subtract_overhead(times: Sequence[float], call_overhead: float) -> List[float]:
+    """Per-iteration times without the loop and call overhead, never below 0."""
+    return [max(0.0, duration - call_overhead) for duration in times]
+
+
+@attrs.define
+class MemoryUsage:
+    rounds: int
+    # Bytes above what was allocated before the call, at its highest point.
+    peak: int
+    # Bytes still allocated when the call returns, including the result.
+    net: int
+
+
+def measure_memory(function, make_inputs, rounds: int) -> MemoryUsage:
+    """Measure the allocations of a call with `tracemalloc`.
+
+    Tracing slows every allocation down, so this runs in separate rounds
+    that are not timed. We keep the smallest numbers over the rounds,
+    as unrelated allocations (caches warming up, the GC) only ever add to them.
+    """
+    was_tracing = tracemalloc.is_tracing()
+    if not was_tracing:
+        tracemalloc.start()
+    peaks = []
+    nets = []
+    try:
+        for _ in range(rounds):
+            args, kwargs = make_inputs()
+            gc.collect()
+            tracemalloc.reset_peak()
+            before, _ = tracemalloc.get_traced_memory()
+            result = function(*args, **kwargs)
+            after, peak = tracemalloc.get_traced_memory()
+            del result
+            peaks.append(peak - before)
+            nets.append(after - before)
+    finally:
+        if not was_tracing:
+            tracemalloc.stop()
+    return MemoryUsage(rounds=rounds, peak=min(peaks), net=min(nets))
+
+
+class Benchmark(BenchmarkFixture):
+    """Applies the group's `BenchmarkConfig` on top of pytest-benchmark's fixture.
+
+    pytest-benchmark requires the `benchmark` fixture to be a `BenchmarkFixture`,
+    so we subclass it and forward everything we don't override to the real one.
+    """
 
+    def __init__(self, fixture: BenchmarkFixture, config, request, saved_result):
+        object.__setattr__(self, "_fixture", fixture)
+        object.__setattr__(self, "_config", config)
+        object.__setattr__(self, "_request", request)
+        object.__setattr__(self, "_saved_result", saved_result)
+
+    def __getattr__(self, name):
+        return getattr(self._fixture, name)
+
+    def __setattr__(self, name, value):
+        setattr(self._fixture, name, value)
+
+    def _make_inputs(self, args, kwargs):
+        factory = self._config.fresh_inputs if self._config else None
+        if not factory:
+            return args, kwargs
+        return (
+            tuple(factory(arg) for arg in args),
+            {name: factory(value) for name, value in kwargs.items()},
+        )
+
+    def _check_result(self, function_to_benchmark, *args, **kwargs):
+        args, kwargs = self._make_inputs(args, kwargs)
+        # Only the fingerprint is kept, the result is released right away.
+        result = fingerprint(
+            function_to_benchmark(*args, **kwargs),
+            ordered=self._config.ordered if self._config else True,
+        )
+        nodeid = self._request.node.nodeid
+        saved_result = self._saved_result.get(self._callspec_id())
+        if saved_result and saved_result.result.digest != result.digest:
+            pytest.fail(
+                reason=f"Result different from {saved_result.nodeid}: "
+                f"{result.sample} != {saved_result.result.sample}"
+            )
+            return
+        saved_result.result = result
+        saved_result.nodeid = nodeid
+
+    def _record_instrumentation(self, function_to_benchmark, args, kwargs):
+        result = instrumentation.instrument(
+            function_to_benchmark,
+            lambda: self._make_inputs(args, kwargs),
+            self._config.instrument_rounds,
+            fresh_inputs=self._config.fresh_inputs is not None,
+        )
+        self._fixture.extra_info["instrumentation"] = attrs.asdict(result)
+
+    def _record_instructions(self, function_to_benchmark, args, kwargs):
+        counter = self._request.config.stash.get(INSTRUCTION_COUNTER, None)
+        if not counter or self._fixture.disabled:
+            return
+        if counter == "callgrind":
+            count = instrumentation.callgrind_instructions(
+                self._request.node.nodeid, self._request.config.rootpath
+            )
+            if count is None:
+                return
+        else:
+            fresh = bool(self._config and self._config.fresh_inputs)
+            count = instrumentation.count_instructions(
+                function_to_benchmark,
+                lambda: self._make_inputs(args, kwargs),
+                iterations=1 if fresh else instrumentation.INSTRUCTION_ITERATIONS,
+            )
+        self._fixture.extra_info["instructions"] = {"counter": counter, "count": count}
+
+    def _count_calls(self, function_to_benchmark, args, kwargs):
+        """Count the calls under callgrind instead of benchmarking them, see `callgrind_module`."""
+        call_args, call_kwargs = self._make_inputs(args, kwargs)
+        result = function_to_benchmark(*call_args, **call_kwargs)
+        instrumentation.count_under_callgrind(
+            self._request.node.nodeid,
+            function_to_benchmark,
+            lambda: self._make_inputs(args, kwargs),
+            fresh_inputs=bool(self._config and self._config.fresh_inputs),
+        )
+        return result
+
+    def _callspec_id(self) -> str:
+        callspec = getattr(self._request.node, "callspec", None)
+        return callspec.id if callspec else ""
+
+    def _record_scaling(self):
+        params = self._request.node.callspec.params
+        self._fixture.extra_info["scaling"] = {
+            "executor": params["executor"],
+            "workers": params["workers"],
+        }
+
+    def _record_sweep(self):
+        param = self._config.sweep
+        size = self._request.node.callspec.params[param]
+        self._fixture.extra_info["sweep"] = {"param": param, "size": size}
+
+    def _calibrated(self, function_to_benchmark, args, kwargs):
+        benchmark = self._fixture
+        if benchmark.disabled:
+            return benchmark.pedantic(
+                target=function_to_benchmark, args=args, kwargs=kwargs
+            )
+        timer = getattr(benchmark, "_timer", time.perf_counter)
+        calibration = calibrate(timer, function_to_benchmark, args, kwargs, self._config)
+        benchmark.extra_info["calibration"] = attrs.asdict(calibration)
+        result = benchmark.pedantic(
+            target=function_to_benchmark,
+            rounds=calibration.rounds,
+            iterations=calibration.iterations,
+            args=args,
+            kwargs=kwargs,
+        )
+        # The saved stats stay as measured. For calls close to the overhead, taking it
+        # out can leave nothing, and the reporter divides by these times.
+        own = subtract_overhead(benchmark.stats.stats.data, calibration.call_overhead)
+        benchmark.extra_info["calibration"]["without_overhead"] = {
+            "min": min(own),
+            "median": statistics.median(own),
+            "mean": statistics.fmean(own),
+        }
+        return result
+
+    def _record_memory(self, function_to_benchmark, args, kwargs):
+        memory = measure_memory(
+            function_to_benchmark,
+            lambda: self._make_inputs(args, kwargs),
+            self._config.memory_rounds,
+        )
+        self._fixture.extra_info["memory"] = attrs.asdict(memory)
+
+    def _with_fresh_inputs(self, function_to_benchmark, args, kwargs):
+        """Run each round on new inputs, timing their creation separately."""
+        benchmark = self._fixture
+        timer = getattr(benchmark, "_timer", time.perf_counter)
+        setup_times = []
+
+        def setup():
+            start = timer()
+            inputs = self._make_inputs(args, kwargs)
+            setup_times.append(timer() - start)
+            return inputs
+
+        # pytest-benchmark only allows a setup function with a single iteration per round.
+        result = benchmark.pedantic(
+            target=function_to_benchmark,
+            setup=setup,
+            rounds=self._config.rounds or FRESH_INPUT_ROUNDS,
+            iterations=1,
+        )
+        benchmark.extra_info["setup"] = {
+            "rounds": len(setup_times),
+            "min": min(setup_times),
+            "mean": statistics.fmean(setup_times),
+        }
+        return result
+
+    def _in_event_loop(self, function_to_benchmark):
+        """Run a coroutine function to completion on the test's event loop."""
+        loop = self._request.getfixturevalue("event_loop")
+        self._fixture.extra_info["event_loop"] = self._request.node.callspec.params["event_loop"]
+
+        def run(*args, **kwargs):
+            return loop.run_until_complete(function_to_benchmark(*args, **kwargs))
+
+        return run
+
+    def _record_warmup(self):
+        """Save the warmup rounds, and the stats without them, see `detect_warmup`.
+
+        The saved stats keep every round.
+        """
+        metadata = self._fixture.stats
+        if self._fixture.disabled or not metadata:
+            return
+        if not (JIT or (self._config and self._config.warmup)):
+            return
+        warmup = detect_warmup(metadata.stats.data, metadata.iterations)
+        if warmup is None:
+            return
+        self._fixture.extra_info["warmup"] = attrs.asdict(warmup)
+        if warmup.rounds:
+            steady = metadata.stats.data[warmup.rounds :]
+            self._fixture.extra_info["warmup"]["after_warmup"] = {
+                "min": min(steady),
+                "median": statistics.median(steady),
+                "mean": statistics.fmean(steady),
+            }
+
+    def __call__(self, function_to_benchmark, *args, **kwargs):
+        result = self._run(function_to_benchmark, *args, **kwargs)
+        self._record_warmup()
+        return result
+
+    def _run(self, function_to_benchmark, *args, **kwargs):
+        benchmark = self._fixture
+        config: Optional[BenchmarkConfig] = self._config
+        if config and config.event_loop and inspect.iscoroutinefunction(function_to_benchmark):
+            function_to_benchmark = self._in_event_loop(function_to_benchmark)
+        if instrumentation.CALLGRIND_ENV in os.environ:
+            return self._count_calls(function_to_benchmark, args, kwargs)
+        self._record_instructions(function_to_benchmark, args, kwargs)
+        if config:
+            if config.sweep:
+                self._record_sweep()
+            if config.scaling:
+                self._record_scaling()
+            if config.verify:
+                self._check_result(function_to_benchmark, *args, **kwargs)
+            if config.memory and CAN_MEASURE_MEMORY and not benchmark.disabled:
+                self._record_memory(function_to_benchmark, args, kwargs)
+            if config.instrument and not benchmark.disabled:
+                self._record_instrumentation(function_to_benchmark, args, kwargs)
+            if config.fresh_inputs:
+                return self._with_fresh_inputs(function_to_benchmark, args, kwargs)
+            if config.calibrate:
+                return self._calibrated(function_to_benchmark, args, kwargs)
+            if config.rounds is not None or config.iterations is not None:
                 return benchmark.pedantic(
-                    target=target,
+                    target=function_to_benchmark,
+                    rounds=config.rounds or 1,
+                    iterations=config.iterations or 1,
                     args=args,
                     kwargs=kwargs,
-                    setup=setup,
-                    rounds=rounds,
-                    warmup_rounds=warmup_rounds,
-                    iterations=iterations,
                 )
+        return benchmark(function_to_benchmark, *args, **kwargs)
+
+    def pedantic(
+        self,
+        target,
+        args=(),
+        kwargs=None,
+        setup=None,
+        rounds=1,
+        warmup_rounds=0,
+        iterations=1,
+    ):
+        if instrumentation.CALLGRIND_ENV in os.environ and setup is None:
+            return self._count_calls(target, args, kwargs or {})
+        self._check_result(target, *args, **(kwargs or {}))
+        if setup is None:
+            self._record_instructions(target, args, kwargs or {})
+
+        result = self._fixture.pedantic(
+            target=target,
+            args=args,
+            kwargs=kwargs,
+            setup=setup,
+            rounds=rounds,
+            warmup_rounds=warmup_rounds,
+            iterations=iterations,
+        )
+        self._record_warmup()
+        return result
+
 
-        return Benchmark()
+def get_custom_benchmark(cls):
+    @pytest.fixture(name="benchmark")
+    def custom_benchmark(self, request, saved_result, benchmark):
+        config = getattr(cls, CONFIG_NAME, None)
+        if isinstance(benchmark, Benchmark):
+            # The conftest wraps every benchmark, replace its wrapper with ours.
+            benchmark = benchmark._fixture
+        return Benchmark(benchmark, config, request, saved_result)
 
     return custom_benchmark
 
@@ -68,9 +446,35 @@ def customize_benchmark(cls):
 
 @attrs.define
 class BenchmarkConfig:
-    iterations: int = 1
-    rounds: int = 1
+    # Fixed pedantic settings. When neither is set, pytest-benchmark calibrates as usual.
+    iterations: Optional[int] = None
+    rounds: Optional[int] = None
     verify: bool = False
+    # Whether `@verify` compares list and tuple results in order, or as multisets.
+    ordered: bool = True
+    # Our own calibration, see `calibrate`.
+    calibrate: bool = False
+    round_time: float = 1e-3
+    precision: float = 0.01
+    pilot_rounds: int = 20
+    min_rounds: int = 5
+    max_rounds: int = 10_000
+    # Called on every argument before each round, outside the timed region.
+    fresh_inputs: Optional[Callable[[Any], Any]] = None
+    # Untimed rounds measuring allocations, see `measure_memory`.
+    memory: bool = False
+    memory_rounds: int = 5
+    # Untimed rounds reading hardware counters and GC activity, see `instrumentation`.
+    instrument: bool = False
+    instrument_rounds: int = 20
+    # The parameter holding the input size, for groups run over a sweep of sizes.
+    sweep: Optional[str] = None
+    # Run over a number of workers, see `scaling`.
+    scaling: bool = False
+    # Run coroutine functions on an event loop, see `async_benchmark`.
+    event_loop: bool = False
+    # Look for warmup rounds on CPython too, see `track_warmup`.
+    warmup: bool = False
 
 
 def update_config(cls, **changes):
@@ -79,18 +483,211 @@ def update_config(cls, **changes):
     setattr(cls, CONFIG_NAME, new)
 
 
-def verify(cls: type):
-    customize_benchmark(cls)
-    update_config(cls, verify=True)
+def verify(cls: Optional[type] = None, *, ordered: bool = True):
+    """Check that every benchmark of the group returns the same result.
+
+    Results are compared through their `fingerprint`, so they are not kept around.
+    With `ordered=False`, list and tuple results may differ in order.
+    """
+
+    def decorator(cls):
+        customize_benchmark(cls)
+        update_config(cls, verify=True, ordered=ordered)
+        return cls
 
-    return cls
+    return decorator(cls) if cls is not None else decorator
 
 
-def pedantic(*, iterations: Optional[int] = None, rounds: Optional[int] = None):
-    return lambda x: x
+def pedantic(
+    *,
+    iterations: Optional[int] = None,
+    rounds: Optional[int] = None,
+    calibrate: bool = False,
+    round_time: Optional[float] = None,
+    precision: Optional[float] = None,
+    max_rounds: Optional[int] = None,
+):
+    """Run the group's benchmarks in pedantic mode.
+
+    Either give fixed `iterations` and `rounds`, or use `calibrate=True` to pick
+    iterations so each round lasts `round_time` seconds, and add rounds until the
+    confidence interval of the mean is within `precision` of it.
+    """
+    changes = {
+        "iterations": iterations,
+        "rounds": rounds,
+        "round_time": round_time,
+        "precision": precision,
+        "max_rounds": max_rounds,
+    }
+
     def decorator(cls):
         customize_benchmark(cls)
-        update_config(cls, iterations=iterations, rounds=rounds)
+        update_config(
+            cls,
+            calibrate=calibrate,
+            **{name: value for name, value in changes.items() if value is not None},
+        )
         return cls
 
     return decorator
+
+
+def fresh_inputs(factory: Callable[[Any], Any] = copy.copy):
+    """Give every round its own copy of the benchmark's arguments.
+
+    Use this for benchmarks that mutate their inputs, so that each round
+    measures the same work. The copies are made outside the timed region,
+    and their cost is saved separately in `extra_info["setup"]`.
+    As pytest-benchmark needs a single iteration per round for this,
+    the group's `iterations` setting is ignored.
+    """
+
+    def decorator(cls):
+        customize_benchmark(cls)
+        update_config(cls, fresh_inputs=factory)
+        return cls
+
+    return decorator
+
+
+def track_memory(rounds: int = 5):
+    """Also measure the peak and net allocations of the group's benchmarks.
+
+    The measurements run in their own untimed rounds under `tracemalloc`,
+    and are saved in `extra_info["memory"]` for the reporter. Where
+    `tracemalloc` can't measure them, as on PyPy, they are left out.
+    """
+
+    def decorator(cls):
+        customize_benchmark(cls)
+        update_config(cls, memory=True, memory_rounds=rounds)
+        return cls
+
+    return decorator
+
+
+def track_warmup(cls: Optional[type] = None):
+    """Also look for warmup rounds on CPython, where its specializing interpreter may need them.
+
+    They are always looked for on other interpreters. The rounds stay in the stats,
+    the warmup and the stats after it are saved in `extra_info["warmup"]`.
+    """
+
+    def decorator(cls):
+        customize_benchmark(cls)
+        update_config(cls, warmup=True)
+        return cls
+
+    return decorator(cls) if cls is not None else decorator
+
+
+def instrumented(rounds: int = 20):
+    """Also count instructions, cycles, cache and branch misses, and GC activity per call.
+
+    Hardware counters need Linux and permission to use `perf_event_open`
+    (see `kernel.perf_event_paranoid`). Without them only the GC is measured,
+    and the reason is saved instead. Everything goes in `extra_info["instrumentation"]`.
+    """
+
+    def decorator(cls):
+        customize_benchmark(cls)
+        update_config(cls, instrument=True, instrument_rounds=rounds)
+        return cls
+
+    return decorator
+
+
+def geometric_sizes(start: int, stop: int, factor: float) -> List[int]:
+    """`start`, `start * factor`, ... up to and including `stop`."""
+    sizes = []
+    size = start
+    while size <= stop:
+        sizes.append(round(size))
+        size *= factor
+    return sizes
+
+
+def sweep(
+    param: str = "n",
+    *,
+    start: int = 10,
+    stop: int = 10**7,
+    factor: float = 10,
+    indirect: bool = False,
+):
+    """Run every benchmark in the group over a geometric range of input sizes.
+
+    The group's tests get the size as the `param` argument. With `indirect=True`,
+    `param` names a fixture instead, which gets the size as `request.param`.
+    The reporter fits each variant's time against the size, and marks where the
+    fastest variant changes.
+    """
+    sizes = geometric_sizes(start, stop, factor)
+
+    def decorator(cls):
+        customize_benchmark(cls)
+        update_config(cls, sweep=param)
+        return pytest.mark.parametrize(
+            param, sizes, indirect=indirect, ids=[f"{param}={size}" for size in sizes]
+        )(cls)
+
+    return decorator
+
+
+def fan_out(pool, workers: int, task, *args):
+    """Run `task(*args)` once per worker, and wait for all of them."""
+    for future in [pool.submit(task, *args) for _ in range(workers)]:
+        future.result()
+
+
+def scaling(
+    workers: Sequence[int] = (1, 2, 4, 8),
+    executors: Sequence[str] = ("thread", "process"),
+):
+    """Run every benchmark in the group on a growing number of threads and processes.
+
+    The group's tests get the `pool` fixture, with all its `workers` already started,
+    and should `benchmark(fan_out, pool, workers, task, ...)` so that every worker
+    does the same amount of work. Tasks and their arguments must be picklable
+    to run on processes, and each process works on its own copy of them.
+    The reporter shows the throughput speedup and scaling efficiency over the workers.
+    """
+
+    def decorator(cls):
+        customize_benchmark(cls)
+        update_config(cls, scaling=True)
+        cls = pytest.mark.parametrize(
+            "workers", workers, ids=[f"workers={count}" for count in workers]
+        )(cls)
+        return pytest.mark.parametrize("executor", executors)(cls)
+
+    return decorator
+
+
+def async_benchmark(loops: Sequence[str] = ("asyncio", "uvloop")):
+    """Run the group's coroutine functions on an event loop.
+
+    `benchmark(coroutine_function, ...)` times `loop.run_until_complete` of a new
+    coroutine per call. Each test gets its own loop from the `event_loop` fixture,
+    created and closed outside the timed region; tests can also use it to start
+    background tasks. uvloop runs are skipped when it is not installed.
+    """
+    params = [
+        pytest.param(
+            kind,
+            marks=pytest.mark.skipif(
+                kind == "uvloop" and importlib.util.find_spec("uvloop") is None,
+                reason="uvloop is not installed",
+            ),
+        )
+        for kind in loops
+    ]
+
+    def decorator(cls):
+        customize_benchmark(cls)
+        update_config(cls, event_loop=True)
+        cls = pytest.mark.usefixtures("event_loop")(cls)
+        return pytest.mark.parametrize("event_loop", params, indirect=True)(cls)
+
+    return decorator